@@ -0,0 +1,412 @@
+"""Parallel evaluation of a trained policy on the full game.
+
+:func:`evaluate` plays ``n_games`` seeded :class:`ChessEnv` games split over
+a process pool.  Each worker loads the model once and keeps ``batch_size``
+games in flight with a :class:`LockstepRunner`: every step stacks their
+observations into one forward pass, and a finished game's slot is
+refilled from the worker's queue.  Nothing is rendered.
+
+``opponent`` picks who plays the other colour:
+
+* ``"self"``: the policy plays both colours, as in training; results are
+  counted for White.
+* ``"random"``: a seeded random legal move; the policy plays White in even
+  games and Black in odd ones.
+
+Game ``i`` is reset with ``seed + i`` to the position after
+``opening_plies`` random moves drawn with that seed, so deterministic games,
+self-play included, are not all the same game.  With ``deterministic=False``
+(``--stochastic``) it samples the policy's moves from its own generator
+seeded with ``seed + i``.  A report is reproducible whatever the number of
+workers and batch size::
+
+    python -m agents.evaluate chess_agent.zip --games 200 --workers 4 --opponent random
+"""
+
+import argparse
+import inspect
+import multiprocessing
+import sys
+import time
+
+import chess
+import numpy as np
+import torch
+
+try:  # Supports running with `src` on sys.path or importing `src.agents...`
+    from agents.inference import predict_actions
+    from agents.ppo_agent import load_model, saved_with_masking
+    from environment.chess_env import ChessEnv
+except ImportError:  # pragma: no cover - import path fallback
+    from src.agents.inference import predict_actions
+    from src.agents.ppo_agent import load_model, saved_with_masking
+    from src.environment.chess_env import ChessEnv
+
+DEFAULT_GAMES = 100
+DEFAULT_BATCH_SIZE = 16  # Concurrent games per worker sharing a forward pass
+DEFAULT_MAX_PLIES = 300  # Longer games are scored as draws
+DEFAULT_OPENING_PLIES = 4  # Random moves before the policies take over
+
+OPPONENTS = ("self", "random")
+RESULTS = ("win", "draw", "loss")
+
+
+###################################################
+###### Games ######################################
+###################################################
+
+class RandomOpponent:
+    """Plays a uniformly random legal move."""
+
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+
+    def select_action(self, env):
+        return int(self.rng.choice(np.flatnonzero(env.action_masks())))
+
+
+def opening_fen(seed, plies=DEFAULT_OPENING_PLIES):
+    """FEN after ``plies`` random legal moves from the standard position,
+    drawn from a generator seeded with ``seed``.  Openings that end the game
+    are drawn again."""
+    rng = np.random.default_rng(seed)
+    while True:
+        board = chess.Board()
+        for _ in range(plies):
+            moves = list(board.legal_moves)
+            board.push(moves[rng.integers(len(moves))])
+        if not board.is_game_over():
+            return board.fen()
+
+
+def build_opponent(opponent, seed):
+    if opponent not in OPPONENTS:
+        raise ValueError(f"Unknown opponent: {opponent!r}. Expected one of {OPPONENTS}.")
+    if opponent == "random":
+        return RandomOpponent(seed)
+    return None
+
+
+class EvaluationGame:
+    """One game between the policy and an opponent, stepped move by move
+    from the opening of ``seed + index``."""
+
+    def __init__(self, index, seed, opponent="self", max_plies=DEFAULT_MAX_PLIES, opening_plies=DEFAULT_OPENING_PLIES):
+        self.index = index
+        self.max_plies = max_plies
+        self.env = ChessEnv(info_level="minimal")
+        fen = opening_fen(seed + index, opening_plies)
+        self.observation, _ = self.env.reset(seed=seed + index, options={"fen": fen})
+
+        self.opponent = build_opponent(opponent, seed + index)
+        self.generator = torch.Generator().manual_seed(seed + index)  # For sampled policy moves
+        self.agent_white = self.opponent is None or index % 2 == 0
+
+        self.plies = 0
+        self.agent_actions = 0
+        self.illegal_moves = 0
+        self.result = None
+        self.reason = None
+
+    @property
+    def done(self):
+        return self.result is not None
+
+    @property
+    def agent_to_move(self):
+        return self.opponent is None or self.env.board.turn == self.agent_white
+
+    def play_opponent(self):
+        """Plays opponent moves until it is the policy's turn or the game ends."""
+        while not self.done and not self.agent_to_move:
+            self._step(self.opponent.select_action(self.env), agent=False)
+
+    def play_agent(self, action):
+        self._step(action, agent=True)
+        self.play_opponent()
+
+    def _step(self, action, agent):
+        mover_white = self.env.board.turn
+        self.observation, _, terminated, truncated, info = self.env.step(int(action))
+        reason = info.get("reason")
+
+        if agent:
+            self.agent_actions += 1
+        if reason == "illegal move":
+            if agent:
+                self.illegal_moves += 1
+            return
+
+        if reason is None:
+            self.plies += 1
+
+        if terminated or truncated:
+            self._finish(info.get("winner"), reason, mover_white)
+        elif self.plies >= self.max_plies:
+            self._finish("draw", "max plies", mover_white)
+
+    def _finish(self, winner, reason, mover_white):
+        if reason == "too many illegal moves":
+            winner = "black" if mover_white else "white"
+        elif winner is None:
+            winner = "draw"
+
+        if winner == "draw":
+            self.result = "draw"
+        else:
+            self.result = "win" if (winner == "white") == self.agent_white else "loss"
+        self.reason = reason or "game over"
+
+    def summary(self):
+        return {
+            "index": self.index,
+            "result": self.result,
+            "reason": self.reason,
+            "agent_white": self.agent_white,
+            "plies": self.plies,
+            "agent_actions": self.agent_actions,
+            "illegal_moves": self.illegal_moves,
+        }
+
+
+def takes_masks(model):
+    # MaskablePPO is evaluated with the legal action masks it was trained with
+    return "action_masks" in inspect.signature(model.predict).parameters
+
+
+class LockstepRunner:
+    """Advances up to ``batch_size`` games in lockstep with one forward pass
+    per step.
+
+    Each step stacks the observations of the games in the slots, predicts
+    all their actions with one :func:`~agents.inference.predict_actions` call
+    and plays them.  A slot whose game ends is
+    refilled from the queue of game indices straight away, so batches stay
+    full until the queue runs dry.  ``predictions``, ``forward_passes`` and
+    ``inference_seconds`` count the work done.
+    """
+
+    def __init__(self, model, seed=0, opponent="self", batch_size=DEFAULT_BATCH_SIZE,
+                 max_plies=DEFAULT_MAX_PLIES, deterministic=True, opening_plies=DEFAULT_OPENING_PLIES):
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+        self.model = model
+        self.seed = seed
+        self.opponent = opponent
+        self.batch_size = batch_size
+        self.max_plies = max_plies
+        self.deterministic = deterministic
+        self.opening_plies = opening_plies
+        self.masked = takes_masks(model)
+
+        self.predictions = 0
+        self.forward_passes = 0
+        self.inference_seconds = 0.0
+
+    def predict(self, games):
+        """Actions of the policy for every game, in one forward pass."""
+        observations = np.stack([game.observation for game in games])
+        masks = np.stack([game.env.action_masks() for game in games]) if self.masked else None
+
+        start = time.perf_counter()
+        generators = None if self.deterministic else [game.generator for game in games]
+        actions = predict_actions(self.model.policy, observations, masks, self.deterministic, generators)
+
+        self.inference_seconds += time.perf_counter() - start
+        self.predictions += len(games)
+        self.forward_passes += 1
+        return actions
+
+    def run(self, indices):
+        """Plays the games ``indices`` and returns their
+        :meth:`EvaluationGame.summary` dicts in index order."""
+        queue = iter(indices)
+        slots, finished = [], []
+
+        def refill():
+            while len(slots) < self.batch_size:
+                index = next(queue, None)
+                if index is None:
+                    return
+                game = EvaluationGame(index, self.seed, self.opponent, self.max_plies, self.opening_plies)
+                game.play_opponent()
+                (finished if game.done else slots).append(game)
+
+        refill()
+        while slots:
+            for game, action in zip(slots, self.predict(slots)):
+                game.play_agent(action)
+
+            finished.extend(game for game in slots if game.done)
+            slots[:] = [game for game in slots if not game.done]
+            refill()
+
+        return sorted((game.summary() for game in finished), key=lambda summary: summary["index"])
+
+    def stats(self):
+        return {
+            "predictions": self.predictions,
+            "forward_passes": self.forward_passes,
+            "inference_seconds": self.inference_seconds,
+        }
+
+
+def play_games(
+    model,
+    indices,
+    seed=0,
+    opponent="self",
+    batch_size=DEFAULT_BATCH_SIZE,
+    max_plies=DEFAULT_MAX_PLIES,
+    deterministic=True,
+    opening_plies=DEFAULT_OPENING_PLIES,
+):
+    """Plays the games ``indices`` with a :class:`LockstepRunner` and
+    returns their summaries and the runner's :meth:`~LockstepRunner.stats`."""
+    runner = LockstepRunner(model, seed, opponent, batch_size, max_plies, deterministic, opening_plies)
+    return runner.run(indices), runner.stats()
+
+
+###################################################
+###### Worker pool ################################
+###################################################
+
+def _play_worker(task):
+    model_path, masked, indices, options = task
+    torch.set_num_threads(1)  # One core per worker process
+    model = load_model(model_path, masked=masked, device="cpu")
+    return play_games(model, indices, **options)
+
+
+def summarize(games, seconds, inference=None):
+    """Win/draw/loss counts and rates, average length, illegal move rate and
+    throughput, plus the prediction counters of ``inference`` if given."""
+    count = len(games)
+    counts = {result: sum(game["result"] == result for game in games) for result in RESULTS}
+    agent_actions = sum(game["agent_actions"] for game in games)
+
+    return {
+        "games": count,
+        "wins": counts["win"],
+        "draws": counts["draw"],
+        "losses": counts["loss"],
+        "win_rate": counts["win"] / count if count else 0.0,
+        "draw_rate": counts["draw"] / count if count else 0.0,
+        "loss_rate": counts["loss"] / count if count else 0.0,
+        "score": (counts["win"] + 0.5 * counts["draw"]) / count if count else 0.0,
+        "average_plies": sum(game["plies"] for game in games) / count if count else 0.0,
+        "illegal_move_rate": sum(game["illegal_moves"] for game in games) / agent_actions if agent_actions else 0.0,
+        "seconds": seconds,
+        "games_per_sec": count / seconds if seconds else 0.0,
+        **_inference_report(inference, seconds),
+    }
+
+
+def _inference_report(inference, seconds):
+    if not inference:
+        return {}
+    passes = inference["forward_passes"]
+    return {
+        **inference,
+        "mean_batch_size": inference["predictions"] / passes if passes else 0.0,
+        "predictions_per_sec": inference["predictions"] / seconds if seconds else 0.0,
+    }
+
+
+def evaluate(
+    model,
+    n_games=DEFAULT_GAMES,
+    seed=0,
+    opponent="self",
+    workers=1,
+    batch_size=DEFAULT_BATCH_SIZE,
+    max_plies=DEFAULT_MAX_PLIES,
+    deterministic=True,
+    opening_plies=DEFAULT_OPENING_PLIES,
+    start_method=None,
+):
+    """Plays ``n_games`` games and returns :func:`summarize` of them plus the
+    per-game summaries under ``"per_game"``.
+
+    ``model`` is a loaded model or the path of a saved ``PPO`` or
+    ``MaskablePPO`` one.  With ``workers > 1`` it must be a path: each
+    worker loads its own copy and plays every ``workers``-th game.
+    """
+    build_opponent(opponent, seed)  # Validates the name up front
+    options = {
+        "seed": seed,
+        "opponent": opponent,
+        "batch_size": batch_size,
+        "max_plies": max_plies,
+        "deterministic": deterministic,
+        "opening_plies": opening_plies,
+    }
+    indices = list(range(n_games))
+    masked = saved_with_masking(model) if isinstance(model, str) else None
+    start = time.perf_counter()
+
+    if workers <= 1:
+        if isinstance(model, str):
+            model = load_model(model, masked=masked)
+        games, inference = play_games(model, indices, **options)
+    else:
+        if not isinstance(model, str):
+            raise ValueError("evaluate with workers > 1 needs the path of a saved model")
+        tasks = [(model, masked, indices[worker::workers], options) for worker in range(workers)]
+        context = multiprocessing.get_context(start_method)
+        with context.Pool(workers) as pool:
+            chunks = pool.map(_play_worker, tasks)
+        games = [game for chunk, _ in chunks for game in chunk]
+        inference = {key: sum(stats[key] for _, stats in chunks) for key in chunks[0][1]}
+
+    games.sort(key=lambda game: game["index"])
+    report = summarize(games, time.perf_counter() - start, inference)
+    report["per_game"] = games
+    return report
+
+
+def format_report(report):
+    return "\n".join((
+        f"games:             {report['games']}",
+        f"win/draw/loss:     {report['wins']}/{report['draws']}/{report['losses']} "
+        f"(score {report['score']:.1%})",
+        f"average length:    {report['average_plies']:.1f} plies",
+        f"illegal move rate: {report['illegal_move_rate']:.1%}",
+        f"throughput:        {report['games_per_sec']:.2f} games/s ({report['seconds']:.1f}s)",
+        f"inference:         {report.get('predictions_per_sec', 0.0):,.0f} predictions/s "
+        f"(mean batch {report.get('mean_batch_size', 0.0):.1f})",
+    ))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate a trained PPO model on ChessEnv.")
+    parser.add_argument("model", help="Path of the saved model.")
+    parser.add_argument("--games", type=int, default=DEFAULT_GAMES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--opponent", default="self", choices=OPPONENTS)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Concurrent games per worker.")
+    parser.add_argument("--max-plies", type=int, default=DEFAULT_MAX_PLIES)
+    parser.add_argument("--stochastic", action="store_true", help="Sample actions instead of taking the best one.")
+    parser.add_argument(
+        "--opening-plies", type=int, default=DEFAULT_OPENING_PLIES, help="Random moves opening each game."
+    )
+    args = parser.parse_args(argv)
+
+    report = evaluate(
+        args.model,
+        n_games=args.games,
+        seed=args.seed,
+        opponent=args.opponent,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        max_plies=args.max_plies,
+        deterministic=not args.stochastic,
+        opening_plies=args.opening_plies,
+    )
+    print(format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
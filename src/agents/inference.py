@@ -0,0 +1,79 @@
+"""Lean batched forward passes of an SB3 actor-critic policy.
+
+``model.predict`` validates and reshapes its input, runs the value head and
+builds a distribution object on every call, which costs more than the
+forward pass itself for the small MLP used here.  :func:`action_logits` only
+runs the feature extractor, the actor network and the action head, and
+:func:`predict_actions` picks actions from those logits, optionally masked
+to the legal moves.  For the same observations and masks the deterministic
+actions are the ones ``model.predict`` (or ``MaskablePPO.predict``) returns.
+"""
+
+import numpy as np
+import torch
+from stable_baselines3.common.policies import BaseModel
+
+MASKED_LOGIT = -1e8  # Logit of a masked action, as in sb3-contrib
+
+
+def action_logits(policy, observations):
+    """``(N, actions)`` logits of an ``ActorCriticPolicy`` for a batch of
+    observations (a NumPy array or a tensor)."""
+    observations = torch.as_tensor(observations, device=policy.device)
+    # The base class version runs only the actor's extractor when it is not shared
+    features = BaseModel.extract_features(policy, observations, policy.pi_features_extractor)
+    return policy.action_net(policy.mlp_extractor.forward_actor(features))
+
+
+def policy_values(policy, observations):
+    """``(N, actions)`` logits and ``(N,)`` values of an ``ActorCriticPolicy``
+    for a batch of observations, without building a distribution."""
+    observations = torch.as_tensor(observations, device=policy.device)
+    features = policy.extract_features(observations)
+    if policy.share_features_extractor:
+        latent_pi, latent_vf = policy.mlp_extractor(features)
+    else:
+        latent_pi = policy.mlp_extractor.forward_actor(features[0])
+        latent_vf = policy.mlp_extractor.forward_critic(features[1])
+    return policy.action_net(latent_pi), policy.value_net(latent_vf).flatten()
+
+
+def mask_logits(logits, masks):
+    return logits.masked_fill(~torch.as_tensor(masks, dtype=torch.bool, device=logits.device), MASKED_LOGIT)
+
+
+def sample_actions(logits, generators):
+    """One action per row of ``logits`` from the softmax, drawn with the
+    row's ``torch.Generator``, so a row's sample does not depend on the
+    other rows of the batch."""
+    uniforms = torch.stack([torch.rand((), generator=generator) for generator in generators])
+    cdf = torch.softmax(logits, dim=1).cumsum(dim=1)
+    actions = torch.searchsorted(cdf, uniforms.to(cdf)[:, None], right=True).squeeze(1)
+    return actions.clamp(max=logits.shape[1] - 1)  # Rounding can leave the last cdf value below 1
+
+
+def predict_actions(policy, observations, masks=None, deterministic=True, generators=None):
+    """Actions for a batch of observations as an int64 array.
+
+    ``masks`` holds one boolean legal action mask per observation.
+    Stochastic actions are sampled from the softmax of the logits, with the
+    global torch RNG or, given ``generators``, one ``torch.Generator`` per
+    observation (see :func:`sample_actions`).
+    """
+    with torch.no_grad():
+        logits = action_logits(policy, observations)
+        if masks is not None:
+            logits = mask_logits(logits, masks)
+        actions = choose_actions(logits, deterministic, generators)
+
+    return actions.cpu().numpy().astype(np.int64)
+
+
+def choose_actions(logits, deterministic=True, generators=None):
+    """Actions of a batch of (masked) logits, as picked by
+    :func:`predict_actions`."""
+    if deterministic:
+        return logits.argmax(dim=1)
+    if generators is not None:
+        return sample_actions(logits, generators)
+    return torch.distributions.Categorical(logits=logits).sample()
@@ -0,0 +1,482 @@
+"""Local policy inference server shared by many rollout workers.
+
+Each worker that loads its own copy of a model spends memory on it and runs
+batch-size-1 forward passes.  :class:`InferenceServer` holds one policy and
+serves workers over a Unix socket (a path) or localhost TCP (``"host:port"``)::
+
+    python -m agents.inference_server ppo_full_game.zip --address /tmp/chess_policy.sock
+
+    client = InferenceClient("/tmp/chess_policy.sock")
+    actions = client.predict_actions(observations, masks)
+
+Messages are pickled, so connections are authenticated with a shared key:
+the ``authkey`` argument or the hex key in the ``CHESS_INFERENCE_AUTHKEY``
+environment variable.  A server without either generates a key, which the
+CLI prints for the clients and :func:`start_server` returns.  TCP servers
+only listen on loopback addresses unless ``allow_remote`` is set.
+
+Requests are coalesced into dynamic batches: the first waiting request opens
+a batch, which takes every request arriving within ``max_latency`` seconds,
+up to ``max_batch_size`` observations or one request per connected client,
+and goes through one forward pass whose actions are picked by
+:func:`~agents.inference.choose_actions`, as in
+:func:`~agents.inference.predict_actions`.  The server counts how many
+requests were left waiting when each batch was sent (the queue depth) and
+how many observations each batch held, both as histograms returned by
+:meth:`InferenceServer.stats` and :meth:`InferenceClient.stats`.
+"""
+
+import argparse
+import ipaddress
+import json
+import multiprocessing
+import os
+import queue
+import secrets
+import socket
+import sys
+import threading
+import time
+from collections import Counter, namedtuple
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+import torch
+
+try:  # Supports running with `src` on sys.path or importing `src.agents...`
+    from agents.inference import action_logits, choose_actions, mask_logits
+    from agents.ppo_agent import load_model, saved_with_masking
+except ImportError:  # pragma: no cover - import path fallback
+    from src.agents.inference import action_logits, choose_actions, mask_logits
+    from src.agents.ppo_agent import load_model, saved_with_masking
+
+DEFAULT_ADDRESS = "127.0.0.1:5577"
+DEFAULT_MAX_BATCH_SIZE = 256  # Observations per forward pass
+DEFAULT_MAX_LATENCY = 0.002  # Seconds a request waits for others to join its batch
+DEFAULT_CONNECT_TIMEOUT = 10.0
+POLL_INTERVAL = 0.1  # Seconds between checks for a closed server by the connection threads
+AUTHKEY_ENV = "CHESS_INFERENCE_AUTHKEY"  # Hex encoded shared key
+
+_Request = namedtuple("_Request", ("connection", "observations", "masks", "deterministic", "arrival"))
+
+
+def parse_address(address, allow_remote=False):
+    """``(address, family)`` for :mod:`multiprocessing.connection`:
+    ``"host:port"`` or a ``(host, port)`` tuple is TCP, anything else a Unix
+    socket path.  TCP hosts must be loopback addresses unless
+    ``allow_remote``."""
+    if not isinstance(address, tuple):
+        host, separator, port = address.rpartition(":")
+        if not (separator and port.isdigit()):
+            return address, "AF_UNIX"
+        address = (host or "127.0.0.1", int(port))
+
+    if not allow_remote and not ipaddress.ip_address(socket.gethostbyname(address[0])).is_loopback:
+        raise ValueError(f"{address[0]} is not a loopback address; pass allow_remote=True to serve it")
+    return address, "AF_INET"
+
+
+def resolve_authkey(authkey=None):
+    """``authkey`` as bytes (hex strings are decoded), else the key in the
+    ``CHESS_INFERENCE_AUTHKEY`` environment variable, else None."""
+    if authkey is None:
+        authkey = os.environ.get(AUTHKEY_ENV) or None
+    if isinstance(authkey, str):
+        authkey = bytes.fromhex(authkey)
+    return authkey
+
+
+def new_authkey():
+    return secrets.token_bytes(32)
+
+
+def _histogram(counter):
+    return dict(sorted(counter.items()))
+
+
+
+###################################################
+###### Server #####################################
+###################################################
+
+class InferenceServer:
+    """Serves the actions of ``policy`` (an ``ActorCriticPolicy``) to
+    :class:`InferenceClient` connections at ``address``.
+
+    :meth:`start` runs the server on background threads, :meth:`serve_forever`
+    blocks.  With a TCP port of 0 the system picks one; ``address`` holds the
+    one in use once started.  ``authkey`` holds the key clients must present,
+    generated when none is given (see :func:`resolve_authkey`).
+    """
+
+    def __init__(
+        self,
+        policy,
+        address=DEFAULT_ADDRESS,
+        max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+        max_latency=DEFAULT_MAX_LATENCY,
+        authkey=None,
+        allow_remote=False,
+    ):
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be at least 1, got {max_batch_size}")
+        if max_latency < 0:
+            raise ValueError(f"max_latency must not be negative, got {max_latency}")
+        self.policy = policy
+        self.address, self.family = parse_address(address, allow_remote)
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.authkey = resolve_authkey(authkey) or new_authkey()
+
+        self._requests = queue.Queue()
+        self._threads = []
+        self._listener = None
+        self._closed = threading.Event()
+        self._lock = threading.Lock()  # Guards the counters
+        self._clients = 0  # Open connections
+
+        self.batch_sizes = Counter()
+        self.queue_depths = Counter()
+        self.requests = 0
+        self.wait_seconds = 0.0
+        self.inference_seconds = 0.0
+
+    @classmethod
+    def from_checkpoint(cls, path, address=DEFAULT_ADDRESS, **kwargs):
+        """A server for a model saved by ``PPO`` or ``MaskablePPO``."""
+        model = load_model(path, masked=saved_with_masking(path), device="cpu")
+        return cls(model.policy, address, **kwargs)
+
+    def start(self):
+        """Listens at ``address`` and serves on daemon threads."""
+        self._listener = Listener(self.address, family=self.family, authkey=self.authkey)
+        self.address = self._listener.address
+        for target in (self._accept, self._batch_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def serve_forever(self):
+        self.start()
+        try:
+            self._closed.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        """Stops serving.  Connections close within ``POLL_INTERVAL``."""
+        if self._closed.is_set() and self._listener is None:
+            return
+        self._closed.set()
+        self._requests.put(None)  # Wakes the batch thread
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=1.0)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def stats(self):
+        """Request, batch and latency counters with the batch size and queue
+        depth histograms (``{value: batches}``)."""
+        with self._lock:
+            batches = sum(self.batch_sizes.values())
+            rows = sum(size * count for size, count in self.batch_sizes.items())
+            return {
+                "requests": self.requests,
+                "batches": batches,
+                "observations": rows,
+                "mean_batch_size": rows / batches if batches else 0.0,
+                "mean_wait_ms": 1e3 * self.wait_seconds / self.requests if self.requests else 0.0,
+                "inference_seconds": self.inference_seconds,
+                "batch_sizes": _histogram(self.batch_sizes),
+                "queue_depths": _histogram(self.queue_depths),
+            }
+
+    ###################################################
+    ###### Connections ################################
+    ###################################################
+
+    def _accept(self):
+        while not self._closed.is_set():
+            try:
+                connection = self._listener.accept()
+            except (OSError, EOFError, multiprocessing.AuthenticationError):  # Closed listener, or a failed handshake
+                if self._closed.is_set() or self._listener is None:
+                    return
+                continue
+            thread = threading.Thread(target=self._read, args=(connection,), daemon=True)
+            thread.start()
+
+    def _read(self, connection):
+        # One thread per client.  Clients wait for each answer, so the batch
+        # thread and this one never send on a connection at the same time
+        with self._lock:
+            self._clients += 1
+        try:
+            while not self._closed.is_set():
+                try:
+                    if not connection.poll(POLL_INTERVAL):
+                        continue
+                    message = connection.recv()
+                except (EOFError, OSError):
+                    break
+                try:
+                    if not self._handle(connection, message):
+                        break
+                except (EOFError, OSError):  # The client went away
+                    break
+                except Exception as error:  # A malformed message: answered, and the connection kept
+                    connection.send(("error", f"{type(error).__name__}: {error}"))
+        except (EOFError, OSError):
+            pass
+        finally:
+            with self._lock:
+                self._clients -= 1
+            connection.close()
+
+    def _handle(self, connection, message):
+        # Answers or queues one message; False once the client closes
+        if not isinstance(message, tuple) or not message:
+            raise ValueError(f"Requests are non-empty tuples, got {type(message).__name__}")
+        kind = message[0]
+        if kind == "predict":
+            if len(message) != 4:
+                raise ValueError(f"A predict request has 4 fields, got {len(message)}")
+            _, observations, masks, deterministic = message
+            error = self._check_request(observations, masks)
+            if error is not None:  # Answered here, so it cannot fail the batch it would join
+                connection.send(("error", error))
+            else:
+                self._requests.put(_Request(connection, observations, masks, deterministic, time.perf_counter()))
+        elif kind == "stats":
+            connection.send(("ok", self.stats()))
+        elif kind == "close":
+            return False
+        else:
+            connection.send(("error", f"Unknown request {kind!r}"))
+        return True
+
+    def _check_request(self, observations, masks):
+        # Why the policy cannot take a request, or None
+        shape = self.policy.observation_space.shape
+        actions = self.policy.action_space.n
+        if not isinstance(observations, np.ndarray) or observations.shape[1:] != shape or not len(observations):
+            return f"observations must be an array of shape (n, {', '.join(map(str, shape))}) with n >= 1"
+        if observations.dtype.kind not in "biuf":
+            return f"observations must be numeric, got {observations.dtype}"
+        if masks is not None and (
+            not isinstance(masks, np.ndarray) or masks.shape != (len(observations), actions) or masks.dtype != bool
+        ):
+            return f"masks must be a boolean array of shape ({len(observations)}, {actions})"
+        return None
+
+    ###################################################
+    ###### Batching ###################################
+    ###################################################
+
+    def _batch_loop(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            self._serve(batch)
+
+    def _collect(self):
+        # Blocks for a first request, then takes the ones arriving before its
+        # deadline up to max_batch_size observations.  Each client waits for
+        # its answer, so once every client is in the batch no more can come
+        first = self._requests.get()
+        if first is None:
+            return None
+        batch, rows = [first], len(first.observations)
+        deadline = first.arrival + self.max_latency
+
+        while rows < self.max_batch_size and len(batch) < self._clients:
+            try:
+                request = self._requests.get(timeout=max(deadline - time.perf_counter(), 0.0))
+            except queue.Empty:
+                break
+            if request is None:
+                self._requests.put(None)  # Serve this batch, then stop
+                break
+            if rows + len(request.observations) > self.max_batch_size:
+                self._requests.put(request)  # Opens the next batch
+                break
+            batch.append(request)
+            rows += len(request.observations)
+        return batch
+
+    def _serve(self, batch):
+        start = time.perf_counter()
+        try:
+            replies = [("ok", actions) for actions in self._predict(batch)]
+        except Exception:  # Retried one request at a time, so only the faulty ones fail
+            replies = [self._serve_alone(request) for request in batch]
+        end = time.perf_counter()
+
+        with self._lock:
+            self.batch_sizes[sum(len(request.observations) for request in batch)] += 1
+            self.queue_depths[self._requests.qsize()] += 1
+            self.requests += len(batch)
+            self.wait_seconds += sum(start - request.arrival for request in batch)
+            self.inference_seconds += end - start
+
+        for request, reply in zip(batch, replies):
+            try:
+                request.connection.send(reply)
+            except (OSError, ValueError):  # The client went away
+                pass
+
+    def _serve_alone(self, request):
+        try:
+            return "ok", self._predict([request])[0]
+        except Exception as error:  # Reported to the client; the server keeps running
+            return "error", f"{type(error).__name__}: {error}"
+
+    def _predict(self, batch):
+        # One forward pass over every request; rows without masks are all legal
+        observations = np.concatenate([request.observations for request in batch])
+        sizes = [len(request.observations) for request in batch]
+        with torch.no_grad():
+            logits = action_logits(self.policy, observations)
+            if any(request.masks is not None for request in batch):
+                masks = np.concatenate([
+                    np.ones((size, logits.shape[1]), dtype=bool) if request.masks is None else request.masks
+                    for request, size in zip(batch, sizes)
+                ])
+                logits = mask_logits(logits, masks)
+
+            actions = choose_actions(logits)
+            sampled = torch.as_tensor(np.repeat([not request.deterministic for request in batch], sizes))
+            if sampled.any():
+                actions[sampled] = choose_actions(logits[sampled], deterministic=False)
+
+        return np.split(actions.cpu().numpy().astype(np.int64), np.cumsum(sizes)[:-1])
+
+
+
+###################################################
+###### Client #####################################
+###################################################
+
+class InferenceClient:
+    """Connection to an :class:`InferenceServer`.
+
+    Retries connecting for ``timeout`` seconds, so a client can be created
+    while the server is still loading its model.  ``authkey`` is the server's
+    key, by default read from ``CHESS_INFERENCE_AUTHKEY``.  Not thread safe:
+    use one client per thread or process.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, timeout=DEFAULT_CONNECT_TIMEOUT, authkey=None):
+        authkey = resolve_authkey(authkey)
+        if authkey is None:
+            raise ValueError(f"An authkey is needed: pass the server's key or set {AUTHKEY_ENV}")
+        address, family = parse_address(address, allow_remote=True)
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                self.connection = Client(address, family=family, authkey=authkey)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+
+    def predict_actions(self, observations, masks=None, deterministic=True):
+        """Actions for a batch of observations as an int64 array, as
+        :func:`agents.inference.predict_actions` with the served policy."""
+        observations = np.asarray(observations)
+        if masks is not None:
+            masks = np.asarray(masks, dtype=bool)
+        return self._call(("predict", observations, masks, deterministic))
+
+    def stats(self):
+        """The server's :meth:`InferenceServer.stats`."""
+        return self._call(("stats",))
+
+    def _call(self, message):
+        self.connection.send(message)
+        status, payload = self.connection.recv()
+        if status == "error":
+            raise RuntimeError(f"Inference server error: {payload}")
+        return payload
+
+    def close(self):
+        if not self.connection.closed:
+            try:
+                self.connection.send(("close",))
+            except OSError:
+                pass
+            self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+
+###################################################
+###### Server process #############################
+###################################################
+
+def _serve(path, address, options):
+    InferenceServer.from_checkpoint(path, address, **options).serve_forever()
+
+
+def start_server(path, address=DEFAULT_ADDRESS, start_method=None, authkey=None, **options):
+    """Serves the checkpoint at ``path`` from a daemon process.
+
+    Returns the process and the authkey clients connect with (``authkey``,
+    the ``CHESS_INFERENCE_AUTHKEY`` one or a new one).  Clients may connect
+    straight away: :class:`InferenceClient` waits for the server to listen.
+    ``options`` go to :class:`InferenceServer`.
+    """
+    authkey = resolve_authkey(authkey) or new_authkey()
+    context = multiprocessing.get_context(start_method)
+    process = context.Process(target=_serve, args=(path, address, {"authkey": authkey, **options}), daemon=True)
+    process.start()
+    return process, authkey
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a saved policy to local rollout workers.")
+    parser.add_argument("checkpoint", help="Path of the saved model.")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS, help="Unix socket path or host:port.")
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("--max-latency", type=float, default=DEFAULT_MAX_LATENCY, help="Seconds.")
+    parser.add_argument("--threads", type=int, default=None, help="Torch threads.")
+    parser.add_argument("--allow-remote", action="store_true", help="Allow TCP hosts other than loopback.")
+    args = parser.parse_args(argv)
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    server = InferenceServer.from_checkpoint(
+        args.checkpoint,
+        args.address,
+        max_batch_size=args.max_batch_size,
+        max_latency=args.max_latency,
+        allow_remote=args.allow_remote,
+    )
+    print(f"Serving {args.checkpoint} at {args.address}")
+    if resolve_authkey() is None:
+        print(f"Clients connect with {AUTHKEY_ENV}={server.authkey.hex()}")
+    server.serve_forever()
+    print(json.dumps(server.stats(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
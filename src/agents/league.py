@@ -0,0 +1,690 @@
+"""Self-play league training against frozen policy snapshots.
+
+Plain ``FULL_GAME`` training has the learning policy play both colours
+against itself with its current weights.  In league mode the learner plays
+one colour per game and the other is played by a frozen snapshot of an
+earlier policy:
+
+* :class:`League` keeps the snapshots (policy files in a directory, oldest
+  dropped past ``max_snapshots``) and the learner's results against each,
+  and turns them into opponent sampling probabilities (``scheme``):
+  ``"latest"`` always picks the newest snapshot, ``"uniform"`` any of them
+  and ``"prioritized"`` favours the snapshots the learner scores worst
+  against, with weight ``(1 - score) ** exponent``.
+* :class:`LeagueVecEnv` is the vectorised env PPO trains on.  Its games are
+  split over ``workers`` processes (or kept in this one with ``workers=0``).
+  Each game samples an opponent and a learner colour when it starts, and
+  after the learner's moves every process answers for all its games with
+  one forward pass per opponent snapshot, so opponent inference is batched
+  like the learner's.  The default ``"planes"`` observations show the side
+  to move; with ``"board"`` ones, which do not, the learner always plays
+  White.
+* :class:`LeagueCallback` records the results, freezes the learner into the
+  league every ``snapshot_interval`` steps and sends the updated pool to
+  the workers after every rollout.
+
+::
+
+    model, league = train_league(total_timesteps=500_000, n_envs=16, workers=4)
+    print(league.stats())
+"""
+
+import multiprocessing
+import os
+from collections import OrderedDict
+
+import chess
+import numpy as np
+import torch
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.vec_env.base_vec_env import VecEnv
+
+try:  # Supports running with `src` on sys.path or importing `src.agents...`
+    from agents.evaluate import DEFAULT_MAX_PLIES, RESULTS
+    from agents.inference import predict_actions
+    from agents.ppo_agent import DEFAULT_TENSORBOARD_LOG, create_model
+    from environment.chess_env import ChessEnv
+except ImportError:  # pragma: no cover - import path fallback
+    from src.agents.evaluate import DEFAULT_MAX_PLIES, RESULTS
+    from src.agents.inference import predict_actions
+    from src.agents.ppo_agent import DEFAULT_TENSORBOARD_LOG, create_model
+    from src.environment.chess_env import ChessEnv
+
+SAMPLING_SCHEMES = ("latest", "uniform", "prioritized")
+
+DEFAULT_LEAGUE_DIR = "league"
+DEFAULT_SCHEME = "prioritized"
+DEFAULT_MAX_SNAPSHOTS = 20
+DEFAULT_SNAPSHOT_INTERVAL = 20_000  # Learner steps between snapshots
+DEFAULT_PRIORITY_EXPONENT = 2.0
+DEFAULT_LOADED_OPPONENTS = 8  # Snapshot policies kept in memory per worker
+
+LEAGUE_INFO_LEVEL = "minimal"  # Only the reasons & winners are read
+
+
+###################################################
+###### Snapshot pool ##############################
+###################################################
+
+class League:
+    """Frozen policy snapshots and the learner's results against each.
+
+    Snapshots are saved with ``policy.save`` to ``directory`` so worker
+    processes can load them.  :meth:`pool` is what the workers sample
+    opponents from.
+    """
+
+    def __init__(
+        self,
+        directory=DEFAULT_LEAGUE_DIR,
+        scheme=DEFAULT_SCHEME,
+        max_snapshots=DEFAULT_MAX_SNAPSHOTS,
+        exponent=DEFAULT_PRIORITY_EXPONENT,
+    ):
+        if scheme not in SAMPLING_SCHEMES:
+            raise ValueError(f"Unknown sampling scheme: {scheme!r}. Expected one of {SAMPLING_SCHEMES}.")
+        if max_snapshots < 1:
+            raise ValueError(f"max_snapshots must be at least 1, got {max_snapshots}")
+
+        self.directory = directory
+        self.scheme = scheme
+        self.max_snapshots = max_snapshots
+        self.exponent = exponent
+        os.makedirs(directory, exist_ok=True)
+
+        self.policy_class = None
+        self.snapshots = []  # Oldest first: {"id", "path", "timestep", "win", "draw", "loss"}
+        self.next_id = 0
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def add(self, policy, timestep=0):
+        """Freezes ``policy``'s current weights into the pool and returns the
+        snapshot id.  The oldest snapshot is dropped past ``max_snapshots``."""
+        if self.policy_class is None:
+            self.policy_class = type(policy)
+        elif type(policy) is not self.policy_class:
+            raise ValueError(f"League holds {self.policy_class.__name__} snapshots, got {type(policy).__name__}")
+
+        snapshot_id = self.next_id
+        self.next_id += 1
+        path = os.path.join(self.directory, f"snapshot_{snapshot_id:04d}.pt")
+        policy.save(path)
+        self.snapshots.append({"id": snapshot_id, "path": path, "timestep": timestep, **dict.fromkeys(RESULTS, 0)})
+
+        while len(self.snapshots) > self.max_snapshots:
+            dropped = self.snapshots.pop(0)
+            os.remove(dropped["path"])  # Workers only ever sample from the pool sent after this
+
+        return snapshot_id
+
+    def record(self, snapshot_id, result):
+        """Counts a learner ``"win"``, ``"draw"`` or ``"loss"`` against a
+        snapshot (ignored once it has left the pool)."""
+        if result not in RESULTS:
+            raise ValueError(f"Unknown result: {result!r}. Expected one of {RESULTS}.")
+        for snapshot in self.snapshots:
+            if snapshot["id"] == snapshot_id:
+                snapshot[result] += 1
+                return
+
+    @staticmethod
+    def score(snapshot):
+        """Learner score against a snapshot, with one prior win and loss so
+        unplayed snapshots start at 0.5."""
+        games = snapshot["win"] + snapshot["draw"] + snapshot["loss"]
+        return (snapshot["win"] + 0.5 * snapshot["draw"] + 1) / (games + 2)
+
+    def probabilities(self):
+        """Sampling probability of every snapshot, oldest first."""
+        count = len(self.snapshots)
+        if count == 0:
+            return np.zeros(0)
+
+        if self.scheme == "latest":
+            weights = np.zeros(count)
+            weights[-1] = 1.0
+        elif self.scheme == "uniform":
+            weights = np.ones(count)
+        else:
+            weights = np.array([(1.0 - self.score(snapshot)) ** self.exponent for snapshot in self.snapshots])
+        return weights / weights.sum()
+
+    def pool(self):
+        """What :meth:`LeagueVecEnv.set_pool` sends to the workers."""
+        return {
+            "policy_class": self.policy_class,
+            "ids": [snapshot["id"] for snapshot in self.snapshots],
+            "paths": [snapshot["path"] for snapshot in self.snapshots],
+            "probabilities": self.probabilities(),
+        }
+
+    def stats(self):
+        """One dict per snapshot with its results, score and probability."""
+        return [
+            {**snapshot, "score": self.score(snapshot), "probability": float(probability)}
+            for snapshot, probability in zip(self.snapshots, self.probabilities())
+        ]
+
+
+
+###################################################
+###### Games ######################################
+###################################################
+
+class LeagueGames:
+    """``n_games`` ``ChessEnv`` games of the learner against pool snapshots,
+    stepped together in one process.
+
+    ``step`` plays the learner's actions, then the opponents' replies with
+    one :func:`~agents.inference.predict_actions` call per snapshot.  The
+    learner's reward is scored for its colour over its move and the replies,
+    as with a ``ChessEnv`` opponent: the capture, check and promotion terms
+    of its move minus those of the replies, the change of its position
+    scores and the game result.  Finished games restart straight away, as
+    in a SB3 ``VecEnv``.
+
+    The learner plays a random colour per game with ``"planes"``
+    observations, whose side to move plane tells it which.  ``"board"``
+    observations do not show the side to move, so the learner always plays
+    White with them.
+    """
+
+    def __init__(
+        self,
+        n_games,
+        observation_mode="planes",
+        max_plies=DEFAULT_MAX_PLIES,
+        deterministic_opponents=False,
+        max_loaded=DEFAULT_LOADED_OPPONENTS,
+    ):
+        self.envs = [ChessEnv(observation_mode=observation_mode, info_level=LEAGUE_INFO_LEVEL) for _ in range(n_games)]
+        self.random_colors = observation_mode == "planes"
+        self.max_plies = max_plies
+        self.deterministic_opponents = deterministic_opponents
+        self.max_loaded = max_loaded
+
+        self.rng = np.random.default_rng()
+        self.pool = None
+        self.loaded = OrderedDict()  # Snapshot id -> policy, least recently used first
+
+        self.opponents = [None] * n_games  # (snapshot id, policy) of every game
+        self.learner_colors = [chess.WHITE] * n_games
+        self.plies = [0] * n_games
+
+        self.opponent_predictions = 0
+        self.opponent_forward_passes = 0
+
+    def set_pool(self, pool):
+        self.pool = pool
+        for snapshot_id in list(self.loaded):
+            if snapshot_id not in pool["ids"]:
+                del self.loaded[snapshot_id]  # Games playing it keep their own reference
+
+    def _policy(self, index):
+        snapshot_id = self.pool["ids"][index]
+        policy = self.loaded.get(snapshot_id)
+        if policy is None:
+            policy = self.pool["policy_class"].load(self.pool["paths"][index], device="cpu")
+            policy.set_training_mode(False)
+            self.loaded[snapshot_id] = policy
+            if len(self.loaded) > self.max_loaded:
+                self.loaded.popitem(last=False)
+        else:
+            self.loaded.move_to_end(snapshot_id)
+        return snapshot_id, policy
+
+    def _start(self, game, seed=None, options=None):
+        # Resets a game & samples its opponent and the learner's colour
+        if self.pool is None or not self.pool["ids"]:
+            raise RuntimeError("LeagueGames needs a pool with at least one snapshot, see LeagueVecEnv.set_pool")
+
+        self.envs[game].reset(seed=seed, options=options)
+        self.opponents[game] = self._policy(self.rng.choice(len(self.pool["ids"]), p=self.pool["probabilities"]))
+        self.learner_colors[game] = bool(self.rng.integers(2)) if self.random_colors else chess.WHITE
+        self.plies[game] = 0
+
+    def reset(self, seeds, options):
+        """Starts every game.  A seed for the first game also reseeds the
+        opponent & colour sampling."""
+        if seeds[0] is not None:
+            self.rng = np.random.default_rng(seeds[0])
+        for game, (seed, game_options) in enumerate(zip(seeds, options)):
+            self._start(game, seed, game_options)
+
+        ended = self._play_opponents(range(len(self.envs)))
+        while ended:  # Rare: the opponent ended a game with its first move
+            for game in ended:
+                self._start(game)
+            ended = self._play_opponents(ended)
+        return self._observations(), [{} for _ in self.envs]
+
+    def step(self, actions):
+        count = len(self.envs)
+        rewards = np.zeros(count, dtype=np.float32)
+        dones = np.zeros(count, dtype=bool)
+        infos = [None] * count
+        playing = []
+        previous_scores = {}  # Learner's scores before its move, by game where it moved
+
+        for game, action in enumerate(actions):
+            env = self.envs[game]
+            color = self.learner_colors[game]
+            move = env.decode_action(int(action))
+            captured_piece = env.board.piece_at(move.to_square)
+            scores = env.evaluator.scores(color)
+
+            _, reward, terminated, truncated, info = env.step(int(action))
+            rewards[game] = reward  # Illegal moves & games already over keep the env's reward
+            infos[game] = info
+            if info.get("reason") is None:
+                self.plies[game] += 1
+                rewards[game] = env.reward_for_ply(color, move, captured_piece)
+                previous_scores[game] = scores
+            if terminated or truncated:
+                self._finish(game, info, self.learner_colors[game], truncated and not terminated)
+                dones[game] = True
+            else:
+                playing.append(game)
+
+        ended = self._play_opponents(playing, rewards, infos)
+        dones[ended] = True
+
+        for game, scores in previous_scores.items():
+            rewards[game] += self.envs[game].reward_for_outcome(self.learner_colors[game], scores)
+
+        for game in playing:
+            if not dones[game] and self.plies[game] >= self.max_plies:
+                infos[game] = {**infos[game], "winner": "draw", "reason": "max plies"}
+                self._finish(game, infos[game], None, True)
+                dones[game] = True
+
+        restarted = np.flatnonzero(dones).tolist()
+        for game in restarted:
+            infos[game]["terminal_observation"] = self.envs[game].get_observation()
+        while restarted:  # The opponent may end a restarted game with its first move
+            for game in restarted:
+                self._start(game)
+            restarted = self._play_opponents(restarted)
+
+        return self._observations(), rewards, dones, infos
+
+    def _play_opponents(self, games, rewards=None, infos=None):
+        """Plays the opponents' moves in ``games`` until the learner is to
+        move, batching games that share a snapshot.  Returns the games the
+        opponents ended; ``rewards`` receive the learner's side of the
+        opponents' moves and ``infos`` that of the games they ended."""
+        ended = []
+        waiting = [game for game in games if self.envs[game].board.turn != self.learner_colors[game]]
+
+        while waiting:
+            by_snapshot = {}
+            for game in waiting:
+                by_snapshot.setdefault(self.opponents[game][0], []).append(game)
+
+            for batch in by_snapshot.values():
+                policy = self.opponents[batch[0]][1]
+                observations = np.stack([self.envs[game].get_observation() for game in batch])
+                masks = np.stack([self.envs[game].action_masks() for game in batch])
+                actions = predict_actions(policy, observations, masks, self.deterministic_opponents)
+                self.opponent_predictions += len(batch)
+                self.opponent_forward_passes += 1
+
+                for game, action in zip(batch, actions):
+                    env = self.envs[game]
+                    move = env.decode_action(int(action))
+                    captured_piece = env.board.piece_at(move.to_square)
+
+                    _, _, terminated, truncated, info = env.step(int(action))
+                    if info.get("reason") is None:
+                        self.plies[game] += 1
+                        if rewards is not None:
+                            rewards[game] += env.reward_for_ply(self.learner_colors[game], move, captured_piece)
+                    if not (terminated or truncated):
+                        continue
+
+                    self._finish(game, info, not self.learner_colors[game], truncated and not terminated)
+                    ended.append(game)
+                    if infos is not None:
+                        infos[game] = {**infos[game], **info}
+
+            waiting = [
+                game for game in waiting
+                if game not in ended and self.envs[game].board.turn != self.learner_colors[game]
+            ]
+
+        return ended
+
+    def _finish(self, game, info, mover, truncated):
+        # Stores the opponent & the learner's result in ``info``.  ``mover``
+        # made the last move, for the "too many illegal moves" loser
+        winner = info.get("winner")
+        if info.get("reason") == "too many illegal moves":
+            winner = "black" if mover else "white"
+        elif winner is None:
+            winner = "draw"
+
+        if winner == "draw":
+            result = "draw"
+        else:
+            result = "win" if (winner == "white") == self.learner_colors[game] else "loss"
+
+        info["league_opponent"] = self.opponents[game][0]
+        info["league_result"] = result
+        info["TimeLimit.truncated"] = truncated
+        return result
+
+    def _observations(self):
+        return np.stack([env.get_observation() for env in self.envs])
+
+    def env_method(self, name, args, kwargs, games):
+        return [getattr(self.envs[game], name)(*args, **kwargs) for game in games]
+
+    def get_attr(self, name, games):
+        return [getattr(self.envs[game], name) for game in games]
+
+    def set_attr(self, name, value, games):
+        for game in games:
+            setattr(self.envs[game], name, value)
+
+    def stats(self):
+        return {
+            "opponent_predictions": self.opponent_predictions,
+            "opponent_forward_passes": self.opponent_forward_passes,
+        }
+
+    def close(self):
+        for env in self.envs:
+            env.close()
+
+
+
+###################################################
+###### Vectorised env #############################
+###################################################
+
+class _LocalGroup:
+    # LeagueGames in this process, behind the same send/recv calls as a worker
+    def __init__(self, games):
+        self.games = games
+        self._result = None
+
+    def send(self, command, args):
+        self._result = getattr(self.games, command)(*args)
+
+    def recv(self):
+        return self._result
+
+    def close(self):
+        self.games.close()
+
+
+def _worker(remote, parent_remote, options):
+    parent_remote.close()
+    torch.set_num_threads(1)  # One core per worker process
+    games = LeagueGames(**options)
+
+    while True:
+        try:
+            command, args = remote.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if command == "close":
+            games.close()
+            remote.close()
+            break
+        try:
+            remote.send((True, getattr(games, command)(*args)))
+        except Exception as error:  # Re-raised in the main process
+            remote.send((False, error))
+
+
+class _WorkerGroup:
+    # LeagueGames in a worker process
+    def __init__(self, context, options):
+        self.remote, work_remote = context.Pipe()
+        # daemon=True: if the main process crashes, we should not cause things to hang
+        self.process = context.Process(target=_worker, args=(work_remote, self.remote, options), daemon=True)
+        self.process.start()
+        work_remote.close()
+
+    def send(self, command, args):
+        self.remote.send((command, args))
+
+    def recv(self):
+        ok, result = self.remote.recv()
+        if not ok:
+            raise result
+        return result
+
+    def close(self):
+        self.remote.send(("close", None))
+        self.process.join()
+
+
+class LeagueVecEnv(VecEnv):
+    """``n_envs`` league games for SB3, split over ``workers`` processes.
+
+    With ``workers=0`` every game runs in this process.  :meth:`set_pool`
+    must be called with a :meth:`League.pool` before the first reset.
+    ``env_method`` and ``get_attr`` reach the ``ChessEnv`` of each game, so
+    ``MaskablePPO`` reads the learner's ``action_masks()`` as usual.
+    """
+
+    def __init__(
+        self,
+        n_envs,
+        workers=0,
+        observation_mode="planes",
+        max_plies=DEFAULT_MAX_PLIES,
+        deterministic_opponents=False,
+        max_loaded=DEFAULT_LOADED_OPPONENTS,
+        start_method=None,
+    ):
+        if n_envs < 1:
+            raise ValueError(f"n_envs must be at least 1, got {n_envs}")
+        if workers > n_envs:
+            raise ValueError(f"workers ({workers}) cannot exceed n_envs ({n_envs})")
+
+        # Contiguous blocks of games, one per group
+        self.slices = [
+            slice(int(block[0]), int(block[-1]) + 1) for block in np.array_split(np.arange(n_envs), max(workers, 1))
+        ]
+        options = {
+            "observation_mode": observation_mode,
+            "max_plies": max_plies,
+            "deterministic_opponents": deterministic_opponents,
+            "max_loaded": max_loaded,
+        }
+
+        if workers == 0:
+            self.groups = [_LocalGroup(LeagueGames(n_envs, **options))]
+        else:
+            context = multiprocessing.get_context(start_method)
+            self.groups = [
+                _WorkerGroup(context, {"n_games": block.stop - block.start, **options}) for block in self.slices
+            ]
+
+        self.closed = False
+        probe = ChessEnv(observation_mode=observation_mode)
+        super().__init__(n_envs, probe.observation_space, probe.action_space)
+
+    def _broadcast(self, command, args_per_group):
+        for group, args in zip(self.groups, args_per_group):
+            group.send(command, args)
+        return [group.recv() for group in self.groups]
+
+    def set_pool(self, pool):
+        """Sends the snapshots to sample opponents from to every group."""
+        self._broadcast("set_pool", [(pool,)] * len(self.groups))
+
+    def reset(self):
+        results = self._broadcast(
+            "reset", [(self._seeds[block], self._options[block]) for block in self.slices]
+        )
+        # Seeds and options are only used once
+        self._reset_seeds()
+        self._reset_options()
+
+        self.reset_infos = [info for _, infos in results for info in infos]
+        return np.concatenate([observations for observations, _ in results])
+
+    def step_async(self, actions):
+        for group, block in zip(self.groups, self.slices):
+            group.send("step", (actions[block],))
+
+    def step_wait(self):
+        results = [group.recv() for group in self.groups]
+        observations, rewards, dones, infos = zip(*results)
+        return (
+            np.concatenate(observations),
+            np.concatenate(rewards),
+            np.concatenate(dones),
+            [info for group_infos in infos for info in group_infos],
+        )
+
+    def _by_group(self, indices):
+        # Global env indices -> [(group, [local indices], [global indices])]
+        indices = self._get_indices(indices)
+        grouped = []
+        for group, block in zip(self.groups, self.slices):
+            members = [index for index in indices if block.start <= index < block.stop]
+            if members:
+                grouped.append((group, [index - block.start for index in members], members))
+        return indices, grouped
+
+    def _gather(self, command, args, indices):
+        indices, grouped = self._by_group(indices)
+        for group, local, _ in grouped:
+            group.send(command, args + (local,))
+
+        results = {}
+        for group, _, members in grouped:
+            results.update(zip(members, group.recv()))
+        return [results[index] for index in indices]
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        return self._gather("env_method", (method_name, method_args, method_kwargs), indices)
+
+    def get_attr(self, attr_name, indices=None):
+        return self._gather("get_attr", (attr_name,), indices)
+
+    def set_attr(self, attr_name, value, indices=None):
+        _, grouped = self._by_group(indices)
+        for group, local, _ in grouped:
+            group.send("set_attr", (attr_name, value, local))
+        for group, _, _ in grouped:
+            group.recv()
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False] * len(self._get_indices(indices))
+
+    def opponent_stats(self):
+        """Opponent predictions & forward passes summed over the groups."""
+        totals = {}
+        for stats in self._broadcast("stats", [()] * len(self.groups)):
+            for key, value in stats.items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def close(self):
+        if self.closed:
+            return
+        for group in self.groups:
+            group.close()
+        self.closed = True
+
+
+
+###################################################
+###### Training ###################################
+###################################################
+
+class LeagueCallback(BaseCallback):
+    """Records league results, adds a snapshot of the learner every
+    ``snapshot_interval`` steps and sends the pool to the env after every
+    rollout."""
+
+    def __init__(self, league, snapshot_interval=DEFAULT_SNAPSHOT_INTERVAL, verbose=0):
+        super().__init__(verbose)
+        self.league = league
+        self.snapshot_interval = snapshot_interval
+        self._last_snapshot = 0
+
+    def _on_training_start(self):
+        self._last_snapshot = self.num_timesteps
+
+    def _on_step(self):
+        for info, done in zip(self.locals["infos"], self.locals["dones"]):
+            if done and "league_result" in info:
+                self.league.record(info["league_opponent"], info["league_result"])
+
+        if self.num_timesteps - self._last_snapshot >= self.snapshot_interval:
+            self.league.add(self.model.policy, timestep=self.num_timesteps)
+            self._last_snapshot = self.num_timesteps
+            self.training_env.unwrapped.set_pool(self.league.pool())
+            if self.verbose:
+                print(f"League snapshot {self.league.next_id - 1} at step {self.num_timesteps}")
+        return True
+
+    def _on_rollout_end(self):
+        self.training_env.unwrapped.set_pool(self.league.pool())  # Refreshed priorities
+
+
+def train_league(
+    total_timesteps,
+    model=None,
+    n_envs=8,
+    workers=0,
+    league_dir=DEFAULT_LEAGUE_DIR,
+    scheme=DEFAULT_SCHEME,
+    max_snapshots=DEFAULT_MAX_SNAPSHOTS,
+    snapshot_interval=DEFAULT_SNAPSHOT_INTERVAL,
+    max_plies=DEFAULT_MAX_PLIES,
+    tensorboard_log=DEFAULT_TENSORBOARD_LOG,
+    seed=42,
+    masked=False,
+    save_path=None,
+    start_method=None,
+    observation_mode=None,
+):
+    """Trains a full game policy against its own snapshots.
+
+    The league starts from a snapshot of the initial policy (a new model,
+    or ``model`` to continue training one).  ``observation_mode`` defaults
+    to ``"planes"``, or to the one ``model`` was trained on (see
+    :class:`LeagueGames` for ``"board"``).  Returns the model and its
+    :class:`League`.
+    """
+    if observation_mode is None:
+        observation_mode = "board" if model is not None and model.observation_space.shape == (8, 8) else "planes"
+    env = LeagueVecEnv(
+        n_envs, workers=workers, observation_mode=observation_mode, max_plies=max_plies, start_method=start_method
+    )
+    env.seed(seed)
+
+    league = League(league_dir, scheme=scheme, max_snapshots=max_snapshots)
+    created_model = model is None
+    if created_model:
+        model = create_model(env=env, tensorboard_log=tensorboard_log, seed=seed, masked=masked)
+    else:
+        model.set_env(env)
+
+    league.add(model.policy, timestep=model.num_timesteps)
+    env.set_pool(league.pool())
+
+    try:
+        model.learn(
+            total_timesteps=total_timesteps,
+            callback=LeagueCallback(league, snapshot_interval),
+            reset_num_timesteps=created_model,
+            tb_log_name=f"{'maskable_ppo' if masked else 'ppo'}_league",
+        )
+    finally:
+        env.close()
+
+    if save_path is not None:
+        model.save(save_path)
+
+    return model, league
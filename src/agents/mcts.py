@@ -0,0 +1,393 @@
+"""Monte Carlo tree search over a PPO policy's action and value heads.
+
+:class:`MCTS` runs PUCT search from a ``chess.Board``.  Each simulation
+walks down the tree by ``Q + c_puct * P * sqrt(N) / (1 + n)``, where the
+priors ``P`` are the softmax of the policy logits over the legal moves the
+4160-action codec can encode, and scores the new leaf with the value head
+(squashed to ``(-1, 1)`` by ``tanh``).  Checkmates score -1 for the side to
+move, stalemates, insufficient material and the seventy-five move rule 0.
+
+Leaves are evaluated in batches: up to ``batch_size`` simulations are
+walked down one after the other, each adding a virtual loss to the moves it
+takes so the next ones spread over other lines, and all their leaves go
+through one forward pass before the values are backed up.  The search stops
+after ``simulations`` leaves (the node budget)::
+
+    search = MCTS(model.policy, simulations=400, batch_size=16)
+    result = search.search(board)
+    result.move, result.nodes_per_sec
+
+Nodes are kept in a table keyed by the Zobrist hash of their position, so
+transpositions share one node.  The key ignores the halfmove clock and the
+moves played before, so draws that depend on them get no node: a move
+reaching a position already on the path of the simulation, or ending the
+game by the seventy-five move rule, scores as a draw.  The statistics of each move stay
+with the node it is played from.  With ``reuse`` the table outlives the
+search: the next search starts from the node of the new position, drops the
+nodes it can no longer reach and counts the visits already below it
+(``MCTSResult.reused``) towards the budget.  Past ``max_nodes`` the least
+recently visited nodes are evicted.
+
+``MCTS.select_action(env)`` makes a searcher usable wherever a policy picks
+``ChessEnv`` actions one game at a time.
+"""
+
+import math
+import time
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import torch
+
+try:  # Supports running with `src` on sys.path or importing `src.agents...`
+    from agents.inference import policy_values
+    from environment.action_codec import ACTION_CODEC
+    from environment.observation import encode_board, encode_planes, touched_squares
+    from environment.zobrist import zobrist_hash, zobrist_toggle
+except ImportError:  # pragma: no cover - import path fallback
+    from src.agents.inference import policy_values
+    from src.environment.action_codec import ACTION_CODEC
+    from src.environment.observation import encode_board, encode_planes, touched_squares
+    from src.environment.zobrist import zobrist_hash, zobrist_toggle
+
+DEFAULT_SIMULATIONS = 200  # Leaves evaluated per search
+DEFAULT_BATCH_SIZE = 16  # Leaves per forward pass
+DEFAULT_C_PUCT = 1.5
+DEFAULT_VIRTUAL_LOSS = 1.0
+DEFAULT_MAX_NODES = 20_000  # Roughly 2 kB each with 30-odd legal moves
+
+SEVENTYFIVE_MOVE_PLIES = 150
+
+MCTSResult = namedtuple(
+    "MCTSResult",
+    ("action", "move", "value", "visits", "nodes", "reused", "seconds", "nodes_per_sec", "forward_passes"),
+)
+
+
+class Node:
+    """A position of the tree.
+
+    The statistics of its moves live in arrays indexed like ``actions``:
+    ``visits`` and ``values``, the sum of the values backed up through each
+    move for the side to move here.  ``child_keys`` holds the position keys
+    of the moves searched so far.  ``terminal`` is the value of a position
+    without moves to search.
+    """
+
+    __slots__ = ("actions", "priors", "visits", "values", "child_keys", "visit_total", "terminal", "pending")
+
+    def __init__(self):
+        self.actions = None  # None until expanded
+        self.priors = None
+        self.visits = None
+        self.values = None
+        self.child_keys = None
+        self.visit_total = 0.0
+        self.terminal = None
+        self.pending = False  # Waiting for the forward pass of the current batch
+
+    @property
+    def expanded(self):
+        return self.actions is not None
+
+    def expand(self, actions, priors):
+        self.actions = actions
+        self.priors = priors
+        self.visits = np.zeros(len(actions))
+        self.values = np.zeros(len(actions))
+        self.child_keys = [None] * len(actions)
+
+
+def terminal_value(board, mask):
+    """Value for the side to move of a position that ends the game whatever
+    its history, or None.  ``mask`` is the position's legal action mask."""
+    if not mask.any() and not any(board.generate_legal_moves()):
+        return -1.0 if board.is_check() else 0.0
+    if board.is_insufficient_material():
+        return 0.0
+    return None
+
+
+def clock_draw(board):
+    """Whether the seventy-five move rule draws the game at ``board``,
+    unless the last move mated."""
+    return board.halfmove_clock >= SEVENTYFIVE_MOVE_PLIES and not board.is_checkmate()
+
+
+class MCTS:
+    """PUCT search with batched leaf evaluation by an ``ActorCriticPolicy``.
+
+    The observation encoding (``"board"`` or ``"planes"``) follows the
+    policy's observation space unless ``observation_mode`` is given.
+    ``total_nodes``, ``total_seconds`` and ``total_forward_passes`` add up
+    every search.  Call :meth:`clear` between unrelated searches, such as
+    games, when ``reuse`` is on.
+    """
+
+    def __init__(
+        self,
+        policy,
+        simulations=DEFAULT_SIMULATIONS,
+        batch_size=DEFAULT_BATCH_SIZE,
+        c_puct=DEFAULT_C_PUCT,
+        virtual_loss=DEFAULT_VIRTUAL_LOSS,
+        observation_mode=None,
+        reuse=True,
+        max_nodes=DEFAULT_MAX_NODES,
+    ):
+        if simulations < 1:
+            raise ValueError(f"simulations must be at least 1, got {simulations}")
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+        if max_nodes < 1:
+            raise ValueError(f"max_nodes must be at least 1, got {max_nodes}")
+        self.policy = policy
+        self.simulations = simulations
+        self.batch_size = batch_size
+        self.c_puct = c_puct
+        self.virtual_loss = virtual_loss
+        self.reuse = reuse
+        self.max_nodes = max_nodes
+        self.table = OrderedDict()  # Position key -> Node, least recently visited first
+
+        if observation_mode is None:
+            observation_mode = "board" if policy.observation_space.shape == (8, 8) else "planes"
+        self.encode = encode_board if observation_mode == "board" else encode_planes
+
+        self.total_nodes = 0
+        self.total_seconds = 0.0
+        self.total_forward_passes = 0
+        self.total_reused = 0
+        self.transpositions = 0  # Moves that reached a node of another line
+        self.evictions = 0
+        self.discarded = 0  # Nodes out of reach of a new root
+
+    def clear(self):
+        """Drops every node."""
+        self.table.clear()
+
+    def select_action(self, env):
+        """Action id of the searched best move of ``env.board``."""
+        return self.search(env.board).action
+
+    ###################################################
+    ###### Search #####################################
+    ###################################################
+
+    def search(self, board, simulations=None):
+        """Searches ``board`` (left unchanged) and returns an :class:`MCTSResult`.
+
+        The move is the most visited one, or None in a finished game.
+        """
+        start = time.perf_counter()
+        budget = simulations or self.simulations
+        board = board.copy(stack=False)
+        key = zobrist_hash(board)
+        self.nodes = 0
+        self.forward_passes = 0
+
+        if clock_draw(board):  # Drawn, whatever the node of its key says
+            root = Node()
+            root.terminal = 0.0
+            return self._result(root, 0, time.perf_counter() - start)
+
+        if not self.reuse:
+            self.table.clear()
+        root = self.table.get(key)
+        reused = 0
+        if root is None:
+            root = self.table[key] = Node()
+        elif root.expanded:
+            reused = int(round(root.visit_total)) + 1  # Its own evaluation too
+        self._retain(key)
+
+        while reused + self.nodes < budget and root.terminal is None:
+            self._run_batch(root, key, board, budget - reused - self.nodes)
+            self._evict()
+
+        return self._result(root, reused, time.perf_counter() - start)
+
+    def _result(self, root, reused, seconds):
+        self.total_nodes += self.nodes
+        self.total_seconds += seconds
+        self.total_forward_passes += self.forward_passes
+        self.total_reused += reused
+
+        action, move, value, visits = None, None, root.terminal, {}
+        if root.expanded and len(root.actions):
+            best = int(np.argmax(root.visits + 1e-6 * root.priors))  # Ties go to the prior
+            action = int(root.actions[best])
+            move = ACTION_CODEC.moves[action]
+            value = float(root.values.sum() / max(root.visits.sum(), 1))
+            visits = {int(action): int(count) for action, count in zip(root.actions, root.visits) if count}
+
+        return MCTSResult(
+            action, move, value, visits, self.nodes, reused, seconds,
+            self.nodes / seconds if seconds else 0.0, self.forward_passes,
+        )
+
+    def _run_batch(self, root, key, board, limit):
+        # Walks down up to batch_size simulations, then evaluates their
+        # leaves in one forward pass
+        leaves = []
+        for _ in range(min(self.batch_size, limit)):
+            node, path = self._descend(root, key, board)
+
+            if node is None:  # Repetition or seventy-five move draw within the line
+                self._backup(path, 0.0)
+                self.nodes += 1
+                self._pop(board, path)
+                continue
+
+            if node.pending:  # Collision with a leaf of this batch: evaluate what we have
+                self._undo_virtual_loss(path)
+                self._pop(board, path)
+                break
+
+            value = node.terminal
+            if value is None and not node.expanded:
+                mask = ACTION_CODEC.legal_mask(board)
+                value = terminal_value(board, mask)
+                if value is None:
+                    node.pending = True
+                    leaves.append((node, path, self.encode(board), mask))
+                else:
+                    node.expand(np.zeros(0, dtype=np.int64), np.zeros(0))
+                    node.terminal = value
+
+            if value is not None:
+                self._backup(path, value)
+                self.nodes += 1
+            self._pop(board, path)
+
+        if leaves:
+            self._evaluate(leaves)
+
+    def _descend(self, root, key, board):
+        # Follows the PUCT choices with virtual loss down to a leaf, pushing
+        # the moves on ``board``.  Returns the leaf & the (node, index) path;
+        # the leaf is None when the line repeats a position or is drawn by
+        # the halfmove clock
+        table = self.table
+        table[key] = root  # Back in if it was evicted
+        table.move_to_end(key)
+        node, path, keys = root, [], {key}
+        loss = self.virtual_loss
+        while node.expanded and node.terminal is None:
+            index = self._select(node)
+            node.visits[index] += loss
+            node.values[index] -= loss
+            node.visit_total += loss
+            path.append((node, index))
+            move = ACTION_CODEC.moves[node.actions[index]]
+
+            child_key = node.child_keys[index]
+            if child_key is None:
+                squares = touched_squares(board, move)
+                child_key = key ^ zobrist_toggle(board, squares)
+                board.push(move)
+                child_key ^= zobrist_toggle(board, squares)
+                node.child_keys[index] = child_key
+                child = table.get(child_key)
+                if child is not None:
+                    self.transpositions += 1
+            else:
+                board.push(move)
+                child = table.get(child_key)
+
+            key = child_key
+            if key in keys or clock_draw(board):
+                return None, path
+            keys.add(key)
+            if child is None:
+                child = table[key] = Node()
+            else:
+                table.move_to_end(key)
+            node = child
+        return node, path
+
+    def _select(self, node):
+        visits = node.visits
+        q = np.divide(node.values, visits, out=np.zeros_like(visits), where=visits > 0)
+        u = self.c_puct * node.priors * math.sqrt(node.visit_total + 1) / (1 + visits)
+        return int(np.argmax(q + u))
+
+    def _evaluate(self, leaves):
+        observations = np.stack([observation for _, _, observation, _ in leaves])
+        with torch.no_grad():
+            logits, values = policy_values(self.policy, observations)
+        logits = logits.cpu().numpy()
+        values = np.tanh(values.cpu().numpy())
+        self.forward_passes += 1
+
+        for (node, path, _, mask), leaf_logits, value in zip(leaves, logits, values):
+            actions = np.flatnonzero(mask)
+            if len(actions):
+                legal = leaf_logits[actions]
+                priors = np.exp(legal - legal.max())
+                node.expand(actions, priors / priors.sum())
+            else:  # Only moves the codec cannot encode: nothing to search
+                node.expand(actions, np.zeros(0))
+                node.terminal = float(value)
+            node.pending = False
+            self._backup(path, float(value))
+            self.nodes += 1
+
+    def _retain(self, key):
+        # Keeps the nodes reachable from the node of ``key``, in LRU order
+        reachable, stack = {key}, [key]
+        while stack:
+            node = self.table.get(stack.pop())
+            if node is None or not node.expanded:
+                continue
+            for child_key in node.child_keys:
+                if child_key is not None and child_key not in reachable and child_key in self.table:
+                    reachable.add(child_key)
+                    stack.append(child_key)
+
+        for stale in [k for k in self.table if k not in reachable]:
+            del self.table[stale]
+            self.discarded += 1
+
+    def _evict(self):
+        while len(self.table) > self.max_nodes:
+            self.table.popitem(last=False)
+            self.evictions += 1
+
+    def _backup(self, path, value):
+        # ``value`` is for the side to move at the leaf; each move's value is
+        # for the side that played it.  Replaces the virtual losses
+        loss = self.virtual_loss
+        for node, index in reversed(path):
+            value = -value
+            node.visits[index] += 1 - loss
+            node.values[index] += value + loss
+            node.visit_total += 1 - loss
+
+    def _undo_virtual_loss(self, path):
+        loss = self.virtual_loss
+        for node, index in path:
+            node.visits[index] -= loss
+            node.values[index] += loss
+            node.visit_total -= loss
+
+    @staticmethod
+    def _pop(board, path):
+        for _ in path:
+            board.pop()
+
+    def stats(self):
+        """Nodes, reused nodes, forward passes, nodes per second and table
+        counters over every search."""
+        return {
+            "nodes": self.total_nodes,
+            "reused": self.total_reused,
+            "forward_passes": self.total_forward_passes,
+            "seconds": self.total_seconds,
+            "nodes_per_sec": self.total_nodes / self.total_seconds if self.total_seconds else 0.0,
+            "mean_batch_size": self.total_nodes / self.total_forward_passes if self.total_forward_passes else 0.0,
+            "table_nodes": len(self.table),
+            "transpositions": self.transpositions,
+            "evictions": self.evictions,
+            "discarded": self.discarded,
+        }
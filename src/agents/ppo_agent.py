@@ -7,23 +7,55 @@ opponent piece), which keeps each training run small and reproducible.
 Each stage is trained on its own environment instance so runs stay short,
 seeded and independently reproducible. Stages can be chained with
 :func:`train_curriculum`, which reuses the policy from the previous stage.
+:data:`FULL_GAME` trains on the full :class:`ChessEnv` instead.
+
+:func:`make_env` can run ``n_envs`` copies of a stage in one process
+(``"dummy"``), one process each (``"subproc"``) or one process each with
+observations returned through shared memory (``"shm"``). Worker ``i`` is
+seeded with ``seed + i``.
+
+``train(stage=FULL_GAME, pretrain_data=...)`` starts PPO from a policy
+behaviour-cloned on encoded games (:mod:`agents.pretrain`) instead of random
+weights.  :func:`agents.league.train_league` trains on the full game against
+frozen snapshots of the policy instead of its current weights.
+
+Passing ``masked=True`` trains with ``sb3-contrib``'s ``MaskablePPO``, which
+reads each env's ``action_masks()`` so no samples are spent on illegal moves.
+:func:`compare_masking` trains both variants and reports steps per legal move
+and the wall-clock time needed to reach a target win rate.
 """
 
+import json
+import os
+import time
+import zipfile
+from collections import deque
+from functools import partial
+
 from stable_baselines3 import PPO
-from stable_baselines3.common.vec_env import DummyVecEnv
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
 
 try:  # Supports running with `src` on sys.path or importing `src.agents...`
+    from agents.pretrain import pretrain
+    from agents.shared_memory_vec_env import SharedMemoryVecEnv
+    from environment.chess_env import ChessEnv
     from environment.simple_chess_env import (
         SimpleChessEnv,
         STAGE_CAPTURE_PIECE,
         STAGE_REACH_SQUARE,
     )
+    from environment.trajectory import TrajectoryRecorder
 except ImportError:  # pragma: no cover - import path fallback
+    from src.agents.pretrain import pretrain
+    from src.agents.shared_memory_vec_env import SharedMemoryVecEnv
+    from src.environment.chess_env import ChessEnv
     from src.environment.simple_chess_env import (
         SimpleChessEnv,
         STAGE_CAPTURE_PIECE,
         STAGE_REACH_SQUARE,
     )
+    from src.environment.trajectory import TrajectoryRecorder
 
 DEFAULT_STAGE = STAGE_REACH_SQUARE
 DEFAULT_AGENT_PIECE = "knight"
@@ -34,10 +66,88 @@ DEFAULT_TIMESTEPS_PER_STAGE = 50_000
 # first, then learn to capture.
 CURRICULUM = (STAGE_REACH_SQUARE, STAGE_CAPTURE_PIECE)
 
+# Pseudo-stage that trains on the full game (ChessEnv) instead of a
+# SimpleChessEnv stage.
+FULL_GAME = "full_game"
+
+# Episode ends that count as a win for the win-rate statistics.
+WINNING_REASONS = ("goal_reached",)
+WINNERS = ("white", "black")  # ChessEnv self-play: any decisive game
+
+# Vectorised env backends of make_env.
+VEC_ENV_BACKENDS = {
+    "dummy": DummyVecEnv,  # Every env in this process
+    "subproc": SubprocVecEnv,  # One process per env, observations pickled
+    "shm": SharedMemoryVecEnv,  # One process per env, observations in shared memory
+}
+
+
+# Training only needs the episode end reasons of the info dicts.
+TRAINING_INFO_LEVEL = "minimal"
+
+
+def _build_env(stage, agent_piece, info_level=TRAINING_INFO_LEVEL, record_path=None):
+    if stage == FULL_GAME:
+        env = ChessEnv(info_level=info_level)
+    else:
+        env = SimpleChessEnv(stage=stage, agent_piece=agent_piece, info_level=info_level)
+
+    if record_path is not None:
+        env = TrajectoryRecorder(env, record_path, metadata={"stage": stage, "agent_piece": agent_piece})
+    return env
+
+
+def make_env(
+    stage=DEFAULT_STAGE,
+    agent_piece=DEFAULT_AGENT_PIECE,
+    n_envs=1,
+    backend="dummy",
+    start_method=None,
+    seed=None,
+    info_level=TRAINING_INFO_LEVEL,
+    record_dir=None,
+):
+    """Vectorised chess environment for a single curriculum stage.
+
+    ``backend`` is one of :data:`VEC_ENV_BACKENDS`. ``start_method``
+    (``"fork"``, ``"forkserver"`` or ``"spawn"``) only applies to the
+    multiprocess backends. With a ``seed``, worker ``i`` is reset with
+    ``seed + i``. ``info_level`` defaults to ``"minimal"``: only the reasons
+    and winners the training callbacks read. With ``record_dir`` worker ``i``
+    appends its episodes to ``record_dir/<stage>_<i>.traj`` (see
+    :mod:`environment.trajectory`).
+    """
+    if backend not in VEC_ENV_BACKENDS:
+        raise ValueError(f"Unknown backend: {backend!r}. Expected one of {tuple(VEC_ENV_BACKENDS)}.")
+    if n_envs < 1:
+        raise ValueError(f"n_envs must be at least 1, got {n_envs}")
+
+    record_paths = [None] * n_envs
+    if record_dir is not None:
+        os.makedirs(record_dir, exist_ok=True)
+        record_paths = [os.path.join(record_dir, f"{stage}_{index}.traj") for index in range(n_envs)]
+
+    env_fns = [partial(_build_env, stage, agent_piece, info_level, path) for path in record_paths]
+
+    if backend == "dummy":
+        env = DummyVecEnv(env_fns)
+    else:
+        env = VEC_ENV_BACKENDS[backend](env_fns, start_method=start_method)
 
-def make_env(stage=DEFAULT_STAGE, agent_piece=DEFAULT_AGENT_PIECE):
-    """Vectorised simplified chess environment for a single curriculum stage."""
-    return DummyVecEnv([lambda: SimpleChessEnv(stage=stage, agent_piece=agent_piece)])
+    if seed is not None:
+        env.seed(seed)  # Applied on the next reset: seed + worker index
+
+    return env
+
+
+def _algorithm(masked):
+    if not masked:
+        return PPO
+    try:
+        from sb3_contrib import MaskablePPO
+    except ImportError as error:  # pragma: no cover - optional dependency
+        raise ImportError("masked=True requires sb3-contrib (pip install sb3-contrib)") from error
+    return MaskablePPO
 
 
 def create_model(
@@ -46,12 +156,16 @@ def create_model(
     agent_piece=DEFAULT_AGENT_PIECE,
     tensorboard_log=DEFAULT_TENSORBOARD_LOG,
     seed=42,
+    masked=False,
 ):
-    """PPO hyperparameters tuned for short, stable runs on the simple stages."""
+    """PPO hyperparameters tuned for short, stable runs on the simple stages.
+
+    With ``masked=True`` the same hyperparameters are used for ``MaskablePPO``.
+    """
     if env is None:
         env = make_env(stage=stage, agent_piece=agent_piece)
 
-    return PPO(
+    return _algorithm(masked)(
         policy="MlpPolicy",
         env=env,
         learning_rate=0.0003,
@@ -70,6 +184,30 @@ def create_model(
     )
 
 
+def _saved_data(path):
+    # The JSON attributes SB3 stores next to the weights
+    with zipfile.ZipFile(path) as archive:
+        return json.loads(archive.read("data"))
+
+
+def saved_with_masking(path):
+    """Whether the model saved at ``path`` is a ``MaskablePPO`` one, read from
+    the policy class stored in the zip without loading it."""
+    return _saved_data(path).get("policy_class", {}).get("__module__", "").startswith("sb3_contrib")
+
+
+def saved_spaces(path):
+    """``(observation_shape, action_count)`` of the model saved at ``path``,
+    read without loading it."""
+    data = _saved_data(path)
+    return tuple(data["observation_space"]["_shape"]), int(data["action_space"]["n"])
+
+
+def load_model(path, masked=False, device="auto"):
+    """Loads a model saved by :func:`train` (``masked`` for ``MaskablePPO``)."""
+    return _algorithm(masked).load(path, device=device)
+
+
 def train(
     stage=DEFAULT_STAGE,
     agent_piece=DEFAULT_AGENT_PIECE,
@@ -78,13 +216,33 @@ def train(
     tensorboard_log=DEFAULT_TENSORBOARD_LOG,
     seed=42,
     save_path=None,
+    masked=False,
+    callback=None,
+    n_envs=1,
+    backend="dummy",
+    start_method=None,
+    pretrain_data=None,
+    pretrain_epochs=1,
+    record_dir=None,
 ):
     """Train a single curriculum stage.
 
     Pass an existing ``model`` to continue training a policy learned on an
-    earlier stage. Returns the trained model.
+    earlier stage. ``n_envs``, ``backend``, ``start_method`` and
+    ``record_dir`` are passed to :func:`make_env`. With ``pretrain_data`` (a
+    shard directory, see :mod:`agents.pretrain`) a new model is first
+    behaviour-cloned on it for ``pretrain_epochs`` epochs. Returns the
+    trained model.
     """
-    env = make_env(stage=stage, agent_piece=agent_piece)
+    env = make_env(
+        stage=stage,
+        agent_piece=agent_piece,
+        n_envs=n_envs,
+        backend=backend,
+        start_method=start_method,
+        seed=seed,
+        record_dir=record_dir,
+    )
 
     created_model = model is None
     if created_model:
@@ -92,14 +250,18 @@ def train(
             env=env,
             tensorboard_log=tensorboard_log,
             seed=seed,
+            masked=masked,
         )
+        if pretrain_data is not None:
+            pretrain(model, pretrain_data, epochs=pretrain_epochs, masked=masked, seed=seed)
     else:
         model.set_env(env)
 
     model.learn(
         total_timesteps=total_timesteps,
+        callback=callback,
         reset_num_timesteps=created_model,
-        tb_log_name=f"ppo_{stage}",
+        tb_log_name=f"{'maskable_ppo' if masked else 'ppo'}_{stage}",
     )
 
     if save_path is not None:
@@ -115,11 +277,21 @@ def train_curriculum(
     tensorboard_log=DEFAULT_TENSORBOARD_LOG,
     seed=42,
     save_prefix="simple_chess_ppo",
+    masked=False,
+    n_envs=1,
+    backend="dummy",
+    start_method=None,
 ):
-    """Run every stage in order, reusing the policy from the previous stage."""
+    """Run every stage in order, reusing the policy from the previous stage.
+
+    Every stage uses the same ``n_envs`` so the rollout buffer can be reused.
+    """
     model = None
 
     for stage in stages:
+        if model is not None:
+            model.get_env().close()  # Stops the workers of the previous stage
+
         model = train(
             stage=stage,
             agent_piece=agent_piece,
@@ -128,10 +300,116 @@ def train_curriculum(
             tensorboard_log=tensorboard_log,
             seed=seed,
             save_path=f"{save_prefix}_{stage}",
+            masked=masked,
+            n_envs=n_envs,
+            backend=backend,
+            start_method=start_method,
         )
 
     return model
 
 
+class TrainingStatsCallback(BaseCallback):
+    """Counts legal moves and episode wins during ``learn``.
+
+    Records the number of environment steps spent per legal move and the
+    wall-clock time and step count at which the win rate over the last
+    ``window`` episodes first reaches ``target_win_rate``.
+    """
+
+    def __init__(self, target_win_rate=0.8, window=100, verbose=0):
+        super().__init__(verbose)
+        self.target_win_rate = target_win_rate
+        self.window = window
+
+        self.steps = 0
+        self.legal_steps = 0
+        self.episodes = 0
+        self.recent_wins = deque(maxlen=window)
+        self.seconds_to_target = None
+        self.steps_to_target = None
+        self._start_time = None
+
+    def _on_training_start(self):
+        self._start_time = time.perf_counter()
+
+    def _on_step(self):
+        for info, done in zip(self.locals["infos"], self.locals["dones"]):
+            self.steps += 1
+            if "illegal" not in info.get("reason", ""):
+                self.legal_steps += 1
+
+            if done:
+                self.episodes += 1
+                self.recent_wins.append(
+                    info.get("reason") in WINNING_REASONS or info.get("winner") in WINNERS
+                )
+
+        if (
+            self.seconds_to_target is None
+            and len(self.recent_wins) == self.window
+            and self.win_rate >= self.target_win_rate
+        ):
+            self.seconds_to_target = time.perf_counter() - self._start_time
+            self.steps_to_target = self.steps
+
+        return True
+
+    @property
+    def win_rate(self):
+        if not self.recent_wins:
+            return 0.0
+        return sum(self.recent_wins) / len(self.recent_wins)
+
+    @property
+    def steps_per_legal_move(self):
+        if self.legal_steps == 0:
+            return float("inf")
+        return self.steps / self.legal_steps
+
+    def summary(self):
+        return {
+            "steps": self.steps,
+            "legal_steps": self.legal_steps,
+            "steps_per_legal_move": self.steps_per_legal_move,
+            "episodes": self.episodes,
+            "final_win_rate": self.win_rate,
+            "seconds_to_target": self.seconds_to_target,
+            "steps_to_target": self.steps_to_target,
+        }
+
+
+def compare_masking(
+    stage=DEFAULT_STAGE,
+    agent_piece=DEFAULT_AGENT_PIECE,
+    total_timesteps=DEFAULT_TIMESTEPS_PER_STAGE,
+    target_win_rate=0.8,
+    window=100,
+    tensorboard_log=DEFAULT_TENSORBOARD_LOG,
+    seed=42,
+):
+    """Train the unmasked and masked variants on one stage and compare them.
+
+    Returns ``{"unmasked": summary, "masked": summary}`` with the
+    :meth:`TrainingStatsCallback.summary` of each run.
+    """
+    results = {}
+
+    for name, masked in (("unmasked", False), ("masked", True)):
+        stats = TrainingStatsCallback(target_win_rate=target_win_rate, window=window)
+        train(
+            stage=stage,
+            agent_piece=agent_piece,
+            total_timesteps=total_timesteps,
+            tensorboard_log=tensorboard_log,
+            seed=seed,
+            masked=masked,
+            callback=stats,
+        )
+        results[name] = stats.summary()
+
+    return results
+
+
 if __name__ == "__main__":
     train_curriculum()
@@ -0,0 +1,208 @@
+"""Behaviour-cloning pretraining of a PPO policy from encoded game shards.
+
+Reward-only learning on the full game barely moves from random weights, so
+:func:`pretrain` first fits the policy's action head to the moves played in
+real games (shards written by :mod:`training_data.pgn_converter`) with a
+supervised cross-entropy loss.  The value head is left untouched.  The
+pretrained model is then trained with PPO as usual::
+
+    model = create_model(env=make_env(FULL_GAME))
+    pretrain(model, "data/")
+    train(stage=FULL_GAME, model=model)
+
+or in one call with ``train(stage=FULL_GAME, pretrain_data="data/")``.
+
+:class:`ShardBatchLoader` streams the shards one at a time and prepares the
+next batches (shuffling and legal move masks) on a background thread while
+the policy trains on the current one.
+"""
+
+import queue
+import threading
+import time
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+try:  # Supports running with `src` on sys.path or importing `src.agents...`
+    from agents.inference import action_logits, mask_logits
+    from environment.action_codec import ACTION_CODEC
+    from environment.positions import unpack_board
+    from training_data.shards import load_shard, shard_paths
+except ImportError:  # pragma: no cover - import path fallback
+    from src.agents.inference import action_logits, mask_logits
+    from src.environment.action_codec import ACTION_CODEC
+    from src.environment.positions import unpack_board
+    from src.training_data.shards import load_shard, shard_paths
+
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_PREFETCH = 4  # Batches prepared ahead of the training loop
+DEFAULT_PRETRAIN_LEARNING_RATE = 0.001
+
+_END = object()
+
+
+def legal_masks(positions):
+    """``(N, 4160)`` legal move masks of packed positions."""
+    return np.stack([ACTION_CODEC.legal_mask(unpack_board(record)) for record in positions])
+
+
+class ShardBatchLoader:
+    """Iterates ``(observations, actions, masks)`` batches over the shards of
+    a dataset directory, one pass per iteration.
+
+    With ``shuffle`` the shard order and the rows inside each shard are
+    reshuffled every pass (batches do not mix shards).  ``masks`` is ``None``
+    unless ``masked``: the legal moves of the shards' ``positions``.  Batches
+    are built ``prefetch`` ahead on a background thread.
+    """
+
+    def __init__(
+        self,
+        directory,
+        batch_size=DEFAULT_BATCH_SIZE,
+        shuffle=True,
+        masked=False,
+        prefetch=DEFAULT_PREFETCH,
+        seed=None,
+    ):
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+        self.directory = directory
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.masked = masked
+        self.prefetch = prefetch
+        self.rng = np.random.default_rng(seed)
+
+    def batches(self):
+        """Yields the batches of one pass in this thread."""
+        paths = shard_paths(self.directory)
+        if self.shuffle:
+            paths = [paths[index] for index in self.rng.permutation(len(paths))]
+
+        for path in paths:
+            shard = load_shard(path)  # Only one shard is held at a time
+
+            count = len(shard["actions"])
+            order = self.rng.permutation(count) if self.shuffle else np.arange(count)
+
+            for start in range(0, count, self.batch_size):
+                rows = order[start:start + self.batch_size]
+                masks = legal_masks(shard["positions"][rows]) if self.masked else None
+                yield shard["observations"][rows], shard["actions"][rows].astype(np.int64), masks
+
+    def __iter__(self):
+        batches = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+
+        def offer(item):
+            # Gives up once the consumer has stopped, so the thread can exit
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for batch in self.batches():
+                    if not offer(batch):
+                        return
+                offer(_END)
+            except BaseException as error:  # Re-raised in the consuming thread
+                offer(error)
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        try:
+            while True:
+                batch = batches.get()
+                if batch is _END:
+                    return
+                if isinstance(batch, BaseException):
+                    raise batch
+                yield batch
+        finally:
+            stop.set()
+            producer.join()
+
+
+def pretrain(
+    model,
+    data_dir,
+    epochs=1,
+    batch_size=DEFAULT_BATCH_SIZE,
+    learning_rate=DEFAULT_PRETRAIN_LEARNING_RATE,
+    masked=False,
+    prefetch=DEFAULT_PREFETCH,
+    seed=None,
+    log=print,
+):
+    """Fits ``model``'s action head to the moves of the shards in ``data_dir``.
+
+    With ``masked`` the softmax only runs over each position's legal moves.
+    The shards' observation mode must match the model's observation space.
+    Returns the model and one ``{"loss", "accuracy", "samples",
+    "samples_per_sec"}`` dict per epoch.
+    """
+    policy = model.policy
+    if model.action_space.n != ACTION_CODEC.size:
+        raise ValueError(f"pretrain needs the {ACTION_CODEC.size}-action ChessEnv space, got {model.action_space}")
+
+    loader = ShardBatchLoader(
+        data_dir, batch_size=batch_size, masked=masked, prefetch=prefetch, seed=seed
+    )
+    # Every parameter: the value head gets no gradient from the imitation
+    # loss, so Adam leaves it unchanged
+    optimizer = torch.optim.Adam(policy.parameters(), lr=learning_rate)
+    history = []
+
+    policy.set_training_mode(True)
+    try:
+        for epoch in range(epochs):
+            start = time.perf_counter()
+            total_loss, correct, samples = 0.0, 0, 0
+
+            for observations, actions, masks in loader:
+                if observations.shape[1:] != policy.observation_space.shape:
+                    raise ValueError(
+                        f"Shard observations of shape {observations.shape[1:]} do not match "
+                        f"the policy's {policy.observation_space.shape}"
+                    )
+
+                logits = action_logits(policy, observations)
+                if masks is not None:
+                    logits = mask_logits(logits, masks)
+                targets = torch.as_tensor(actions, device=policy.device)
+                loss = F.cross_entropy(logits, targets)
+
+                optimizer.zero_grad()
+                loss.backward()
+                torch.nn.utils.clip_grad_norm_(policy.parameters(), model.max_grad_norm)
+                optimizer.step()
+
+                total_loss += loss.item() * len(actions)
+                correct += (logits.argmax(dim=1) == targets).sum().item()
+                samples += len(actions)
+
+            elapsed = time.perf_counter() - start
+            stats = {
+                "loss": total_loss / max(samples, 1),
+                "accuracy": correct / max(samples, 1),
+                "samples": samples,
+                "samples_per_sec": samples / elapsed if elapsed else 0.0,
+            }
+            history.append(stats)
+            if log is not None:
+                log(
+                    f"pretrain epoch {epoch + 1}/{epochs}: loss {stats['loss']:.4f}, "
+                    f"accuracy {stats['accuracy']:.1%}, {stats['samples_per_sec']:,.0f} samples/s"
+                )
+    finally:
+        policy.set_training_mode(False)
+
+    return model, history
@@ -0,0 +1,180 @@
+"""Subprocess vectorised env that returns observations through shared memory.
+
+:class:`SharedMemoryVecEnv` runs one environment per worker process like
+Stable-Baselines3's ``SubprocVecEnv``, but every worker writes its
+observation straight into one shared ``(n_envs, *obs_shape)`` array.  Only
+rewards, dones and infos travel through the pipes, so observations are never
+pickled.  Attribute access and ``env_method`` calls (``action_masks`` for
+``MaskablePPO`` included) work exactly as in ``SubprocVecEnv``.
+
+The array is a named :class:`multiprocessing.shared_memory.SharedMemory`
+block sized from the spaces of the first worker's env, which every worker
+attaches to once its env is built.  Only public SB3 APIs are used: the
+seeds and options of the next reset are kept by this class.
+"""
+
+import copy
+import multiprocessing as mp
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import SubprocVecEnv
+from stable_baselines3.common.vec_env.base_vec_env import CloudpickleWrapper, VecEnv
+
+
+def _observation_array(buffer, n_envs, observation_space):
+    return np.frombuffer(buffer, dtype=observation_space.dtype).reshape((n_envs,) + observation_space.shape)
+
+
+def _worker(remote, parent_remote, env_fn_wrapper):
+    # Import here to avoid a circular import, as in SubprocVecEnv
+    from stable_baselines3.common.env_util import is_wrapped
+
+    parent_remote.close()
+    env = env_fn_wrapper.var()  # A gymnasium env
+    memory, observation = None, None  # Set by the "attach" command
+    reset_info = {}
+
+    while True:
+        try:
+            cmd, data = remote.recv()
+            if cmd == "step":
+                obs, reward, terminated, truncated, info = env.step(data)
+                done = terminated or truncated
+                info["TimeLimit.truncated"] = truncated and not terminated
+                if done:
+                    # The final observation goes through the pipe, as it is rare
+                    info["terminal_observation"] = obs
+                    obs, reset_info = env.reset()
+                observation[...] = obs
+                remote.send((reward, done, info, reset_info))
+            elif cmd == "reset":
+                maybe_options = {"options": data[1]} if data[1] else {}
+                obs, reset_info = env.reset(seed=data[0], **maybe_options)
+                observation[...] = obs
+                remote.send(reset_info)
+            elif cmd == "render":
+                remote.send(env.render())
+            elif cmd == "close":
+                env.close()
+                observation = None  # Releases the buffer before closing it
+                if memory is not None:
+                    memory.close()
+                remote.close()
+                break
+            elif cmd == "attach":
+                name, n_envs, index = data
+                memory = shared_memory.SharedMemory(name=name)
+                observation = _observation_array(memory.buf, n_envs, env.observation_space)[index]
+                remote.send(None)
+            elif cmd == "get_spaces":
+                remote.send((env.observation_space, env.action_space))
+            elif cmd == "env_method":
+                method = env.get_wrapper_attr(data[0])
+                remote.send(method(*data[1], **data[2]))
+            elif cmd == "get_attr":
+                remote.send(env.get_wrapper_attr(data))
+            elif cmd == "has_attr":
+                try:
+                    env.get_wrapper_attr(data)
+                    remote.send(True)
+                except AttributeError:
+                    remote.send(False)
+            elif cmd == "set_attr":
+                remote.send(setattr(env, data[0], data[1]))
+            elif cmd == "is_wrapped":
+                remote.send(is_wrapped(env, data))
+            else:
+                raise NotImplementedError(f"`{cmd}` is not implemented in the worker")
+        except (EOFError, KeyboardInterrupt):
+            break
+
+
+class SharedMemoryVecEnv(SubprocVecEnv):
+    """``SubprocVecEnv`` whose observations live in one shared array.
+
+    Only ``Box`` observation spaces are supported.  ``start_method`` follows
+    ``SubprocVecEnv``: ``forkserver`` where available, ``spawn`` otherwise.
+    """
+
+    def __init__(self, env_fns, start_method=None):
+        self.waiting = False
+        self.closed = False
+        self._memory = None
+        n_envs = len(env_fns)
+
+        if start_method is None:
+            start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+        ctx = mp.get_context(start_method)
+        # Workers share this process' tracker, so attaching never unlinks the block
+        resource_tracker.ensure_running()
+
+        self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in range(n_envs)])
+        self.processes = []
+        for work_remote, remote, env_fn in zip(self.work_remotes, self.remotes, env_fns):
+            args = (work_remote, remote, CloudpickleWrapper(env_fn))
+            # daemon=True: if the main process crashes, we should not cause things to hang
+            process = ctx.Process(target=_worker, args=args, daemon=True)
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+
+        self.remotes[0].send(("get_spaces", None))
+        observation_space, action_space = self.remotes[0].recv()
+        if not isinstance(observation_space, spaces.Box):
+            SubprocVecEnv.close(self)
+            raise ValueError(f"SharedMemoryVecEnv needs a Box observation space, got {observation_space}")
+
+        nbytes = n_envs * int(np.prod(observation_space.shape)) * observation_space.dtype.itemsize
+        self._memory = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+        self._observations = _observation_array(self._memory.buf, n_envs, observation_space)
+        for index, remote in enumerate(self.remotes):
+            remote.send(("attach", (self._memory.name, n_envs, index)))
+        for remote in self.remotes:
+            remote.recv()
+
+        VecEnv.__init__(self, n_envs, observation_space, action_space)
+        self._next_seeds = [None] * n_envs
+        self._next_options = [{} for _ in range(n_envs)]
+
+    def seed(self, seed=None):
+        """Seeds of the next reset, ``seed + index`` per env (random when None)."""
+        if seed is None:
+            seed = int(np.random.randint(0, np.iinfo(np.uint32).max, dtype=np.uint32))
+        self._next_seeds = [seed + index for index in range(self.num_envs)]
+        return list(self._next_seeds)
+
+    def set_options(self, options=None):
+        """Options of the next reset: one dict for every env, or one per env."""
+        if options is None:
+            options = {}
+        if isinstance(options, dict):
+            options = [options] * self.num_envs
+        self._next_options = [copy.deepcopy(env_options) for env_options in options]
+
+    def step_wait(self):
+        results = [remote.recv() for remote in self.remotes]
+        self.waiting = False
+        rewards, dones, infos, self.reset_infos = zip(*results)
+        # Copied because the workers overwrite the buffer on the next step
+        return self._observations.copy(), np.stack(rewards), np.stack(dones), infos
+
+    def reset(self):
+        for remote, seed, options in zip(self.remotes, self._next_seeds, self._next_options):
+            remote.send(("reset", (seed, options)))
+        self.reset_infos = [remote.recv() for remote in self.remotes]
+        # Seeds and options are only used once
+        self._next_seeds = [None] * self.num_envs
+        self._next_options = [{} for _ in range(self.num_envs)]
+        return self._observations.copy()
+
+    def close(self):
+        if self.closed:
+            return
+        super().close()
+        if self._memory is not None:
+            self._observations = None  # Releases the buffer before closing it
+            self._memory.close()
+            self._memory.unlink()
+            self._memory = None
@@ -0,0 +1,518 @@
+"""Rating tournament between saved checkpoints.
+
+:func:`run_tournament` pairs checkpoints round-robin or over Swiss rounds,
+plays ``games_per_pair`` seeded :class:`ChessEnv` games per pairing on a
+process pool and rates every checkpoint from all the results:
+
+* Elo: maximum likelihood Bradley-Terry ratings (draws count half), with
+  confidence intervals from the curvature of the likelihood.  Each player
+  also has one virtual draw against a 1500 reference so unbeaten or
+  winless players keep finite ratings.
+* Glicko: a single Glicko-1 rating period from 1500 / 350, whose rating
+  deviation gives the interval.
+
+Pairwise results are stored in a SQLite cache keyed by the checkpoints'
+content digests and the match settings, so adding a checkpoint to an
+existing field only plays its new pairings::
+
+    python -m agents.tournament full_game_100k.zip full_game_200k.zip full_game_300k.zip \\
+        --games 20 --workers 4 --cache tournament.sqlite
+
+Only full-game checkpoints (``ChessEnv`` with "board" observations) can
+play; :func:`load_player` rejects the ``SimpleChessEnv`` curriculum stages.
+
+In a match the two policies take turns: every step one forward pass per
+policy covers all games it is to move in.  Games ``2k`` and ``2k + 1``
+start from the same seeded opening of ``opening_plies`` random moves, with
+the first checkpoint of the pair (by digest) playing White in the even one,
+so a pairing is not one deterministic game repeated.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+import torch
+
+try:  # Supports running with `src` on sys.path or importing `src.agents...`
+    from agents.evaluate import DEFAULT_MAX_PLIES, DEFAULT_OPENING_PLIES, RESULTS, opening_fen, takes_masks
+    from agents.inference import predict_actions
+    from agents.ppo_agent import load_model, saved_spaces, saved_with_masking
+    from environment.action_codec import ACTION_SIZE
+    from environment.chess_env import ChessEnv
+except ImportError:  # pragma: no cover - import path fallback
+    from src.agents.evaluate import DEFAULT_MAX_PLIES, DEFAULT_OPENING_PLIES, RESULTS, opening_fen, takes_masks
+    from src.agents.inference import predict_actions
+    from src.agents.ppo_agent import load_model, saved_spaces, saved_with_masking
+    from src.environment.action_codec import ACTION_SIZE
+    from src.environment.chess_env import ChessEnv
+
+PAIRINGS = ("round_robin", "swiss")
+
+# (observation shape, action count) of the "board" ChessEnv the matches use
+MATCH_SPACES = ((8, 8), ACTION_SIZE)
+
+DEFAULT_GAMES_PER_PAIR = 20
+DEFAULT_CACHE = "tournament.sqlite"
+
+INITIAL_RATING = 1500.0
+INITIAL_DEVIATION = 350.0  # Glicko rating deviation of an unrated player
+CONFIDENCE_Z = 1.96  # 95% intervals
+ELO_SCALE = 400 / math.log(10)  # Elo points per natural log-odds unit
+
+Player = namedtuple("Player", ("name", "path", "digest", "masked"))
+
+
+###################################################
+###### Players & cache ############################
+###################################################
+
+def _file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_player(path, name=None):
+    """A :class:`Player` for the checkpoint at ``path``, named after the file
+    unless ``name`` is given.
+
+    Raises ``ValueError`` for checkpoints that cannot play ``ChessEnv`` games,
+    such as the ``SimpleChessEnv`` curriculum stages.
+    """
+    spaces = saved_spaces(path)
+    if spaces != MATCH_SPACES:
+        raise ValueError(
+            f"{path} takes {spaces[0]} observations and {spaces[1]} actions, but matches are ChessEnv games "
+            f"with {MATCH_SPACES[0]} observations and {MATCH_SPACES[1]} actions: use full-game checkpoints"
+        )
+    if name is None:
+        name = os.path.splitext(os.path.basename(path))[0]
+    return Player(name, path, _file_digest(path), saved_with_masking(path))
+
+
+class ResultCache:
+    """Pairwise match results in a SQLite file.
+
+    A row holds the wins, draws and losses of ``player_a`` against
+    ``player_b`` (digests, ``player_a < player_b``) under one match
+    ``config``.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " player_a TEXT NOT NULL, player_b TEXT NOT NULL, config TEXT NOT NULL,"
+            " wins INTEGER NOT NULL, draws INTEGER NOT NULL, losses INTEGER NOT NULL,"
+            " PRIMARY KEY (player_a, player_b, config))"
+        )
+        self.connection.commit()
+
+    def get(self, player_a, player_b, config):
+        """``(wins, draws, losses)`` of ``player_a`` against ``player_b``, or None."""
+        flipped = player_a > player_b
+        if flipped:
+            player_a, player_b = player_b, player_a
+
+        row = self.connection.execute(
+            "SELECT wins, draws, losses FROM results WHERE player_a = ? AND player_b = ? AND config = ?",
+            (player_a, player_b, config),
+        ).fetchone()
+        if row is None:
+            return None
+        return row[::-1] if flipped else row
+
+    def put(self, player_a, player_b, config, wins, draws, losses):
+        if player_a > player_b:
+            player_a, player_b, wins, losses = player_b, player_a, losses, wins
+        self.connection.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+            (player_a, player_b, config, wins, draws, losses),
+        )
+        self.connection.commit()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+
+###################################################
+###### Matches ####################################
+###################################################
+
+class MatchGame:
+    """One game between two policies: policy 0 plays White in even games,
+    from the opening shared with the other game of its pair."""
+
+    def __init__(self, index, seed, max_plies=DEFAULT_MAX_PLIES, opening_plies=DEFAULT_OPENING_PLIES):
+        self.env = ChessEnv(info_level="minimal")
+        fen = opening_fen(seed + index // 2, opening_plies)
+        self.observation, _ = self.env.reset(seed=seed + index, options={"fen": fen})
+        self.generator = torch.Generator().manual_seed(seed + index)  # For sampled moves of both policies
+        self.first_white = index % 2 == 0
+        self.max_plies = max_plies
+        self.plies = 0
+        self.result = None  # Of policy 0: "win", "draw" or "loss"
+
+    @property
+    def to_move(self):
+        """Index of the policy to move."""
+        return 0 if self.env.board.turn == self.first_white else 1
+
+    def play(self, action):
+        mover_white = self.env.board.turn
+        self.observation, _, terminated, truncated, info = self.env.step(int(action))
+        reason = info.get("reason")
+        if reason is None:
+            self.plies += 1
+
+        if terminated or truncated:
+            winner = info.get("winner") or "draw"
+            if reason == "too many illegal moves":
+                winner = "black" if mover_white else "white"
+        elif self.plies >= self.max_plies:
+            winner = "draw"
+        else:
+            return
+
+        self.result = "draw" if winner == "draw" else ("win" if (winner == "white") == self.first_white else "loss")
+
+
+def play_match(
+    models,
+    games=DEFAULT_GAMES_PER_PAIR,
+    seed=0,
+    max_plies=DEFAULT_MAX_PLIES,
+    deterministic=True,
+    opening_plies=DEFAULT_OPENING_PLIES,
+):
+    """Plays ``games`` games between two loaded models and returns the
+    ``(wins, draws, losses)`` of ``models[0]``.
+
+    Game ``i`` starts from the opening of ``seed + i // 2``.  Without
+    ``deterministic`` it samples its moves from a generator seeded with
+    ``seed + i``, so sampled matches are reproducible too.
+    """
+    masked = [takes_masks(model) for model in models]
+    playing = [MatchGame(index, seed, max_plies, opening_plies) for index in range(games)]
+    finished = []
+
+    while playing:
+        for side, model in enumerate(models):
+            batch = [game for game in playing if game.result is None and game.to_move == side]
+            if not batch:
+                continue
+            observations = np.stack([game.observation for game in batch])
+            masks = np.stack([game.env.action_masks() for game in batch]) if masked[side] else None
+            generators = None if deterministic else [game.generator for game in batch]
+            actions = predict_actions(model.policy, observations, masks, deterministic, generators)
+            for game, action in zip(batch, actions):
+                game.play(action)
+
+        finished.extend(game for game in playing if game.result is not None)
+        playing = [game for game in playing if game.result is None]
+
+    return tuple(sum(game.result == result for game in finished) for result in RESULTS)
+
+
+_MODELS = {}  # Models loaded by a worker process, by path
+
+
+def _match_worker(task):
+    players, options = task
+    torch.set_num_threads(1)  # One core per worker process
+    models = []
+    for player in players:
+        if player.path not in _MODELS:
+            _MODELS[player.path] = load_model(player.path, masked=player.masked, device="cpu")
+        models.append(_MODELS[player.path])
+    return play_match(models, **options)
+
+
+
+###################################################
+###### Pairings ###################################
+###################################################
+
+def round_robin_pairings(count):
+    return list(itertools.combinations(range(count), 2))
+
+
+def swiss_pairings(scores, played, byes=()):
+    """Pairs players by score for one Swiss round.
+
+    Players are taken from the highest score down and each is paired with
+    the next one it has not met yet (or the next one at all when it has met
+    everyone left).  With an odd count the lowest ranked player without a
+    bye so far sits out.  Returns the pairs and the player with the bye, if
+    any.
+    """
+    order = sorted(range(len(scores)), key=lambda player: (-scores[player], player))
+    bye = None
+    if len(order) % 2:
+        bye = next((player for player in reversed(order) if player not in byes), order[-1])
+        order.remove(bye)
+
+    pairs = []
+    while order:
+        first = order.pop(0)
+        opponent = next((player for player in order if frozenset((first, player)) not in played), order[0])
+        order.remove(opponent)
+        pairs.append((first, opponent))
+    return pairs, bye
+
+
+
+###################################################
+###### Ratings ####################################
+###################################################
+
+def _pair_scores(count, results):
+    # Games & points of every player against every other
+    games = np.zeros((count, count))
+    points = np.zeros((count, count))
+    for (first, second), (wins, draws, losses) in results.items():
+        total = wins + draws + losses
+        games[first, second] += total
+        games[second, first] += total
+        points[first, second] += wins + 0.5 * draws
+        points[second, first] += losses + 0.5 * draws
+    return games, points
+
+
+def elo_ratings(count, results, iterations=50):
+    """Maximum likelihood Elo ratings and standard errors of ``count``
+    players from ``{(i, j): (wins, draws, losses) of i}``."""
+    games, points = _pair_scores(count, results)
+    strengths = np.zeros(count)  # Natural log-odds units, reference at 0
+
+    for _ in range(iterations):
+        expected = 1 / (1 + np.exp(strengths[None, :] - strengths[:, None]))
+        reference = 1 / (1 + np.exp(-strengths))  # One virtual draw (2 half points) each
+        gradient = (points - games * expected).sum(axis=1) + (1 - 2 * reference)
+
+        weights = games * expected * (1 - expected)
+        hessian = weights - np.diag(weights.sum(axis=1) + 2 * reference * (1 - reference))
+        step = np.linalg.solve(hessian, gradient)
+        strengths -= step
+        if np.abs(step).max() < 1e-9:
+            break
+
+    errors = np.sqrt(np.diag(np.linalg.inv(-hessian)))
+    return INITIAL_RATING + ELO_SCALE * strengths, ELO_SCALE * errors
+
+
+def glicko_ratings(count, results):
+    """Glicko-1 ratings and rating deviations after one rating period with
+    every game, from :data:`INITIAL_RATING` and :data:`INITIAL_DEVIATION`."""
+    games, points = _pair_scores(count, results)
+    q = math.log(10) / 400
+    g = 1 / math.sqrt(1 + 3 * q * q * INITIAL_DEVIATION**2 / math.pi**2)
+    expected = 0.5  # Every player starts at the same rating
+
+    played = games.sum(axis=1)
+    inverse_variance = q * q * g * g * expected * (1 - expected) * played
+    precision = 1 / INITIAL_DEVIATION**2 + inverse_variance
+    ratings = INITIAL_RATING + q / precision * g * (points.sum(axis=1) - expected * played)
+    return ratings, np.sqrt(1 / precision)
+
+
+def standings(players, results):
+    """One row per player, best Elo first."""
+    count = len(players)
+    elo, elo_errors = elo_ratings(count, results)
+    glicko, deviations = glicko_ratings(count, results)
+    games, points = _pair_scores(count, results)
+
+    rows = [
+        {
+            "name": player.name,
+            "games": int(games[index].sum()),
+            "points": float(points[index].sum()),
+            "elo": float(elo[index]),
+            "elo_low": float(elo[index] - CONFIDENCE_Z * elo_errors[index]),
+            "elo_high": float(elo[index] + CONFIDENCE_Z * elo_errors[index]),
+            "glicko": float(glicko[index]),
+            "glicko_low": float(glicko[index] - CONFIDENCE_Z * deviations[index]),
+            "glicko_high": float(glicko[index] + CONFIDENCE_Z * deviations[index]),
+        }
+        for index, player in enumerate(players)
+    ]
+    return sorted(rows, key=lambda row: -row["elo"])
+
+
+
+###################################################
+###### Tournament #################################
+###################################################
+
+def run_tournament(
+    paths,
+    pairing="round_robin",
+    games_per_pair=DEFAULT_GAMES_PER_PAIR,
+    rounds=None,
+    seed=0,
+    max_plies=DEFAULT_MAX_PLIES,
+    deterministic=True,
+    opening_plies=DEFAULT_OPENING_PLIES,
+    workers=1,
+    cache_path=DEFAULT_CACHE,
+    start_method=None,
+    log=print,
+):
+    """Plays a tournament between the checkpoints at ``paths`` and returns
+    ``{"standings", "pairs", "games_played", "games_cached", "seconds"}``.
+
+    ``rounds`` is the number of Swiss rounds (``ceil(log2(players))`` by
+    default).  Pairings found in the cache at ``cache_path`` are not
+    replayed; ``None`` disables the cache.
+    """
+    if pairing not in PAIRINGS:
+        raise ValueError(f"Unknown pairing: {pairing!r}. Expected one of {PAIRINGS}.")
+    players = [load_player(path) for path in paths]
+    if len(players) < 2:
+        raise ValueError("A tournament needs at least two checkpoints")
+    if len({player.digest for player in players}) < len(players):
+        raise ValueError("The same checkpoint was entered twice")
+
+    options = {
+        "games": games_per_pair,
+        "seed": seed,
+        "max_plies": max_plies,
+        "deterministic": deterministic,
+        "opening_plies": opening_plies,
+    }
+    config = json.dumps(options, sort_keys=True)
+    cache = ResultCache(cache_path) if cache_path is not None else None
+    results = {}
+    counters = {"games_played": 0, "games_cached": 0}
+    start = time.perf_counter()
+
+    def play(pairs):
+        # Orders each pair by digest so a pairing always plays the same games
+        pairs = [tuple(sorted(pair, key=lambda index: players[index].digest)) for pair in pairs]
+        missing = []
+        for pair in pairs:
+            cached = cache.get(players[pair[0]].digest, players[pair[1]].digest, config) if cache is not None else None
+            if cached is None:
+                missing.append(pair)
+            else:
+                results[pair] = tuple(cached)
+                counters["games_cached"] += sum(cached)
+
+        tasks = [((players[first], players[second]), options) for first, second in missing]
+        if workers <= 1:
+            outcomes = [_match_worker(task) for task in tasks]
+        else:
+            with multiprocessing.get_context(start_method).Pool(min(workers, len(tasks) or 1)) as pool:
+                outcomes = pool.map(_match_worker, tasks)
+
+        for (first, second), outcome in zip(missing, outcomes):
+            results[(first, second)] = outcome
+            counters["games_played"] += sum(outcome)
+            if cache is not None:
+                cache.put(players[first].digest, players[second].digest, config, *outcome)
+            if log is not None:
+                log(f"{players[first].name} vs {players[second].name}: +{outcome[0]} ={outcome[1]} -{outcome[2]}")
+
+    try:
+        if pairing == "round_robin":
+            play(round_robin_pairings(len(players)))
+        else:
+            rounds = rounds or max(1, math.ceil(math.log2(len(players))))
+            scores = [0.0] * len(players)
+            met, byes = set(), []
+            for _ in range(rounds):
+                pairs, bye = swiss_pairings(scores, met, byes)
+                play(pairs)
+                if bye is not None:
+                    byes.append(bye)
+                for pair in pairs:
+                    met.add(frozenset(pair))
+                _, points = _pair_scores(len(players), results)
+                # A bye scores as a won match
+                scores = [points[index].sum() + games_per_pair * byes.count(index) for index in range(len(players))]
+    finally:
+        if cache is not None:
+            cache.close()
+
+    return {
+        "standings": standings(players, results),
+        "pairs": {(players[first].name, players[second].name): outcome for (first, second), outcome in results.items()},
+        **counters,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def format_standings(report):
+    width = max(len(row["name"]) for row in report["standings"])
+    lines = [f"{'player':<{width}}  games  points     elo (95% CI)           glicko (95% CI)"]
+    for row in report["standings"]:
+        lines.append(
+            f"{row['name']:<{width}}  {row['games']:>5}  {row['points']:>6.1f}  "
+            f"{row['elo']:>6.0f} ({row['elo_low']:>5.0f}, {row['elo_high']:>5.0f})  "
+            f"{row['glicko']:>6.0f} ({row['glicko_low']:>5.0f}, {row['glicko_high']:>5.0f})"
+        )
+    lines.append(
+        f"{report['games_played']} games played, {report['games_cached']} from the cache "
+        f"({report['seconds']:.1f}s)"
+    )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rate saved checkpoints against each other.")
+    parser.add_argument("checkpoints", nargs="+", help="Paths of the saved models.")
+    parser.add_argument("--pairing", default="round_robin", choices=PAIRINGS)
+    parser.add_argument("--games", type=int, default=DEFAULT_GAMES_PER_PAIR, help="Games per pairing.")
+    parser.add_argument("--rounds", type=int, default=None, help="Swiss rounds.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-plies", type=int, default=DEFAULT_MAX_PLIES)
+    parser.add_argument("--stochastic", action="store_true", help="Sample actions instead of taking the best one.")
+    parser.add_argument(
+        "--opening-plies", type=int, default=DEFAULT_OPENING_PLIES, help="Random moves opening each pair of games."
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help="SQLite result cache.")
+    args = parser.parse_args(argv)
+
+    report = run_tournament(
+        args.checkpoints,
+        pairing=args.pairing,
+        games_per_pair=args.games,
+        rounds=args.rounds,
+        seed=args.seed,
+        max_plies=args.max_plies,
+        deterministic=not args.stochastic,
+        opening_plies=args.opening_plies,
+        workers=args.workers,
+        cache_path=args.cache,
+    )
+    print(format_standings(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,14 @@
+"""Fixed positions the benchmarks are timed on.
+
+One position per game phase, so costs that grow with the number of pieces or
+legal moves (observations, rewards, masks) show up in the results.
+"""
+
+POSITIONS = {
+    # Ruy Lopez after 3. Bb5, 30 legal moves
+    "opening": "r1bqkbnr/pppp1ppp/2n5/1B2p3/4P3/5N2/PPPP1PPP/RNBQK2R b KQkq - 3 3",
+    # Queen's Gambit structure, both sides castled, 46 legal moves
+    "middlegame": "r2q1rk1/pp2bppp/2n1bn2/3p4/3P4/2NBBN2/PP3PPP/R2Q1RK1 w - - 4 11",
+    # Rook endgame, 21 legal moves
+    "endgame": "8/5pk1/6p1/8/3R4/6PP/r4PK1/8 w - - 0 40",
+}
@@ -0,0 +1,403 @@
+"""Throughput benchmarks for the chess environments.
+
+Times ``ChessEnv`` and ``SimpleChessEnv`` steps and the per-step building
+blocks (``get_observation``, ``compute_reward``, legal actions, ``reset``) on
+the fixed :data:`~benchmarks.positions.POSITIONS` with seeded random play,
+and sweeps the number of envs of the vectorised paths.  Results are written
+as JSON and can be compared against a stored baseline::
+
+    python -m benchmarks.runner --output results.json
+    python -m benchmarks.runner --baseline baseline.json --tolerance 0.1
+
+The second form exits with status 1 when any benchmark is slower than its
+baseline by more than the tolerance.  Baselines are machine specific: record
+one with ``--save-baseline`` on the machine that runs the comparison.
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+import chess
+import numpy as np
+
+try:  # Supports running with `src` on sys.path or importing `src.benchmarks...`
+    from benchmarks.positions import POSITIONS
+    from environment.batch_chess_env import BatchChessEnv
+    from environment.chess_env import ChessEnv
+    from environment.simple_chess_env import SimpleChessEnv
+except ImportError:  # pragma: no cover - import path fallback
+    from src.benchmarks.positions import POSITIONS
+    from src.environment.batch_chess_env import BatchChessEnv
+    from src.environment.chess_env import ChessEnv
+    from src.environment.simple_chess_env import SimpleChessEnv
+
+DEFAULT_SEED = 0
+DEFAULT_TOLERANCE = 0.1  # Allowed slowdown, as a fraction of the baseline
+DEFAULT_REPEAT = 5
+BATCH_SIZES = (1, 16, 256)
+VEC_ENV_SIZES = (1, 4, 8)
+VEC_ENV_BACKENDS = ("dummy", "shm")
+EVALUATION_BATCH_SIZES = (1, 4, 16, 64)  # Games advanced in lockstep
+MCTS_BATCH_SIZES = (1, 8, 32)  # Leaves per forward pass
+MCTS_SIMULATIONS = 256
+
+
+###################################################
+###### Timing #####################################
+###################################################
+
+def measure(func, number, repeat=DEFAULT_REPEAT, ops_per_call=1, self_timed=False):
+    """Times ``number`` calls of ``func``, ``repeat`` times.
+
+    With ``self_timed`` ``func`` returns the seconds to count for one call,
+    which keeps set-up work such as picking a random move out of the timing.
+    ``ops_per_call`` scales the rate for batched calls.
+    """
+    runs = []
+    for _ in range(repeat):
+        elapsed = 0.0
+        for _ in range(number):
+            if self_timed:
+                elapsed += func()
+            else:
+                start = time.perf_counter()
+                func()
+                elapsed += time.perf_counter() - start
+        runs.append(elapsed / number)
+
+    best = min(runs)
+    return {
+        "number": number,
+        "repeat": repeat,
+        "best_us": best * 1e6,
+        "median_us": statistics.median(runs) * 1e6,
+        "ops_per_sec": ops_per_call / best if best > 0 else float("inf"),
+    }
+
+
+def _load(env, fen):
+    env.board.set_fen(fen)
+    env.current_player = env.board.turn
+    env.illegal_moves_count = 0
+    env.sync_board()
+
+
+###################################################
+###### ChessEnv ###################################
+###################################################
+
+def bench_chess_env(number, repeat, seed):
+    results = {}
+    rng = random.Random(seed)
+    env = ChessEnv(info_level="minimal")
+
+    for phase, fen in POSITIONS.items():
+        _load(env, fen)
+        results[f"chess_env.get_observation[{phase}]"] = measure(env.get_observation, number, repeat)
+        results[f"chess_env.action_masks[{phase}]"] = measure(env.action_masks, number, repeat)
+
+        # The reward after the first legal move, with the scores step() saves
+        move = sorted(env.board.legal_moves, key=lambda move: move.uci())[0]
+        captured_piece = env.board.piece_at(move.to_square)
+        previous_scores = env.evaluator.scores(not env.current_player)
+        env._push(move)
+        env.current_player = not env.current_player
+        results[f"chess_env.compute_reward[{phase}]"] = measure(
+            lambda: env.compute_reward(move, captured_piece=captured_piece, previous_scores=previous_scores),
+            number,
+            repeat,
+        )
+
+        _load(env, fen)
+
+        def step():
+            legal = [env.move_to_action[move] for move in env.board.legal_moves if move in env.move_to_action]
+            if not legal:  # Only moves the action codec cannot encode are left
+                _load(env, fen)
+                legal = [env.move_to_action[move] for move in env.board.legal_moves]
+            action = rng.choice(legal)
+            start = time.perf_counter()
+            _, _, done, _, _ = env.step(action)
+            elapsed = time.perf_counter() - start
+            if done:
+                _load(env, fen)
+            return elapsed
+
+        results[f"chess_env.step[{phase}]"] = measure(step, number, repeat, self_timed=True)
+
+    env.reset(seed=seed)
+    results["chess_env.reset"] = measure(lambda: env.reset(), number, repeat)
+    return results
+
+
+###################################################
+###### SimpleChessEnv #############################
+###################################################
+
+def bench_simple_chess_env(number, repeat, seed):
+    results = {}
+    rng = random.Random(seed)
+    env = SimpleChessEnv(info_level="minimal")
+    env.reset(seed=seed)
+
+    results["simple_chess_env.legal_actions"] = measure(env.legal_actions, number, repeat)
+    results["simple_chess_env.get_observation"] = measure(env.get_observation, number, repeat)
+    results["simple_chess_env.reset"] = measure(lambda: env.reset(), number, repeat)
+
+    env.reset(seed=seed)
+
+    def step():
+        action = rng.choice(env.legal_actions())
+        start = time.perf_counter()
+        _, _, terminated, truncated, _ = env.step(action)
+        elapsed = time.perf_counter() - start
+        if terminated or truncated:
+            env.reset()
+        return elapsed
+
+    results["simple_chess_env.step"] = measure(step, number, repeat, self_timed=True)
+    return results
+
+
+###################################################
+###### Vectorised paths ###########################
+###################################################
+
+def bench_batch_chess_env(number, repeat, seed, sizes=BATCH_SIZES):
+    results = {}
+    rng = np.random.default_rng(seed)
+
+    for num_envs in sizes:
+        env = BatchChessEnv(num_envs=num_envs, autoreset=True)
+        env.reset(seed=seed)
+
+        def step():
+            # One random legal action per board, from the cached masks
+            masks = env.action_masks()
+            scores = rng.random(masks.shape) * masks
+            actions = scores.argmax(axis=1)
+            start = time.perf_counter()
+            env.step(actions)
+            return time.perf_counter() - start
+
+        results[f"batch_chess_env.step[n={num_envs}]"] = measure(
+            step, number, repeat, ops_per_call=num_envs, self_timed=True
+        )
+        env.close()
+
+    return results
+
+
+def bench_vec_env(number, repeat, seed, backends=VEC_ENV_BACKENDS, sizes=VEC_ENV_SIZES):
+    # Imported here so the environment benchmarks run without Stable-Baselines3
+    try:
+        from agents.ppo_agent import FULL_GAME, make_env
+    except ImportError:  # pragma: no cover - import path fallback
+        from src.agents.ppo_agent import FULL_GAME, make_env
+
+    results = {}
+    rng = np.random.default_rng(seed)
+
+    for backend in backends:
+        for n_envs in sizes:
+            env = make_env(stage=FULL_GAME, n_envs=n_envs, backend=backend, seed=seed)
+            env.reset()
+
+            def step():
+                masks = np.stack(env.env_method("action_masks"))
+                actions = (rng.random(masks.shape) * masks).argmax(axis=1)
+                start = time.perf_counter()
+                env.step(actions)
+                return time.perf_counter() - start
+
+            results[f"vec_env.{backend}.step[n={n_envs}]"] = measure(
+                step, number, repeat, ops_per_call=n_envs, self_timed=True
+            )
+            env.close()
+
+    return results
+
+
+def bench_evaluation(number, repeat, seed, sizes=EVALUATION_BATCH_SIZES):
+    # Imported here so the environment benchmarks run without Stable-Baselines3
+    try:
+        from agents.evaluate import LockstepRunner
+        from agents.ppo_agent import FULL_GAME, create_model
+    except ImportError:  # pragma: no cover - import path fallback
+        from src.agents.evaluate import LockstepRunner
+        from src.agents.ppo_agent import FULL_GAME, create_model
+
+    import torch
+
+    torch.set_num_threads(1)
+    model = create_model(stage=FULL_GAME, tensorboard_log=None, seed=seed)
+    model.env.close()
+    results = {}
+
+    for batch_size in sizes:
+        # Enough games to keep every slot busy; the untrained policy mostly
+        # ends games by repeating illegal moves, so they are short
+        runner = LockstepRunner(model, seed=seed, opponent="random", batch_size=batch_size, max_plies=40)
+
+        def run():
+            predictions, inference = runner.predictions, runner.inference_seconds
+            runner.run(range(batch_size * 4))
+            return (runner.inference_seconds - inference) / (runner.predictions - predictions)
+
+        results[f"evaluation.predict[k={batch_size}]"] = measure(run, max(1, number // 100), repeat, self_timed=True)
+
+    return results
+
+
+def bench_mcts(number, repeat, seed, sizes=MCTS_BATCH_SIZES, simulations=MCTS_SIMULATIONS):
+    # Imported here so the environment benchmarks run without Stable-Baselines3
+    try:
+        from agents.mcts import MCTS
+        from agents.ppo_agent import FULL_GAME, create_model
+    except ImportError:  # pragma: no cover - import path fallback
+        from src.agents.mcts import MCTS
+        from src.agents.ppo_agent import FULL_GAME, create_model
+
+    import torch
+
+    torch.set_num_threads(1)
+    model = create_model(stage=FULL_GAME, tensorboard_log=None, seed=seed)
+    model.env.close()
+    board = chess.Board(POSITIONS["middlegame"])
+    results = {}
+
+    for batch_size in sizes:
+        # Fresh trees: reuse would turn repeated searches of one position into no work
+        search = MCTS(model.policy, simulations=simulations, batch_size=batch_size, reuse=False)
+        # ops_per_sec is nodes per second
+        results[f"mcts.search[k={batch_size}]"] = measure(
+            lambda: search.search(board), max(1, number // 100), repeat, ops_per_call=simulations
+        )
+
+    return results
+
+
+# Benchmark groups, selectable with --only. The vec_env, evaluation and mcts
+# groups need Stable-Baselines3 and are opt-in.
+BENCHMARKS = {
+    "chess_env": bench_chess_env,
+    "simple_chess_env": bench_simple_chess_env,
+    "batch_chess_env": bench_batch_chess_env,
+    "vec_env": bench_vec_env,
+    "evaluation": bench_evaluation,
+    "mcts": bench_mcts,
+}
+DEFAULT_BENCHMARKS = ("chess_env", "simple_chess_env", "batch_chess_env")
+
+
+###################################################
+###### Results ####################################
+###################################################
+
+def run_benchmarks(names=DEFAULT_BENCHMARKS, number=200, repeat=DEFAULT_REPEAT, seed=DEFAULT_SEED):
+    """Runs the benchmark groups in ``names`` and returns the results document."""
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {sorted(unknown)}. Expected some of {tuple(BENCHMARKS)}.")
+
+    results = {}
+    for name in names:
+        results.update(BENCHMARKS[name](number, repeat, seed))
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "chess": chess.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "number": number,
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def save_results(document, path):
+    with open(path, "w") as handle:
+        json.dump(document, handle, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def compare(document, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Benchmarks of ``document`` slower than ``baseline`` beyond ``tolerance``.
+
+    Both arguments are results documents. Only benchmarks present in both are
+    compared. Returns one dict per regression with both rates and the change
+    as a fraction (``-0.25`` is 25% slower).
+    """
+    regressions = []
+    current, previous = document["results"], baseline["results"]
+
+    for name in sorted(set(current) & set(previous)):
+        rate, baseline_rate = current[name]["ops_per_sec"], previous[name]["ops_per_sec"]
+        change = rate / baseline_rate - 1
+        if change < -tolerance:
+            regressions.append({
+                "name": name,
+                "ops_per_sec": rate,
+                "baseline_ops_per_sec": baseline_rate,
+                "change": change,
+            })
+
+    return regressions
+
+
+def format_results(document):
+    lines = [f"{'benchmark':<45} {'ops/s':>12} {'best us':>10}"]
+    for name, result in sorted(document["results"].items()):
+        lines.append(f"{name:<45} {result['ops_per_sec']:>12,.0f} {result['best_us']:>10.2f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chess environment throughput benchmarks.")
+    parser.add_argument("--only", nargs="+", default=list(DEFAULT_BENCHMARKS), choices=sorted(BENCHMARKS))
+    parser.add_argument("--number", type=int, default=200, help="Calls per timing run.")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timing runs; the best one is kept.")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", help="Write the results as JSON to this path.")
+    parser.add_argument("--baseline", help="Compare against the results stored at this path.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--save-baseline", help="Also store the results as a baseline at this path.")
+    args = parser.parse_args(argv)
+
+    document = run_benchmarks(args.only, number=args.number, repeat=args.repeat, seed=args.seed)
+    print(format_results(document))
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            save_results(document, path)
+
+    if args.baseline:
+        regressions = compare(document, load_results(args.baseline), args.tolerance)
+        for regression in regressions:
+            print(
+                f"REGRESSION {regression['name']}: {regression['ops_per_sec']:,.0f} ops/s vs "
+                f"{regression['baseline_ops_per_sec']:,.0f} baseline ({regression['change']:+.1%})"
+            )
+        if regressions:
+            return 1
+        print(f"No regression beyond {args.tolerance:.0%} of the baseline.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""Shared mapping between chess moves and discrete action ids.
+
+Every environment uses the same 4160 action ids: ``from_square * 64 +
+to_square`` for the first 4096 ids, followed by four promotions (queen,
+rook, bishop, knight) per file for each colour.  The tables are built once
+per process in :data:`ACTION_CODEC` and are read-only, so environments share
+them instead of rebuilding thousands of ``chess.Move`` objects on every
+construction.
+"""
+
+from types import MappingProxyType
+
+import chess
+import numpy as np
+
+BOARD_SQUARES = 64
+PLAIN_ACTIONS = BOARD_SQUARES * BOARD_SQUARES
+PROMOTION_PIECES = (chess.QUEEN, chess.ROOK, chess.BISHOP, chess.KNIGHT)
+
+# (from rank, to rank) of the promotion block of each colour, in id order.
+PROMOTION_RANKS = ((6, 7), (0, 1))
+
+ACTION_SIZE = PLAIN_ACTIONS + len(PROMOTION_RANKS) * 8 * len(PROMOTION_PIECES)
+
+
+def _read_only(array):
+    array.setflags(write=False)
+    return array
+
+
+class ActionCodec:
+    """Immutable action id tables with scalar and vectorised lookups.
+
+    ``from_squares``, ``to_squares`` and ``promotions`` hold one entry per
+    action id (``promotions`` is ``0`` for non-promotion moves).
+    """
+
+    __slots__ = (
+        "size",
+        "moves",
+        "move_to_action",
+        "action_to_move",
+        "from_squares",
+        "to_squares",
+        "promotions",
+        "promotion_base",
+        "_promotion_offset",
+    )
+
+    def __init__(self):
+        from_squares = list(np.repeat(np.arange(BOARD_SQUARES), BOARD_SQUARES))
+        to_squares = list(np.tile(np.arange(BOARD_SQUARES), BOARD_SQUARES))
+        promotions = [0] * PLAIN_ACTIONS
+
+        for from_rank, to_rank in PROMOTION_RANKS:
+            for file in range(8):
+                for promotion in PROMOTION_PIECES:
+                    from_squares.append(chess.square(file, from_rank))
+                    to_squares.append(chess.square(file, to_rank))
+                    promotions.append(promotion)
+
+        moves = tuple(
+            chess.Move(int(from_square), int(to_square), promotion=promotion or None)
+            for from_square, to_square, promotion in zip(from_squares, to_squares, promotions)
+        )
+
+        # First promotion id of every (from, to) pair, or -1 if it has none.
+        promotion_base = np.full(PLAIN_ACTIONS, -1, dtype=np.int64)
+        for action in range(PLAIN_ACTIONS, ACTION_SIZE, len(PROMOTION_PIECES)):
+            promotion_base[from_squares[action] * BOARD_SQUARES + to_squares[action]] = action
+
+        # Offset of each promotion piece inside its block of four ids.
+        promotion_offset = np.full(chess.KING + 1, -1, dtype=np.int64)
+        promotion_offset[list(PROMOTION_PIECES)] = np.arange(len(PROMOTION_PIECES))
+
+        setter = super().__setattr__
+        setter("size", ACTION_SIZE)
+        setter("moves", moves)
+        setter("move_to_action", MappingProxyType({move: action for action, move in enumerate(moves)}))
+        setter("action_to_move", MappingProxyType(dict(enumerate(moves))))
+        setter("from_squares", _read_only(np.array(from_squares, dtype=np.int64)))
+        setter("to_squares", _read_only(np.array(to_squares, dtype=np.int64)))
+        setter("promotions", _read_only(np.array(promotions, dtype=np.int64)))
+        setter("promotion_base", _read_only(promotion_base))
+        setter("_promotion_offset", _read_only(promotion_offset))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ActionCodec is immutable")
+
+    def __len__(self):
+        return self.size
+
+    ###################################################
+    ###### Scalar lookups #############################
+    ###################################################
+
+    def encode(self, move):
+        """Action id of a ``chess.Move``."""
+        try:
+            return self.move_to_action[move]
+        except KeyError:
+            raise ValueError(f"Move {move} has no action index") from None
+
+    def decode(self, action):
+        """``chess.Move`` of an action id."""
+        action = int(action)
+        if not 0 <= action < self.size:
+            raise ValueError(f"Invalid action index: {action}")
+        return self.moves[action]
+
+    ###################################################
+    ###### Vectorised lookups #########################
+    ###################################################
+
+    def encode_batch(self, from_squares, to_squares, promotions=None):
+        """Action ids of many moves at once; unencodable moves map to ``-1``."""
+        from_squares = np.asarray(from_squares, dtype=np.int64)
+        to_squares = np.asarray(to_squares, dtype=np.int64)
+        plain = from_squares * BOARD_SQUARES + to_squares
+
+        if promotions is None:
+            return plain
+
+        promotions = np.asarray(promotions, dtype=np.int64)
+        base = self.promotion_base[plain]
+        offset = self._promotion_offset[np.clip(promotions, 0, chess.KING)]
+        promoted = np.where((base >= 0) & (offset >= 0), base + offset, -1)
+        return np.where(promotions > 0, promoted, plain)
+
+    def legal_mask(self, board):
+        """Boolean mask of the legal moves of a ``chess.Board`` that have an
+        action id. May be all False."""
+        from_squares, to_squares, promotions = [], [], []
+
+        for move in board.legal_moves:
+            from_squares.append(move.from_square)
+            to_squares.append(move.to_square)
+            promotions.append(move.promotion or 0)
+
+        actions = self.encode_batch(from_squares, to_squares, promotions)
+        mask = np.zeros(self.size, dtype=bool)
+        mask[actions[actions >= 0]] = True  # Drops legal moves the codec cannot encode
+        return mask
+
+    def decode_batch(self, actions):
+        """``(from_squares, to_squares, promotions)`` arrays of many action ids."""
+        actions = np.asarray(actions, dtype=np.int64)
+        if np.any((actions < 0) | (actions >= self.size)):
+            raise ValueError(f"Invalid action index in {actions[(actions < 0) | (actions >= self.size)]}")
+        return self.from_squares[actions], self.to_squares[actions], self.promotions[actions]
+
+
+# Built once per process and shared by every environment.
+ACTION_CODEC = ActionCodec()
@@ -0,0 +1,541 @@
+"""Batched chess environment backed by NumPy bitboards.
+
+:class:`environment.chess_env.ChessEnv` steps one ``chess.Board`` per Python
+object, so a rollout over many environments pays for move generation,
+legality checks and observation encoding once per board.
+:class:`BatchChessEnv` keeps ``num_envs`` positions as ``uint64`` bitboard
+arrays and performs those operations for every board in a handful of
+vectorised NumPy calls.
+
+The action encoding (4160 ids), the 8x8 ``int8`` observation and the reward
+terms follow ``ChessEnv.step`` so policies move between the two environments
+unchanged.  Like ``ChessEnv`` every board plays both colours and
+``current_player`` flips after each legal move.
+"""
+
+import chess
+import gymnasium as gym
+import numpy as np
+from gymnasium.utils import seeding
+
+from .action_codec import ACTION_CODEC, ACTION_SIZE
+from .bitboards import (
+    DARK_SQUARES,
+    EMPTY,
+    FILE_MASKS,
+    LIGHT_SQUARES,
+    RANK_1,
+    RANK_3,
+    RANK_6,
+    RANK_8,
+    SQUARE_MASKS,
+    bishop_attacks,
+    is_attacked,
+    king_attacks,
+    knight_attacks,
+    lsb,
+    pawn_attacks,
+    pawn_pushes,
+    popcount,
+    rook_attacks,
+    unpack_bitboards,
+)
+from .observation import PLANE_COUNT, board_from_bitboards, planes_from_bitboards, validate_observation_mode
+from .zobrist import ZOBRIST_CASTLING, ZOBRIST_EP, ZOBRIST_PIECES, ZOBRIST_TURN
+
+# Piece type indices into the last axis of ``pieces`` (python-chess type - 1).
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+# Colour indices into the second axis of ``pieces`` (python-chess colours).
+BLACK, WHITE = 0, 1
+
+# Values of ``info["outcome"]``.
+ONGOING, WHITE_WINS, BLACK_WINS, DRAW = range(4)
+
+ILLEGAL_MOVE_PENALTY = -0.1
+TOO_MANY_ILLEGAL_MOVES_PENALTY = -1
+DRAW_REWARD = 0.5
+CHECK_REWARD = 0.5
+
+# Same values and normalisation as the ChessEnv reward helpers.
+CAPTURE_VALUES = np.array([0.1, 0.3, 0.3, 0.5, 0.9, 0.0])
+MATERIAL_VALUES = np.array([1, 3, 3, 5, 9, 0])
+MAX_MATERIAL = 39
+CENTRAL_SQUARES = np.uint64(
+    (chess.BB_FILE_C | chess.BB_FILE_D | chess.BB_FILE_E | chess.BB_FILE_F)
+    & (chess.BB_RANK_3 | chess.BB_RANK_4 | chess.BB_RANK_5 | chess.BB_RANK_6)
+)
+
+# Longest reversible stretch before the seventy-five move rule ends the game.
+HISTORY_SIZE = 152
+SEVENTYFIVE_MOVE_PLIES = 150
+FIVEFOLD = 5
+
+
+class BatchChessEnv(gym.vector.VectorEnv):
+    """``num_envs`` independent games of ``ChessEnv`` stepped together."""
+
+    metadata = {'render_modes': [], 'autoreset_mode': 'SameStep'}
+
+    def __init__(self, num_envs, autoreset=False, observation_mode="board"):
+        if num_envs < 1:
+            raise ValueError(f"num_envs must be positive, got {num_envs}")
+
+        self.num_envs = num_envs
+        self.autoreset = autoreset
+        self.observation_mode = validate_observation_mode(observation_mode)
+
+        if self.observation_mode == "planes":
+            self.single_observation_space = gym.spaces.Box(low=0, high=1, shape=(PLANE_COUNT, 8, 8), dtype=np.int8)
+        else:
+            self.single_observation_space = gym.spaces.Box(low=-6, high=6, shape=(8, 8), dtype=np.int8)
+        self.single_action_space = gym.spaces.Discrete(ACTION_SIZE)
+        self.observation_space = gym.vector.utils.batch_space(self.single_observation_space, num_envs)
+        self.action_space = gym.spaces.MultiDiscrete(np.full(num_envs, ACTION_SIZE))
+
+        # Position state, one row per board
+        self.pieces = np.zeros((num_envs, 2, 6), dtype=np.uint64)  # [board, colour, piece type]
+        self.turn = np.ones(num_envs, dtype=bool)  # True for White
+        self.castling = np.zeros(num_envs, dtype=np.uint64)  # python-chess castling_rights
+        self.ep_square = np.full(num_envs, -1, dtype=np.int64)
+        self.halfmove_clock = np.zeros(num_envs, dtype=np.int64)
+        self.fullmove_number = np.ones(num_envs, dtype=np.int64)
+
+        # Episode state mirroring ChessEnv
+        self.current_player = np.ones(num_envs, dtype=bool)
+        self.illegal_moves_count = np.zeros(num_envs, dtype=np.int64)
+
+        # Cached analysis of the current positions
+        self._legal_mask = np.zeros((num_envs, ACTION_SIZE), dtype=bool)
+        self._legal_count = np.zeros(num_envs, dtype=np.int64)
+        self._in_check = np.zeros(num_envs, dtype=bool)
+        self._has_legal_ep = np.zeros(num_envs, dtype=bool)
+
+        # Position hashes since the last irreversible move (repetition detection)
+        self._history = np.zeros((num_envs, HISTORY_SIZE), dtype=np.uint64)
+        self._history_length = np.zeros(num_envs, dtype=np.int64)
+
+        start = chess.Board()
+        self._start_pieces = np.array(
+            [[start.pieces_mask(piece_type, color) for piece_type in chess.PIECE_TYPES] for color in (chess.BLACK, chess.WHITE)],
+            dtype=np.uint64,
+        )
+        self._start_castling = np.uint64(start.castling_rights)
+
+        self._reset_boards(np.arange(num_envs))
+
+    ###################################################
+    ###### Gymnasium API ##############################
+    ###################################################
+
+    def reset(self, *, seed=None, options=None):
+        if seed is not None:
+            self._np_random, self._np_random_seed = seeding.np_random(seed)
+
+        self._reset_boards(np.arange(self.num_envs))
+        return self.get_observation(), {}
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs)
+        if np.any((actions < 0) | (actions >= ACTION_SIZE)):
+            raise ValueError(f"Invalid action index in {actions[(actions < 0) | (actions >= ACTION_SIZE)]}")
+
+        boards = np.arange(self.num_envs)
+        rewards = np.zeros(self.num_envs)
+        terminated = np.zeros(self.num_envs, dtype=bool)
+        outcome = np.full(self.num_envs, ONGOING, dtype=np.int8)
+        reported_illegal = self.illegal_moves_count.copy()
+
+        # Same order of checks as ChessEnv.step
+        no_legal = self._legal_count == 0
+        drawn = (no_legal & ~self._in_check) | self._insufficient_material(boards)
+        rewards[drawn] = DRAW_REWARD
+        terminated[drawn] = True
+        outcome[drawn] = DRAW
+
+        threshold = np.maximum(5, self.fullmove_number // 2)
+        exhausted = ~drawn & (self.illegal_moves_count > threshold)
+        rewards[exhausted] = TOO_MANY_ILLEGAL_MOVES_PENALTY
+        terminated[exhausted] = True
+
+        pending = ~drawn & ~exhausted
+        legal = pending & self._legal_mask[boards, actions]
+        illegal = pending & ~legal
+        rewards[illegal] = ILLEGAL_MOVE_PENALTY
+        self.illegal_moves_count[illegal] += 1
+
+        moved = np.flatnonzero(legal)
+        if len(moved):
+            rewards[moved], terminated[moved], outcome[moved] = self._play(moved, actions[moved])
+            reported_illegal[moved] = self.illegal_moves_count[moved]
+
+        observation = self.get_observation()
+        info = {
+            "illegal_moves": reported_illegal,
+            "total_moves_made": self.fullmove_number.copy(),
+            "in_check": self._in_check.copy(),
+            "illegal_move": illegal,
+            "outcome": outcome,
+        }
+
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        if self.autoreset and np.any(terminated):
+            info["final_observation"] = observation
+            self._reset_boards(np.flatnonzero(terminated))
+            observation = self.get_observation()
+
+        return observation, rewards, terminated, truncated, info
+
+    def action_masks(self):
+        """``(num_envs, 4160)`` legal action masks, as ``ChessEnv.action_masks``."""
+        masks = self._legal_mask.copy()
+        masks[~masks.any(axis=1)] = True  # Keep every action distribution valid
+        return masks
+
+    def get_observation(self):
+        """Every board encoded as ``ChessEnv.get_observation`` would."""
+        pieces = self.pieces[:, ::-1].reshape(self.num_envs, 12)  # White pieces first
+
+        if self.observation_mode == "planes":
+            return planes_from_bitboards(pieces, self.turn, self.castling, self.ep_square)
+
+        return board_from_bitboards(pieces)
+
+    ###################################################
+    ###### Board state helpers ########################
+    ###################################################
+
+    def _reset_boards(self, boards):
+        self.pieces[boards] = self._start_pieces
+        self.turn[boards] = True
+        self.castling[boards] = self._start_castling
+        self.ep_square[boards] = -1
+        self.halfmove_clock[boards] = 0
+        self.fullmove_number[boards] = 1
+        self.current_player[boards] = True
+        self.illegal_moves_count[boards] = 0
+
+        self._analyse(boards)
+        self._history_length[boards] = 0
+        self._record_position(boards)
+
+    def _sides(self, boards):
+        rows = np.arange(len(boards))
+        white = self.turn[boards]
+        us = white.astype(np.intp)
+        pieces = self.pieces[boards]
+        return white, pieces[rows, us], pieces[rows, 1 - us]
+
+    def _analyse(self, boards):
+        """Legal action mask, legal move count, check and en passant flags."""
+        n = len(boards)
+        white, own, opponent = self._sides(boards)
+        own_occupied = np.bitwise_or.reduce(own, axis=1)
+        opponent_occupied = np.bitwise_or.reduce(opponent, axis=1)
+        occupied = own_occupied | opponent_occupied
+        ep_square = self.ep_square[boards]
+        ep_mask = np.where(ep_square >= 0, SQUARE_MASKS[np.maximum(ep_square, 0)], EMPTY)
+
+        self._in_check[boards] = is_attacked(own[:, KING], occupied, opponent, white)
+
+        # Pseudo-legal targets, one row per (board, piece)
+        board_of, piece_type, from_square = np.nonzero(unpack_bitboards(own).reshape(n, 6, 64))
+        from_mask = SQUARE_MASKS[from_square]
+        piece_white = white[board_of]
+        targets = np.zeros(len(from_square), dtype=np.uint64)
+
+        for kind in range(6):
+            selected = piece_type == kind
+            source = from_mask[selected]
+            source_board = board_of[selected]
+            blocked = occupied[source_board]
+
+            if kind == PAWN:
+                side = piece_white[selected]
+                empty = ~blocked
+                single = pawn_pushes(source, side) & empty
+                double = pawn_pushes(single & np.where(side, RANK_3, RANK_6), side) & empty
+                captures = pawn_attacks(source, side) & (opponent_occupied[source_board] | ep_mask[source_board])
+                targets[selected] = single | double | captures
+                continue
+
+            if kind == KNIGHT:
+                attacks = knight_attacks(source)
+            elif kind == BISHOP:
+                attacks = bishop_attacks(source, blocked)
+            elif kind == ROOK:
+                attacks = rook_attacks(source, blocked)
+            elif kind == QUEEN:
+                attacks = bishop_attacks(source, blocked) | rook_attacks(source, blocked)
+            else:
+                attacks = king_attacks(source)
+            targets[selected] = attacks & ~own_occupied[source_board]
+
+        row, to_square = np.nonzero(unpack_bitboards(targets).reshape(-1, 64))
+        move_board = board_of[row]
+        move_type = piece_type[row]
+        move_from = from_square[row]
+        move_white = white[move_board]
+        from_mask = SQUARE_MASKS[move_from]
+        to_mask = SQUARE_MASKS[to_square]
+
+        # Make every pseudo-legal move and keep those that leave the king safe
+        moves = np.arange(len(row))
+        own_after = own[move_board]
+        opponent_after = opponent[move_board] & ~to_mask[:, None]
+        en_passant = (move_type == PAWN) & (to_square == ep_square[move_board])
+        captured = np.where(move_white, to_square - 8, to_square + 8)[en_passant]
+        opponent_after[en_passant, PAWN] &= ~SQUARE_MASKS[captured]
+        own_after[moves, move_type] = (own_after[moves, move_type] & ~from_mask) | to_mask
+        occupied_after = np.bitwise_or.reduce(own_after, axis=1) | np.bitwise_or.reduce(opponent_after, axis=1)
+        safe = ~is_attacked(own_after[:, KING], occupied_after, opponent_after, move_white)
+
+        move_board = move_board[safe]
+        move_type = move_type[safe]
+        move_from = move_from[safe]
+        to_square = to_square[safe]
+
+        mask = np.zeros((n, ACTION_SIZE), dtype=bool)
+        last_rank = np.where(white[move_board], to_square >= 56, to_square < 8)
+        promoting = (move_type == PAWN) & last_rank
+        plain = ~promoting
+        mask[move_board[plain], move_from[plain] * 64 + to_square[plain]] = True
+
+        promotion_base = ACTION_CODEC.promotion_base[move_from[promoting] * 64 + to_square[promoting]]
+        encodable = promotion_base >= 0
+        for offset in range(4):
+            mask[move_board[promoting][encodable], promotion_base[encodable] + offset] = True
+
+        castles = self._castling_moves(boards, white, own, opponent, occupied)
+        castle_count = np.zeros(n, dtype=np.int64)
+        for castle_rows, king_from, king_to, rook_square in castles:
+            # python-chess accepts both the e1g1 and the king-takes-rook e1h1 form
+            mask[castle_rows, king_from * 64 + king_to] = True
+            mask[castle_rows, king_from * 64 + rook_square] = True
+            castle_count[castle_rows] += 1
+
+        self._legal_mask[boards] = mask
+        self._legal_count[boards] = np.bincount(move_board, minlength=n) + castle_count
+        self._has_legal_ep[boards] = np.bincount(
+            move_board, weights=(move_type == PAWN) & (to_square == ep_square[move_board]), minlength=n
+        ) > 0
+
+    def _castling_moves(self, boards, white, own, opponent, occupied):
+        """Yields ``(rows, king_from, king_to, rook_square)`` for each castling side."""
+        base = np.where(white, 0, 56)  # First square of the back rank
+        king = own[:, KING]
+        castling = self.castling[boards]
+        in_check = self._in_check[boards]
+
+        # (rook file, king destination file, rook destination file, squares that must be empty)
+        for rook_file, king_to_file, rook_to_file, empty_files in ((7, 6, 5, (5, 6)), (0, 2, 3, (1, 2, 3))):
+            rook_square = base + rook_file
+            rook = SQUARE_MASKS[rook_square]
+            king_from_mask = SQUARE_MASKS[base + 4]
+            king_to_mask = SQUARE_MASKS[base + king_to_file]
+            rook_to_mask = SQUARE_MASKS[base + rook_to_file]
+            between = np.zeros(len(boards), dtype=np.uint64)
+            for file in empty_files:
+                between |= SQUARE_MASKS[base + file]
+            path = SQUARE_MASKS[base + (5 if rook_file == 7 else 3)]
+
+            possible = (
+                ((castling & rook) != EMPTY)
+                & (king == king_from_mask)
+                & ((own[:, ROOK] & rook) != EMPTY)
+                & ~in_check
+                & (((occupied ^ king ^ rook) & between) == EMPTY)
+            )
+            possible &= ~is_attacked(path, occupied ^ king, opponent, white)
+            possible &= ~is_attacked(king_to_mask, occupied ^ king ^ rook ^ rook_to_mask, opponent, white)
+
+            rows = np.flatnonzero(possible)
+            yield rows, (base + 4)[rows], (base + king_to_file)[rows], rook_square[rows]
+
+    def _insufficient_material(self, boards):
+        """Vectorised ``chess.Board.is_insufficient_material``."""
+        pieces = self.pieces[boards]
+        occupied = np.bitwise_or.reduce(pieces, axis=2)  # [board, colour]
+        every = np.bitwise_or.reduce(pieces, axis=1)  # [board, type]
+        pawns, knights, bishops = every[:, PAWN], every[:, KNIGHT], every[:, BISHOP]
+        heavy = pawns | every[:, ROOK] | every[:, QUEEN]
+        same_colour_bishops = ((bishops & DARK_SQUARES) == EMPTY) | ((bishops & LIGHT_SQUARES) == EMPTY)
+
+        insufficient = np.ones(len(boards), dtype=bool)
+        for color in (BLACK, WHITE):
+            mine = occupied[:, color]
+            theirs = occupied[:, 1 - color]
+            knight_case = (popcount(mine) <= 2) & ((theirs & ~every[:, KING] & ~every[:, QUEEN]) == EMPTY)
+            bishop_case = same_colour_bishops & (pawns == EMPTY) & (knights == EMPTY)
+            color_insufficient = np.where(
+                (mine & heavy) != EMPTY,
+                False,
+                np.where(
+                    (mine & knights) != EMPTY,
+                    knight_case,
+                    np.where((mine & bishops) != EMPTY, bishop_case, True),
+                ),
+            )
+            insufficient &= color_insufficient
+
+        return insufficient
+
+    def _position_hash(self, boards):
+        pieces = unpack_bitboards(self.pieces[boards]).reshape(len(boards), 768).astype(bool)
+        castling = unpack_bitboards(self.castling[boards]).reshape(len(boards), 64).astype(bool)
+        ep_square = np.maximum(self.ep_square[boards], 0)
+
+        key = np.bitwise_xor.reduce(np.where(pieces, ZOBRIST_PIECES, EMPTY), axis=1)
+        key ^= np.bitwise_xor.reduce(np.where(castling, ZOBRIST_CASTLING, EMPTY), axis=1)
+        key ^= np.where(self._has_legal_ep[boards], ZOBRIST_EP[ep_square], EMPTY)
+        key ^= np.where(self.turn[boards], ZOBRIST_TURN, EMPTY)
+        return key
+
+    def _record_position(self, boards):
+        """Appends the current positions to the repetition history."""
+        key = self._position_hash(boards)
+        slot = np.minimum(self._history_length[boards], HISTORY_SIZE - 1)
+        self._history[boards, slot] = key
+        self._history_length[boards] = slot + 1
+
+        recorded = np.arange(HISTORY_SIZE) < self._history_length[boards][:, None]
+        return ((self._history[boards] == key[:, None]) & recorded).sum(axis=1)
+
+    ###################################################
+    ###### Reward helpers #############################
+    ###################################################
+
+    def _position_scores(self, boards, color):
+        """Material balance + central control + king safety from ``color``'s side."""
+        rows = np.arange(len(boards))
+        us = color.astype(np.intp)
+        pieces = self.pieces[boards]
+        own = pieces[rows, us]
+        opponent = pieces[rows, 1 - us]
+
+        material = (popcount(own) @ MATERIAL_VALUES - popcount(opponent) @ MATERIAL_VALUES) / MAX_MATERIAL
+        central = 0.1 * popcount(np.bitwise_or.reduce(own, axis=1) & CENTRAL_SQUARES)
+
+        king = own[:, KING]
+        has_king = king != EMPTY
+        king_square = np.where(has_king, lsb(king), 0)
+        king_file = king_square % 8
+        king_rank = king_square // 8
+        pawn_on_file = (own[:, PAWN] & FILE_MASKS[king_file]) != EMPTY
+
+        shield_rank = np.where(color, king_rank + 1, king_rank - 1)
+        all_pawns = pieces[:, WHITE, PAWN] | pieces[:, BLACK, PAWN]
+        shield = np.zeros(len(boards))
+        for offset in (-1, 0, 1):
+            file = king_file + offset
+            on_board = (file >= 0) & (file < 8) & (shield_rank >= 0) & (shield_rank < 8)
+            square = np.clip(shield_rank, 0, 7) * 8 + np.clip(file, 0, 7)
+            shield += 0.2 * (on_board & ((all_pawns & SQUARE_MASKS[square]) != EMPTY))
+
+        king_safety = np.where(has_king, np.where(pawn_on_file, 0.0, -0.5) + shield, 0.0)
+        return material + central + king_safety
+
+    ###################################################
+    ###### Move application ###########################
+    ###################################################
+
+    def _play(self, boards, actions):
+        """Pushes legal ``actions`` and returns ``(reward, terminated, outcome)``."""
+        n = len(boards)
+        rows = np.arange(n)
+        from_square, to_square, promotion = ACTION_CODEC.decode_batch(actions)
+        from_mask = SQUARE_MASKS[from_square]
+        to_mask = SQUARE_MASKS[to_square]
+
+        white, own, opponent = self._sides(boards)
+        us = white.astype(np.intp)
+
+        # ChessEnv scores both positions from the player to move after the push
+        perspective = ~self.current_player[boards]
+        previous_scores = self._position_scores(boards, perspective)
+        had_legal_ep = self._has_legal_ep[boards]
+        previous_castling = self.castling[boards]
+
+        moving = np.argmax((own & from_mask[:, None]) != EMPTY, axis=1)
+        from_file = from_square % 8
+        to_file = to_square % 8
+        castle = (moving == KING) & ((np.abs(to_file - from_file) > 1) | ((own[:, ROOK] & to_mask) != EMPTY))
+
+        hit = (opponent & to_mask[:, None]) != EMPTY
+        captured_type = np.where(hit.any(axis=1), np.argmax(hit, axis=1), -1)
+        en_passant = (moving == PAWN) & (to_square == self.ep_square[boards]) & (from_file != to_file)
+
+        # Remove captured pieces
+        opponent &= ~to_mask[:, None]
+        captured_square = np.where(white, to_square - 8, to_square + 8)[en_passant]
+        opponent[en_passant, PAWN] &= ~SQUARE_MASKS[captured_square]
+
+        # Move the piece, promoting it where needed
+        own[rows, moving] &= ~from_mask
+        normal = ~castle
+        placed = np.where(promotion > 0, promotion - 1, moving)
+        own[rows[normal], placed[normal]] |= to_mask[normal]
+
+        base = np.where(white, 0, 56)[castle]
+        kingside = (to_file > from_file)[castle]
+        own[castle, KING] = SQUARE_MASKS[base + np.where(kingside, 6, 2)]
+        rook_from = SQUARE_MASKS[base + np.where(kingside, 7, 0)]
+        rook_to = SQUARE_MASKS[base + np.where(kingside, 5, 3)]
+        own[castle, ROOK] = (own[castle, ROOK] & ~rook_from) | rook_to
+
+        self.pieces[boards, us] = own
+        self.pieces[boards, 1 - us] = opponent
+
+        # Castling rights, en passant square and clocks, as in chess.Board.push
+        castling = previous_castling & ~from_mask & ~to_mask
+        castling = np.where(moving == KING, castling & ~np.where(white, RANK_1, RANK_8), castling)
+        self.castling[boards] = castling
+
+        double_push = (moving == PAWN) & (np.abs(to_square - from_square) == 16)
+        self.ep_square[boards] = np.where(double_push, (from_square + to_square) // 2, -1)
+
+        zeroing = (moving == PAWN) | (captured_type >= 0) | en_passant
+        self.halfmove_clock[boards] = np.where(zeroing, 0, self.halfmove_clock[boards] + 1)
+        self.fullmove_number[boards] += (~white).astype(np.int64)
+        self.turn[boards] = ~white
+        self.current_player[boards] = ~self.current_player[boards]
+
+        self._analyse(boards)
+
+        irreversible = zeroing | (castling != previous_castling) | had_legal_ep
+        self._history_length[boards[irreversible]] = 0
+        repetitions = self._record_position(boards)
+
+        # Game over, in the order of chess.Board.outcome
+        no_legal = self._legal_count[boards] == 0
+        in_check = self._in_check[boards]
+        checkmate = no_legal & in_check
+        stalemate = no_legal & ~in_check
+        insufficient = self._insufficient_material(boards)
+        terminated = (
+            checkmate
+            | insufficient
+            | stalemate
+            | ((self.halfmove_clock[boards] >= SEVENTYFIVE_MOVE_PLIES) & ~no_legal)
+            | (repetitions >= FIVEFOLD)
+        )
+
+        outcome = np.where(terminated, DRAW, ONGOING).astype(np.int8)
+        outcome[checkmate] = np.where(self.turn[boards][checkmate], BLACK_WINS, WHITE_WINS)
+
+        # Reward terms of ChessEnv.compute_reward
+        reward = np.zeros(n)
+        reward[checkmate] = np.where(self.turn[boards][checkmate] != perspective[checkmate], 1, -1)
+        reward[~checkmate & (stalemate | insufficient)] = DRAW_REWARD
+
+        captured_color = ~white  # The opponent of the mover owned the captured piece
+        reward += np.where(
+            (captured_type >= 0) & (captured_color != perspective),
+            CAPTURE_VALUES[np.maximum(captured_type, 0)],
+            0.0,
+        )
+        reward += np.where(in_check, CHECK_REWARD, 0.0)
+        reward += self._position_scores(boards, perspective) - previous_scores
+        reward += np.where(promotion == chess.QUEEN, 0.7, np.where(promotion > 0, 0.5, 0.0))
+
+        return reward, terminated, outcome
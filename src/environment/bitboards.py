@@ -0,0 +1,158 @@
+"""Vectorised bitboard helpers shared by the NumPy chess environments.
+
+Bitboards follow the ``python-chess`` layout: bit ``n`` of a ``uint64`` is
+square ``n`` (``a1 = 0`` ... ``h8 = 63``).  Every helper works element-wise on
+arrays of bitboards, so a whole batch of positions is handled by one call
+instead of one Python loop per board.
+"""
+
+import chess
+import numpy as np
+
+EMPTY = np.uint64(0)
+FULL = np.uint64(chess.BB_ALL)
+
+FILE_A = np.uint64(chess.BB_FILE_A)
+FILE_H = np.uint64(chess.BB_FILE_H)
+NOT_FILE_A = np.uint64(chess.BB_ALL & ~chess.BB_FILE_A)
+NOT_FILE_H = np.uint64(chess.BB_ALL & ~chess.BB_FILE_H)
+NOT_FILE_AB = np.uint64(chess.BB_ALL & ~(chess.BB_FILE_A | chess.BB_FILE_B))
+NOT_FILE_GH = np.uint64(chess.BB_ALL & ~(chess.BB_FILE_G | chess.BB_FILE_H))
+
+RANK_1 = np.uint64(chess.BB_RANK_1)
+RANK_3 = np.uint64(chess.BB_RANK_3)
+RANK_6 = np.uint64(chess.BB_RANK_6)
+RANK_8 = np.uint64(chess.BB_RANK_8)
+
+DARK_SQUARES = np.uint64(chess.BB_DARK_SQUARES)
+LIGHT_SQUARES = np.uint64(chess.BB_LIGHT_SQUARES)
+
+# One bit per square, indexable with arrays of square numbers.
+SQUARE_MASKS = np.array(chess.BB_SQUARES, dtype=np.uint64)
+FILE_MASKS = np.array(chess.BB_FILES, dtype=np.uint64)
+
+# Shift amounts must be uint64 as well, otherwise NumPy 1.x promotes the
+# expression to float64.
+_SHIFTS = {amount: np.uint64(amount) for amount in (1, 2, 4, 7, 8, 9, 14, 16, 18, 28, 32, 36)}
+
+# (shift, wrap mask) for each ray direction: N, S, E, W, NE, NW, SE, SW.
+_ROOK_DIRECTIONS = ((8, FULL), (-8, FULL), (1, NOT_FILE_A), (-1, NOT_FILE_H))
+_BISHOP_DIRECTIONS = ((9, NOT_FILE_A), (7, NOT_FILE_H), (-7, NOT_FILE_A), (-9, NOT_FILE_H))
+
+_DEBRUIJN = np.uint64(0x03F79D71B4CB0A89)
+_DEBRUIJN_INDEX = np.zeros(64, dtype=np.int64)
+for _square in range(64):
+    _DEBRUIJN_INDEX[((1 << _square) * 0x03F79D71B4CB0A89 & chess.BB_ALL) >> 58] = _square
+
+_POPCOUNT_8 = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def _shift(bb, amount):
+    if amount > 0:
+        return bb << _SHIFTS[amount]
+    return bb >> _SHIFTS[-amount]
+
+
+def popcount(bb):
+    """Number of set bits of every bitboard in ``bb``."""
+    bb = np.asarray(bb, dtype=np.uint64)
+    if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+        return np.bitwise_count(bb).astype(np.int64)
+    as_bytes = np.ascontiguousarray(bb)[..., None].view(np.uint8)
+    return _POPCOUNT_8[as_bytes].sum(axis=-1, dtype=np.int64)
+
+
+def lsb(bb):
+    """Index of the least significant set bit (undefined for empty boards)."""
+    bb = np.asarray(bb, dtype=np.uint64)
+    lowest = bb & (~bb + np.uint64(1))
+    return _DEBRUIJN_INDEX[(lowest * _DEBRUIJN) >> np.uint64(58)]
+
+
+def unpack_bitboards(bb):
+    """Expands bitboards into ``(..., 8, 8)`` uint8 arrays indexed ``[rank, file]``."""
+    bb = np.ascontiguousarray(bb, dtype="<u8")
+    bits = np.unpackbits(bb[..., None].view(np.uint8), axis=-1, bitorder="little")
+    return bits.reshape(bb.shape + (8, 8))
+
+
+def pack_squares(bits):
+    """Inverse of :func:`unpack_bitboards` for ``(..., 64)`` boolean arrays."""
+    packed = np.packbits(np.asarray(bits, dtype=bool), axis=-1, bitorder="little")
+    return np.ascontiguousarray(packed).view("<u8")[..., 0].astype(np.uint64)
+
+
+###################################################
+###### Attack generation ##########################
+###################################################
+
+def knight_attacks(bb):
+    left_1 = (bb >> _SHIFTS[1]) & NOT_FILE_H
+    left_2 = (bb >> _SHIFTS[2]) & NOT_FILE_GH
+    right_1 = (bb << _SHIFTS[1]) & NOT_FILE_A
+    right_2 = (bb << _SHIFTS[2]) & NOT_FILE_AB
+    one = left_1 | right_1
+    two = left_2 | right_2
+    return (one << _SHIFTS[16]) | (one >> _SHIFTS[16]) | (two << _SHIFTS[8]) | (two >> _SHIFTS[8])
+
+
+def king_attacks(bb):
+    attacks = ((bb << _SHIFTS[1]) & NOT_FILE_A) | ((bb >> _SHIFTS[1]) & NOT_FILE_H)
+    row = bb | attacks
+    return attacks | (row << _SHIFTS[8]) | (row >> _SHIFTS[8])
+
+
+def pawn_attacks(bb, white):
+    """Squares attacked by pawns on ``bb``; ``white`` is a bool array per board."""
+    white_attacks = ((bb << _SHIFTS[9]) & NOT_FILE_A) | ((bb << _SHIFTS[7]) & NOT_FILE_H)
+    black_attacks = ((bb >> _SHIFTS[7]) & NOT_FILE_A) | ((bb >> _SHIFTS[9]) & NOT_FILE_H)
+    return np.where(white, white_attacks, black_attacks)
+
+
+def pawn_pushes(bb, white):
+    """Single step pushes of pawns on ``bb``, ignoring occupancy."""
+    return np.where(white, bb << _SHIFTS[8], bb >> _SHIFTS[8])
+
+
+def _ray_attacks(sliders, empty, amount, mask):
+    # Kogge-Stone occluded fill: three doubling steps cover a full ray.
+    propagate = empty & mask
+    sliders = sliders | (propagate & _shift(sliders, amount))
+    propagate = propagate & _shift(propagate, amount)
+    sliders = sliders | (propagate & _shift(sliders, 2 * amount))
+    propagate = propagate & _shift(propagate, 2 * amount)
+    sliders = sliders | (propagate & _shift(sliders, 4 * amount))
+    return _shift(sliders, amount) & mask
+
+
+def rook_attacks(bb, occupied):
+    empty = ~occupied
+    attacks = np.zeros_like(bb)
+    for amount, mask in _ROOK_DIRECTIONS:
+        attacks |= _ray_attacks(bb, empty, amount, mask)
+    return attacks
+
+
+def bishop_attacks(bb, occupied):
+    empty = ~occupied
+    attacks = np.zeros_like(bb)
+    for amount, mask in _BISHOP_DIRECTIONS:
+        attacks |= _ray_attacks(bb, empty, amount, mask)
+    return attacks
+
+
+def is_attacked(targets, occupied, attackers, white):
+    """Whether any square of ``targets`` is attacked by ``attackers``.
+
+    ``attackers`` is a ``(..., 6)`` array of the enemy piece bitboards ordered
+    by ``python-chess`` piece type (pawn ... king) and ``white`` is the colour
+    of the side being attacked.
+    """
+    pawns, knights, bishops, rooks, queens, kings = (attackers[..., index] for index in range(6))
+
+    hits = pawn_attacks(targets, white) & pawns
+    hits |= knight_attacks(targets) & knights
+    hits |= king_attacks(targets) & kings
+    hits |= bishop_attacks(targets, occupied) & (bishops | queens)
+    hits |= rook_attacks(targets, occupied) & (rooks | queens)
+    return hits != EMPTY
@@ -2,40 +2,99 @@ import gymnasium as gym
 import numpy as np
 import chess
 
+from .action_codec import ACTION_CODEC
+from .evaluator import IncrementalEvaluator
+from .info_levels import INFO_FULL, INFO_NONE, validate_info_level
+from .perf import PerfRecorder
+from .position_cache import PositionCache, resolve_cache
+from .positions import load_position
+from .zobrist import zobrist_hash, zobrist_toggle
+from .observation import (
+    PLANE_COUNT,
+    encode_board,
+    encode_planes,
+    patch_observation,
+    touched_squares,
+    validate_observation_mode,
+)
+
+
+# Reward terms timed by perf=True
+REWARD_COMPONENTS = ("reward_for_capture", "reward_for_check", "reward_for_position", "reward_for_promotion")
+
+# Capture reward of each piece type (a king is never captured)
+CAPTURE_REWARDS = {chess.PAWN: 0.1, chess.KNIGHT: 0.3, chess.BISHOP: 0.3, chess.ROOK: 0.5, chess.QUEEN: 0.9, chess.KING: 0}
+
 
 class ChessEnv(gym.Env):
 
     metadata = {'render_modes': ['human'], 'render_fps': 30}
 
-    def __init__(self):
+    def __init__(
+        self,
+        observation_mode="board",
+        debug_observation=False,
+        info_level=INFO_FULL,
+        perf=False,
+        cache=None,
+        position_pool=None,
+        opponent=None,
+        agent_color=chess.WHITE,
+    ):
         super(ChessEnv, self).__init__()
 
+        # "board" for the 8x8 grid of piece values, "planes" for the
+        # 18x8x8 piece, side to move, castling & en passant planes
+        self.observation_mode = validate_observation_mode(observation_mode)
+
+        # Checks every patched observation against a full rebuild (slow)
+        self.debug_observation = debug_observation
+
+        # "full" info dicts for evaluation & debugging, "minimal" keeps only
+        # the reason & winner (training), "none" returns empty dicts
+        self.info_level = validate_info_level(info_level)
+
+        # Per-component & per-phase latencies, read with perf_stats().
+        # None when disabled, so step() only pays a few "is None" checks
+        self._perf = PerfRecorder() if perf else None
+
+        if self._perf is not None:
+            self._time_reward_components()
+
         # Chess board & logic initialization
         # Will be used to shape the observation space
         self.board = chess.Board()
 
-        # Stores a list of all possible moves (4160) legal or illegal 
-        self.all_possible_moves = self.generate_all_moves()
+        # Stores all possible moves (4160) legal or illegal, shared by every env
+        self.all_possible_moves = ACTION_CODEC.moves
 
         # Box space used for the observation space
-        self.observation_space = gym.spaces.Box(
-            low=-6, # Black pieces
-            high=6, # White pieces
-            shape=(8,8), # Board size
-            dtype=np.int8 # Discrete values in space
-        )
+        if self.observation_mode == "planes":
+            self.observation_space = gym.spaces.Box(
+                low=0,
+                high=1, # Every plane is a 0/1 mask
+                shape=(PLANE_COUNT, 8, 8),
+                dtype=np.int8
+            )
+        else:
+            self.observation_space = gym.spaces.Box(
+                low=-6, # Black pieces
+                high=6, # White pieces
+                shape=(8,8), # Board size
+                dtype=np.int8 # Discrete values in space
+            )
 
         # discrete range to cover all possible moves in chess
-        self.action_space = gym.spaces.Discrete(4160)
+        self.action_space = gym.spaces.Discrete(ACTION_CODEC.size)
 
         # Maps chess pieces to upper & lower bound elements in observation space
         self.pieces = self.map_pieces()
 
         # Maps all chess move objects to an integer
-        self.move_to_action = self.get_move_to_action()
+        self.move_to_action = ACTION_CODEC.move_to_action
 
         # Maps integers to all chess move objects
-        self.action_to_move = self.get_action_to_move()
+        self.action_to_move = ACTION_CODEC.action_to_move
 
         # Track whose turn it is:  True for White, False for Black
         self.current_player = True
@@ -45,6 +104,29 @@ class ChessEnv(gym.Env):
 
         self.done = False # Determines if the enviornment has been terminated
 
+        # Running material, central control & king safety scores of the board
+        self.evaluator = IncrementalEvaluator(self.board)
+
+        # Optional LRU cache of legal masks, observations & terminal status
+        # keyed by the Zobrist hash of the position. True creates a private
+        # PositionCache, or pass one to share it between envs of a process
+        self.position_cache = resolve_cache(cache)
+        self._position_key = zobrist_hash(self.board) if self.position_cache is not None else None
+        self._entry = None # Cache entry of the current position, looked up lazily
+
+        # Optional PositionPool: every reset without a "fen" or "position"
+        # option starts from a position sampled from it
+        self.position_pool = position_pool
+
+        # Optional built-in opponent with a select_move(board) method, e.g.
+        # search.AlphaBetaSearcher. It plays every move of the side that is
+        # not agent_color, so each step covers the agent's move & its reply
+        self.opponent = opponent
+        self.agent_color = agent_color
+
+        # Persistent observation, patched square by square after every move
+        self._observation = self.build_observation()
+
     
 
     # Maps chess pieces to upper & lower bound elements in observation space 
@@ -70,157 +152,337 @@ class ChessEnv(gym.Env):
         return pieces
 
 
-    # Generates a list of all possible moves legal or illeagal
+    # Returns the list of all possible moves (4160) legal or illegal.
+    # The moves are built once per process by the shared action codec.
     def generate_all_moves(self):
-        
-        moves = [] # initialize empty list
+        return list(ACTION_CODEC.moves)
+    
+    # Maps the chess move object to an integer (shared, read-only mapping)
+    def get_move_to_action(self):
+        return ACTION_CODEC.move_to_action
+    
 
-        # Iterates thru the entire board of squares 0-63 
-        for from_square in chess.SQUARES: # Starting position
-            for to_square in chess.SQUARES: # Ending position
-                # Converts integer squares into a chess move
-                move = chess.Move(from_square, to_square)
-                moves.append(move) # adds move to the list
+    # Maps integers to chess move objects (shared, read-only mapping)
+    def get_action_to_move(self):
+        return ACTION_CODEC.action_to_move
 
 
-        # Generate all possible pawn promotion moves
-        promotion_pieces = ['q', 'r', 'b', 'n']  # Queen, Rook, Bishop, Knight
 
-        # White Pawn promotions
-        for file in 'abcdefgh':
-            
-            from_square = chess.parse_square(file + '7')
-            to_square = chess.parse_square(file + '8')
-
-            # Iterates through each promotion piece and adds
-            # promotion move to the moves list
-            for promotion in promotion_pieces:
-                if promotion == 'q':
-                    move = chess.Move(from_square, to_square, promotion=chess.QUEEN)
-                    moves.append(move)
-                elif promotion == 'r':
-                    move = chess.Move(from_square, to_square, promotion=chess.ROOK)
-                    moves.append(move)
-                elif promotion == 'b':
-                    move = chess.Move(from_square, to_square, promotion=chess.BISHOP)
-                    moves.append(move)
-                else:
-                    move = chess.Move(from_square, to_square, promotion=chess.KNIGHT)
-                    moves.append(move)
-        
-        # Black Pawn promotions
-        for file in 'abcdefgh':
-            
-            from_square = chess.parse_square(file + '1')
-            to_square = chess.parse_square(file + '2')
-
-            # Iterates through each promotion piece and adds
-            # promotion move to the moves list
-            for promotion in promotion_pieces:
-                if promotion == 'q':
-                    move = chess.Move(from_square, to_square, promotion=chess.QUEEN)
-                    moves.append(move)
-                elif promotion == 'r':
-                    move = chess.Move(from_square, to_square, promotion=chess.ROOK)
-                    moves.append(move)
-                elif promotion == 'b':
-                    move = chess.Move(from_square, to_square, promotion=chess.BISHOP)
-                    moves.append(move)
-                else:
-                    move = chess.Move(from_square, to_square, promotion=chess.KNIGHT)
-                    moves.append(move)
-
-
-        return moves
-    
-    # Maps the chess move object to an integer
-    def get_move_to_action(self):
-        
-        move_to_action = {} # Empty dictionary
+    # Builds the observation of the current board from scratch.
+    # Both modes unpack the board's bitboards instead of looping over pieces
+    def build_observation(self):
 
-        # action is the index (integer) which will be stored as the value
-        # for move_to_action. move will be the key
-        for action, move in enumerate(self.all_possible_moves):
-            # if the key doesn't already exist
-            if move not in move_to_action:
-                move_to_action[move] = action # initialize key-value pair
+        if self.observation_mode == "planes":
+            return encode_planes(self.board)
 
-        return move_to_action
-    
+        return encode_board(self.board)
+
+
+
+    # Rebuilds the persistent observation. Call after editing self.board
+    # directly (set_fen, push, ...) instead of going through step()
+    def refresh_observation(self):
+        self._observation = self.build_observation()
 
-    # Maps integers to chess move objects
-    def get_action_to_move(self):
 
-        action_to_move = {} # empty dictionary
 
-        # iterates thru each key value pair in move_to_action dictionary
-        # Where action (an integer) will be the key in action_to_move
-        # and move (a chess move object) will be the value
-        for move, action in self.move_to_action.items():
-            if action not in action_to_move:
-                action_to_move[action] = move
+    # Resyncs the observation, the evaluator totals & the position key with self.board
+    def sync_board(self):
+        self.evaluator.reset()
+        self.refresh_observation()
 
-        return action_to_move
+        if self.position_cache is not None:
+            self._position_key = zobrist_hash(self.board)
+            self._entry = None
 
 
 
-    # Maps the current chess board state to the current observation state
+    # Maps the current chess board state to the current observation state.
+    # Returns a copy of the persistent observation kept up to date by _push
     def get_observation(self):
 
-        # Initialize an empty board
-        observation = np.zeros((8,8), dtype=np.int8)
+        if self.debug_observation:
+            expected = self.build_observation()
+            if not np.array_equal(self._observation, expected):
+                raise RuntimeError(
+                    f"Patched observation differs from a full rebuild at {self.board.fen()}"
+                )
 
-        # Map pieces to observation values
-        piece_map = self.board.piece_map()
+        return self._observation.copy()
 
-        for square, piece in piece_map.items():
-            row = chess.square_rank(square)
-            col = chess.square_file(square)
-            observation[7 - row][col] = self.pieces[piece.symbol()]  # Flip row for display
-        
-        return observation
 
 
+    # Pushes a move on the board & patches only the squares it changed
+    # (at most four: castling moves the rook, en passant removes a pawn)
+    def _push(self, move):
+        squares = touched_squares(self.board, move)
+
+        if self.position_cache is None:
+            self.evaluator.push(move, squares) # pushes the move & updates the running scores
+            patch_observation(self._observation, self.board, squares, self.observation_mode)
+            return
+
+        # XOR out the touched squares & state before the move, XOR in after it
+        self._position_key ^= zobrist_toggle(self.board, squares)
+        self.evaluator.push(move, squares)
+        self._position_key ^= zobrist_toggle(self.board, squares)
 
+        self._entry = self.position_cache.get(self._position_key)
+        if self._entry is not None:
+            self._observation[...] = self._entry.observation # cache hit: no patching needed
+            if self.observation_mode == "planes":
+                # The key skips en passant squares that cannot be captured,
+                # which the en passant plane still shows
+                patch_observation(self._observation, self.board, (), self.observation_mode)
+        else:
+            patch_observation(self._observation, self.board, squares, self.observation_mode)
+            self._entry = self._store_entry() # stores the new position
+
+
+
+    ###################################################
+    ###### Position cache #############################
+    ###################################################
+
+    # Cache entry of the current position, computed & stored on a miss
+    def _cache_entry(self):
+
+        if self._entry is None:
+            self._entry = self.position_cache.get(self._position_key)
+
+            if self._entry is None:
+                self._entry = self._store_entry()
+
+        return self._entry
+
+
+    # Computes the cached data of the current position & stores it
+    def _store_entry(self):
+
+        status = (
+            self.board.is_checkmate(),
+            self.board.is_stalemate(),
+            self.board.is_insufficient_material(),
+        )
+
+        return self.position_cache.put(self._position_key, self.legal_action_mask(), self._observation, status)
+
+
+    # The board queries step() makes, answered from the cache when enabled
+    def _is_checkmate(self):
+        if self.position_cache is None:
+            return self.board.is_checkmate()
+        return self._cache_entry().status[0]
+
+    def _is_stalemate(self):
+        if self.position_cache is None:
+            return self.board.is_stalemate()
+        return self._cache_entry().status[1]
+
+    def _is_insufficient_material(self):
+        if self.position_cache is None:
+            return self.board.is_insufficient_material()
+        return self._cache_entry().status[2]
+
+    def _is_game_over(self):
+        if self.position_cache is None:
+            return self.board.is_game_over()
+        # The move clock & repetitions depend on the game history, not the position
+        return (
+            any(self._cache_entry().status)
+            or self.board.is_seventyfive_moves()
+            or self.board.is_fivefold_repetition()
+        )
+
+    # The cached mask only has the e1g1 form of castling moves, so a 0 bit
+    # falls back to the board for the king-takes-rook e1h1 form
+    def _is_legal(self, move, action):
+        if self.position_cache is None:
+            return move in self.board.legal_moves
+        if PositionCache.unpack_mask(self._cache_entry(), ACTION_CODEC.size)[int(action)]:
+            return True
+        return move in self.board.legal_moves
+
+
+    # Hits, misses, evictions & memory of the position cache ({} when disabled)
+    def cache_stats(self):
+
+        if self.position_cache is None:
+            return {}
+
+        return self.position_cache.stats()
+
+
+
+    # options={"fen": ...} starts from a FEN string, options={"position": ...}
+    # from a packed POSITION_DTYPE record (no parsing). Otherwise the game
+    # starts from a position_pool sample, or from the initial position
     def reset(self, *, seed = None, options = None):
         
         super().reset(seed=seed, options=options) # Implements correct seeding
 
-        self.board.reset() # restarts the game board
-        self.current_player = True # White makes the first move
+        options = options or {}
+
+        if "fen" in options:
+            self.board.set_fen(options["fen"])
+            if not self.board.is_valid():
+                raise ValueError(f"Invalid start position: {options['fen']}")
+        elif "position" in options:
+            load_position(self.board, options["position"])
+        elif self.position_pool is not None:
+            load_position(self.board, self.position_pool.sample(self.np_random))
+        else:
+            self.board.reset() # restarts the game board
+
+        self.current_player = self.board.turn # White makes the first move, unless the start position says otherwise
+        self.illegal_moves_count = 0 # Illegal moves are counted per episode
+        self.sync_board()
+
+        if self.opponent is not None:
+            if hasattr(self.opponent, "clear"):
+                self.opponent.clear() # Same seed, same replies: no table carried over from earlier games
+            if self.board.turn != self.agent_color:
+                self._play_opponent() # The opponent moves first
         observation = self.get_observation() # returns game board as an 8x8 observation grid
 
         # stores additional metada about the initial observation state
-        info = {
-            "initial_board_fen": self.board.fen(),
-            "starting_player": "white",
-            "castling_rights": self.board.castling_rights,
-            "en_passant_square": self.board.ep_square,
-        }
+        info = {}
+        if self.info_level == INFO_FULL:
+            info = {
+                "initial_board_fen": self.board.fen(),
+                "starting_player": "white" if self.board.turn == chess.WHITE else "black",
+                "castling_rights": self.board.castling_rights,
+                "en_passant_square": self.board.ep_square,
+            }
 
         return observation, info
 
 
 
+    # Pushes the opponent's reply to the current position & hands the turn
+    # back. Returns the move, or None when there is no legal move, & the
+    # piece it captured
+    def _play_opponent(self):
+
+        reply = self.opponent.select_move(self.board)
+        captured_piece = None
+        if reply is not None:
+            captured_piece = self.board.piece_at(reply.to_square)
+            self._push(reply)
+            self.current_player = not self.current_player
+
+        return reply, captured_piece
+
+
+
+    # Call counts, cumulative & percentile latencies (microseconds) of the
+    # reward components & step phases. Empty unless created with perf=True
+    def perf_stats(self):
+
+        if self._perf is None:
+            return {}
+
+        return self._perf.stats()
+
+
+
+    # Clears the recorded latencies
+    def reset_perf_stats(self):
+
+        if self._perf is not None:
+            self._perf.reset()
+
+    # Instance attributes shadow the reward methods with timed wrappers
+    def _time_reward_components(self):
+
+        for name in REWARD_COMPONENTS:
+            setattr(self, name, self._perf.timed(name, getattr(self, name)))
+
+    # The timed wrappers are closures & the codec lookups read-only mapping
+    # proxies, neither of which pickles: they are dropped here & rebuilt by
+    # __setstate__ (SubprocVecEnv, shm workers)
+    def __getstate__(self):
+
+        state = self.__dict__.copy()
+        for name in REWARD_COMPONENTS + ("move_to_action", "action_to_move"):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+
+        self.__dict__.update(state)
+        self.move_to_action = ACTION_CODEC.move_to_action
+        self.action_to_move = ACTION_CODEC.action_to_move
+        if self._perf is not None:
+            self._time_reward_components()
+
+
+
+    # Builds the step info dict for the configured info level. Only the
+    # "full" level queries the board (check, move number)
+    def build_info(self, reason=None):
+
+        if self.info_level == INFO_NONE:
+            return {}
+
+        info = {} if reason is None else {"reason": reason}
+
+        if self.info_level == INFO_FULL:
+            info["illegal_moves"] = self.illegal_moves_count
+            info["total_moves_made"] = self.board.fullmove_number
+            info["in_check"] = self.board.is_check()
+
+        return info
+
+
+
     # Decodes action sample into a chess move
     def decode_action(self, action):
-        if action not in self.action_to_move:
-            raise ValueError(f"Invalid action index: {action}")
-        return self.action_to_move[action]
+        return ACTION_CODEC.decode(action) # Raises ValueError for invalid indices
     
 
     
-    # Computes reward for piece capture
-    def reward_for_capture(self, move, previous_board):
+    # Boolean mask over all 4160 actions marking the legal moves of the current
+    # position. Read by MaskablePPO (sb3-contrib) through the env's action_masks() method.
+    def action_masks(self):
+
+        if self.position_cache is not None:
+            mask = PositionCache.unpack_mask(self._cache_entry(), ACTION_CODEC.size)
+        else:
+            mask = self.legal_action_mask()
+
+        # A policy needs at least one valid action, so when no legal move is
+        # encodable every action is left available (illegal ones are penalised)
+        if not mask.any():
+            mask[:] = True
+
+        return mask
+
+
+
+    # Mask of the legal moves the codec can encode, built in one pass over the
+    # legal moves with the shared codec. May be all False
+    def legal_action_mask(self):
+        return ACTION_CODEC.legal_mask(self.board)
+
+
+
+    # Computes reward for piece capture. The captured piece is read from
+    # previous_board, or passed directly when it was saved before the move
+    def reward_for_capture(self, move, previous_board=None, captured_piece=None):
 
         # checks if chess move resulted in a capture
         if self.board.is_capture(move):
 
-            captured_piece = previous_board.piece_at(move.to_square)
+            if previous_board is not None:
+                captured_piece = previous_board.piece_at(move.to_square)
+
+            # Quiet moves and en passant leave the destination square empty
+            if captured_piece is None:
+                return 0
 
             # Assign rewards based on the piece value
-            piece_values = {'p': 0.1, 'n': 0.3, 'b': 0.3, 'r': 0.5, 'q': 0.9, 'k': 0}  # King capture not possible
-            reward = piece_values[captured_piece.symbol().lower()]
+            reward = CAPTURE_REWARDS[captured_piece.piece_type]
             
             # Positive reward for capturing an opponent piece
             if captured_piece.color != self.current_player:
@@ -238,12 +500,13 @@ class ChessEnv(gym.Env):
 
 
 
-    # Calculates the current material balance advantage/disadvantage the agent has
-    def calculate_material_balance(self, board):
+    # Calculates the current material balance advantage/disadvantage the agent has.
+    # color defaults to the current player
+    def calculate_material_balance(self, board, color=None):
 
         piece_values = {'p': 1, 'n': 3, 'b': 3, 'r': 5, 'q': 9, 'k': 0}
 
-        agent_color = self.current_player # determines if the piece belongs to the agent
+        agent_color = self.current_player if color is None else color # determines if the piece belongs to the agent
 
         agent_balance = 0 # agents piece material
         opponent_balance = 0 # opponent's material
@@ -272,7 +535,9 @@ class ChessEnv(gym.Env):
 
 
     # Gives reward for pieces in the central squares
-    def calculate_central_control(self, board):
+    def calculate_central_control(self, board, color=None):
+
+        agent_color = self.current_player if color is None else color
 
         # total number of pieces in the central control area
         central_control = 0
@@ -304,17 +569,19 @@ class ChessEnv(gym.Env):
         for square in central_squares:
             piece = board.piece_at(square)
             # reward for every agent piece in the central control area
-            if piece and piece.color == self.current_player:
+            if piece and piece.color == agent_color:
                 central_control+=0.1
         
         return central_control
 
 
     
-    def calculate_king_safety(self, board):
+    def calculate_king_safety(self, board, color=None):
+
+        agent_color = self.current_player if color is None else color
 
         # The square int (0-63) that the agent's king piece is on
-        agent_king_square = board.king(self.current_player)
+        agent_king_square = board.king(agent_color)
 
         king_safety_score = 0 # Return value
 
@@ -331,7 +598,7 @@ class ChessEnv(gym.Env):
 
                 if current_file == king_file:
                     # if the piece in the same file is a pawn & belongs to the agent
-                    if piece.piece_type == chess.PAWN and piece.color == self.current_player:
+                    if piece.piece_type == chess.PAWN and piece.color == agent_color:
                         is_pawn_in_file = True
             
             # penalty for king being exposed
@@ -347,11 +614,14 @@ class ChessEnv(gym.Env):
                 
                 square = None  
 
-                if self.current_player: # if the agent is currently White
-                    square = chess.square(king_file + offset, king_rank + 1)
+                file = king_file + offset
+                rank = king_rank + 1 if agent_color else king_rank - 1 # White shields upwards, Black downwards
+
+                # Skips squares that fall off the edge of the board
+                if not (0 <= file < 8 and 0 <= rank < 8):
+                    continue
 
-                else: # if the agent is currently Black
-                    square = chess.square(king_file + offset, king_rank - 1)
+                square = chess.square(file, rank)
                 
                 # Stores the piece at the current square
                 # returns None if there is no piece present
@@ -367,22 +637,38 @@ class ChessEnv(gym.Env):
 
 
 
-    # Gives total reword for positioning and material balance
-    def reward_for_position(self, previous_board):
+    # Material balance, central control & king safety of any board, scanned
+    # in full. self.evaluator keeps the same scores for self.board in O(1)
+    def position_scores(self, board, color=None):
+        return (
+            self.calculate_material_balance(board, color),
+            self.calculate_central_control(board, color),
+            self.calculate_king_safety(board, color),
+        )
+
+
+
+    # Gives total reword for positioning and material balance.
+    # Takes either the board before the move, scanned in full, or its
+    # scores from the evaluator, which step() saves before pushing
+    def reward_for_position(self, previous_board=None, previous_scores=None):
+
+        if previous_scores is None:
+            previous_scores = self.position_scores(previous_board)
+            current_scores = self.position_scores(self.board)
+        else:
+            current_scores = self.evaluator.scores(self.current_player) # O(1) running totals
+
+        previous_material, previous_central_control, previous_king_safety = previous_scores
+        current_material, current_central_control, current_king_safety = current_scores
 
         # Material balance before & after step
-        previous_material = self.calculate_material_balance(previous_board)
-        current_material = self.calculate_material_balance(self.board)
         material_balance = current_material - previous_material
 
         # total number of agent pieces in the central control area
-        previous_central_control = self.calculate_central_control(previous_board)
-        current_central_control = self.calculate_central_control(self.board)
         positional_reward = current_central_control - previous_central_control
 
         # King safety
-        previous_king_safety = self.calculate_king_safety(previous_board)
-        current_king_safety = self.calculate_king_safety(self.board)
         king_safety_reward = current_king_safety - previous_king_safety
 
         total_reward = material_balance + positional_reward + king_safety_reward
@@ -405,19 +691,50 @@ class ChessEnv(gym.Env):
         return 0.0 
 
 
-    # Defines reward system for the learning model
-    def compute_reward(self, move, previous_board):
+    # Capture, check & promotion terms of the move just pushed, for color:
+    # positive when color made the move, negative when its opponent did
+    def reward_for_ply(self, color, move, captured_piece):
+
+        reward = self.reward_for_check() + self.reward_for_promotion(move)
+        if captured_piece is not None:
+            reward += CAPTURE_REWARDS[captured_piece.piece_type]
+
+        mover = not self.board.turn
+        return reward if mover == color else -reward
+
+
+
+    # Change of color's position scores since previous_scores were saved
+    # from the evaluator, plus 1 for a win, -1 for a loss or 0.5 for a draw
+    def reward_for_outcome(self, color, previous_scores):
+
+        current_scores = self.evaluator.scores(color)
+        reward = sum(current - previous for current, previous in zip(current_scores, previous_scores))
+
+        if self._is_checkmate():
+            reward += -1 if self.board.turn == color else 1
+        elif self._is_stalemate() or self._is_insufficient_material():
+            reward += 0.5
+
+        return reward
+
+
+
+    # Defines reward system for the learning model.
+    # Takes either the board before the move, or the captured piece &
+    # position_scores saved before the move
+    def compute_reward(self, move, previous_board=None, captured_piece=None, previous_scores=None):
 
         total_reward = 0 # total reward value returned
         
         # Calculate each reward parameter
-        capture_reward = self.reward_for_capture(move, previous_board)
+        capture_reward = self.reward_for_capture(move, previous_board, captured_piece)
         check_reward = self.reward_for_check()
-        position_reward = self.reward_for_position(previous_board)
+        position_reward = self.reward_for_position(previous_board, previous_scores)
         promotion_reward = self.reward_for_promotion(move)
 
         # if either players king is in checkmate
-        if self.board.is_checkmate(): 
+        if self._is_checkmate(): 
             # If the agent is not in checkmate, it will 
             # receive a positive reward for winning the game
             if self.board.turn != self.current_player:
@@ -426,7 +743,7 @@ class ChessEnv(gym.Env):
                 total_reward+=-1
             
         # If the game ends in a draw
-        elif self.board.is_stalemate() or self.board.is_insufficient_material():
+        elif self._is_stalemate() or self._is_insufficient_material():
             total_reward+=0.5
 
         total_reward = total_reward + capture_reward + check_reward + position_reward + promotion_reward
@@ -444,27 +761,25 @@ class ChessEnv(gym.Env):
 
         legal_move_made = False # exit condition for while loop
 
-        if action not in self.action_to_move:
-            raise ValueError(f"Invalid action index: {action}")
-    
+        perf = self._perf # Phase timer, None unless perf=True
+        if perf is not None:
+            perf.start()
+
          # Converts int action into a chess move object
-        move = self.action_to_move[action] 
-        previous_board = self.board.copy()  # Save the board state before the move
+        move = self.decode_action(action)
 
 
         # Check for stalemates or insufficient material before decoding the action
-        if self.board.is_stalemate() or self.board.is_insufficient_material():
+        if self._is_stalemate() or self._is_insufficient_material():
             
             observation = self.get_observation()
             reward = 0.5  # Draw reward
             done = True
-            info = {
-                "reason": "draw",
-                "draw_reason": "stalemate" if self.board.is_stalemate() else "insufficient_material",
-                "illegal_moves": self.illegal_moves_count,
-                "total_moves_made": self.board.fullmove_number,
-                "in_check": self.board.is_check()
-            }
+            info = self.build_info("draw")
+            if self.info_level != INFO_NONE:
+                info["draw_reason"] = "stalemate" if self._is_stalemate() else "insufficient_material"
+            if perf is not None:
+                perf.stop("step")
             return observation, reward, done, False, info
         
 
@@ -475,64 +790,108 @@ class ChessEnv(gym.Env):
             observation = self.get_observation()
             reward = -1  # Penalize for too many illegal moves
             done = True
-            info = {
-                "reason": "too many illegal moves",
-                "illegal_moves": self.illegal_moves_count,
-                "total_moves_made": self.board.fullmove_number,
-                "in_check": self.board.is_check()
-            }
+            info = self.build_info("too many illegal moves")
 
-            print(f"Threshold for illegal moves: {threshold}")
+            if self.info_level == INFO_FULL: # Debug output, kept out of training & evaluation loops
+                print(f"Threshold for illegal moves: {threshold}")
 
+            if perf is not None:
+                perf.stop("step")
             return observation, reward, done, False, info
 
+        if perf is not None:
+            perf.lap("step.checks")
+
 
         while not legal_move_made:
 
             # Checks if move is legal
-            if move in self.board.legal_moves:
-                self.board.push(move) # applies move to the board object
+            is_legal = self._is_legal(move, action)
+            if perf is not None:
+                perf.lap("step.legality")
+
+            if is_legal:
+
+                # Saves what the reward needs from the position before the move,
+                # instead of copying the board. Scored for the player to move
+                # next, or for the agent over its move & the opponent's reply
+                captured_piece = self.board.piece_at(move.to_square)
+                scored_color = not self.current_player if self.opponent is None else self.agent_color
+                previous_scores = self.evaluator.scores(scored_color)
+
+                self._push(move) # applies move to the board & observation
                 self.current_player = not self.current_player # Changes player turn
                 legal_move_made = True # breaks while loop
+
+                if perf is not None:
+                    perf.lap("step.push")
             else:
                 observation = self.get_observation()
                 done = False # indicates that the game is not over
-                info = {
-                    "reason": "illegal move",
-                    "illegal_moves": self.illegal_moves_count,
-                    "total_moves_made": self.board.fullmove_number,
-                    "in_check": self.board.is_check()
-                }
+                info = self.build_info("illegal move")
                 
                 self.illegal_moves_count+=1 # Tracks total number of illegal moves per episode
                 
+                if perf is not None:
+                    perf.stop("step")
 
                 return observation, illegal_move_penalty, done, False, info
                 
         
-        reward = self.compute_reward(move, previous_board) # Compute total reward for the step
-
-        done = self.board.is_game_over() # Check if the game is over
+        reply = None
+        if self.opponent is None:
+            # Compute total reward for the step
+            reward = self.compute_reward(move, captured_piece=captured_piece, previous_scores=previous_scores)
+            if perf is not None:
+                perf.lap("step.reward")
+
+            done = self._is_game_over() # Check if the game is over
+            if perf is not None:
+                perf.lap("step.game_over")
+        else:
+            # The agent's reward covers its move & the reply: what the reply
+            # captures, checks or promotes counts against it
+            reward = self.reward_for_ply(self.agent_color, move, captured_piece)
+
+            done = self._is_game_over()
+            if perf is not None:
+                perf.lap("step.game_over")
+
+            if not done:
+                reply, reply_captured = self._play_opponent()
+                if reply is not None:
+                    reward += self.reward_for_ply(self.agent_color, reply, reply_captured)
+                    done = self._is_game_over()
+                if perf is not None:
+                    perf.lap("step.opponent")
+
+            reward += self.reward_for_outcome(self.agent_color, previous_scores)
+            if perf is not None:
+                perf.lap("step.reward")
 
         observation = self.get_observation() # Get the updated observation
+        if perf is not None:
+            perf.lap("step.observation")
 
         # additional metadata info for debugging & analysis
-        info = {
-            "illegal_moves": self.illegal_moves_count,
-            "total_moves_made": self.board.fullmove_number,
-            "in_check": self.board.is_check()
-        }
+        info = self.build_info()
+        if reply is not None and self.info_level == INFO_FULL:
+            info["opponent_move"] = reply.uci()
 
         # if the game ended
-        if done:
-            if self.board.result() == "1-0":
+        if done and self.info_level != INFO_NONE:
+            result = self.board.result()
+            if result == "1-0":
                 info["winner"] = "white"
-            elif self.board.result() == "0-1":
+            elif result == "0-1":
                 info["winner"] = "black"
             else:
                 info["winner"] = "draw"
 
-        
+        if perf is not None:
+            perf.lap("step.info")
+            perf.stop("step")
+
         return observation, reward, done, False, info
 
 
@@ -0,0 +1,152 @@
+"""Running position scores for the ``ChessEnv`` reward terms.
+
+:class:`IncrementalEvaluator` wraps a ``chess.Board`` and keeps the totals
+behind ``ChessEnv.calculate_material_balance``, ``calculate_central_control``
+and ``calculate_king_safety`` up to date as moves are pushed and popped.  A
+move changes at most four squares, so each update costs a handful of lookups
+instead of rescanning ``board.piece_map()``.  The returned values are
+bit-for-bit equal to the ``ChessEnv`` methods, including their float
+rounding.
+"""
+
+import chess
+
+from .observation import touched_squares
+
+# Same values as ChessEnv.calculate_material_balance.
+PIECE_VALUES = (0, 1, 3, 3, 5, 9, 0)  # Indexed by piece type, kings are worth 0
+MAX_MATERIAL = 39
+
+# Extended centre of ChessEnv.calculate_central_control.
+CENTRAL_SQUARES = (chess.BB_FILE_C | chess.BB_FILE_D | chess.BB_FILE_E | chess.BB_FILE_F) & (
+    chess.BB_RANK_3 | chess.BB_RANK_4 | chess.BB_RANK_5 | chess.BB_RANK_6
+)
+
+
+def _accumulated(step, count, start=0):
+    # Repeats ChessEnv's "+= step" loops so the rounding matches exactly
+    total = start
+    for _ in range(count):
+        total += step
+    return total
+
+
+CENTRAL_SCORES = tuple(_accumulated(0.1, count) for count in range(chess.popcount(CENTRAL_SQUARES) + 1))
+
+# The king's file and its neighbours, for the pawn shield.
+SHIELD_FILES = tuple(
+    chess.BB_FILES[file] | (chess.BB_FILES[file - 1] if file > 0 else 0) | (chess.BB_FILES[file + 1] if file < 7 else 0)
+    for file in range(8)
+)
+
+# King safety by (own pawn on the king's file, shield pawn count).
+KING_SAFETY_SCORES = (
+    tuple(_accumulated(0.2, count, start=-0.5) for count in range(4)),
+    tuple(_accumulated(0.2, count) for count in range(4)),
+)
+
+
+def king_safety(color, king_square, pawns, own_pawns):
+    """``ChessEnv.calculate_king_safety`` from the king square and the pawn
+    bitboards (all pawns and ``color``'s own)."""
+    if king_square is None:
+        return 0
+
+    king_file = chess.square_file(king_square)
+    pawn_in_file = bool(own_pawns & chess.BB_FILES[king_file])
+
+    # Pawns of either colour on the three squares in front of the king
+    shield_rank = chess.square_rank(king_square) + (1 if color else -1)
+    shield = 0
+    if 0 <= shield_rank < 8:
+        shield = chess.popcount(pawns & chess.BB_RANKS[shield_rank] & SHIELD_FILES[king_file])
+
+    return KING_SAFETY_SCORES[pawn_in_file][shield]
+
+
+class IncrementalEvaluator:
+    """Material and central control totals of a board, kept per colour.
+
+    Moves must go through :meth:`push` and :meth:`pop` for the totals to
+    stay in sync; call :meth:`reset` after editing the board any other way.
+    King safety needs only the king square and pawn bitboards, so it is
+    read from the board directly.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self.reset()
+
+    def reset(self):
+        """Recomputes every total from the board (one full scan)."""
+        self._material = [0, 0]  # Indexed by colour: Black, White
+        self._central = [0, 0]
+        self._undo = []
+
+        for square, piece in self.board.piece_map().items():
+            self._add(square, piece, 1)
+
+    def _add(self, square, piece, sign):
+        self._material[piece.color] += sign * PIECE_VALUES[piece.piece_type]
+        if chess.BB_SQUARES[square] & CENTRAL_SQUARES:
+            self._central[piece.color] += sign
+
+    ###################################################
+    ###### Moves ######################################
+    ###################################################
+
+    def push(self, move, squares=None):
+        """Pushes ``move`` on the board and updates the totals.
+
+        ``squares`` are the squares the move touches, from
+        :func:`~environment.observation.touched_squares` when the caller
+        already has them.
+        """
+        board = self.board
+        if squares is None:
+            squares = touched_squares(board, move)
+
+        before = [board.piece_at(square) for square in squares]
+        board.push(move)
+        after = [board.piece_at(square) for square in squares]
+
+        for square, old, new in zip(squares, before, after):
+            if old is not None:
+                self._add(square, old, -1)
+            if new is not None:
+                self._add(square, new, 1)
+
+        self._undo.append((squares, before, after))
+
+    def pop(self):
+        """Pops the last move pushed through :meth:`push`."""
+        squares, before, after = self._undo.pop()
+        self.board.pop()
+
+        for square, old, new in zip(squares, before, after):
+            if new is not None:
+                self._add(square, new, -1)
+            if old is not None:
+                self._add(square, old, 1)
+
+    ###################################################
+    ###### Scores #####################################
+    ###################################################
+
+    def material_balance(self, color):
+        return (self._material[color] - self._material[not color]) / MAX_MATERIAL
+
+    def central_count(self, color):
+        """Pieces of ``color`` on the extended centre."""
+        return self._central[color]
+
+    def central_control(self, color):
+        return CENTRAL_SCORES[self._central[color]]
+
+    def king_safety(self, color):
+        board = self.board
+        return king_safety(color, board.king(color), board.pawns, board.pawns & board.occupied_co[color])
+
+    def scores(self, color):
+        """``(material, central control, king safety)`` as seen by ``color``."""
+        return self.material_balance(color), self.central_control(color), self.king_safety(color)
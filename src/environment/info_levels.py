@@ -0,0 +1,22 @@
+"""Verbosity of the ``info`` dicts returned by the environments.
+
+``"full"``
+    Every metadata field, for evaluation and debugging (the default).
+``"minimal"``
+    Only what explains how a step or episode ended (``reason``, ``winner``
+    ...), so no board queries run for ordinary steps.  Used for training.
+``"none"``
+    Always an empty dict.
+"""
+
+INFO_NONE = "none"
+INFO_MINIMAL = "minimal"
+INFO_FULL = "full"
+
+INFO_LEVELS = (INFO_NONE, INFO_MINIMAL, INFO_FULL)
+
+
+def validate_info_level(level):
+    if level not in INFO_LEVELS:
+        raise ValueError(f"Unknown info level: {level!r}. Expected one of {INFO_LEVELS}.")
+    return level
@@ -0,0 +1,182 @@
+"""Observation encoders built from bitboards with vectorised bit unpacking.
+
+Two encodings are available through the ``observation_mode`` option of the
+environments:
+
+``"board"``
+    The original 8x8 ``int8`` grid, ``+1..+6`` for White pawn..king and
+    ``-1..-6`` for Black.
+``"planes"``
+    An ``(18, 8, 8)`` ``int8`` stack of 0/1 planes: twelve piece planes
+    (White pawn..king, then Black pawn..king), the side to move, four
+    castling rights (White king side, White queen side, Black king side,
+    Black queen side) and the en passant square.
+
+Both are produced from the twelve piece bitboards with ``np.unpackbits``
+instead of a Python loop over ``board.piece_map()``.  Row 0 is rank 8 so the
+grids read like a printed board, as in every environment of this package.
+
+Environments that keep one observation alive across moves can patch it with
+:func:`touched_squares` and :func:`patch_observation` instead of rebuilding
+it: a move changes at most four squares (castling and en passant included).
+"""
+
+import chess
+import numpy as np
+
+from .bitboards import SQUARE_MASKS, unpack_bitboards
+
+OBSERVATION_MODES = ("board", "planes")
+
+PIECE_PLANES = 12
+SIDE_TO_MOVE_PLANE = 12
+CASTLING_PLANES = slice(13, 17)
+EN_PASSANT_PLANE = 17
+PLANE_COUNT = 18
+
+# Rook squares of the python-chess castling rights, in plane order.
+CASTLING_SQUARES = np.array([chess.H1, chess.A1, chess.H8, chess.A8])
+
+# Board value of each piece plane, matching ChessEnv.map_pieces.
+PIECE_VALUES = np.array([1, 2, 3, 4, 5, 6, -1, -2, -3, -4, -5, -6], dtype=np.int8)
+
+
+def validate_observation_mode(mode):
+    if mode not in OBSERVATION_MODES:
+        raise ValueError(f"Unknown observation mode: {mode!r}. Expected one of {OBSERVATION_MODES}.")
+    return mode
+
+
+def board_bitboards(board):
+    """The twelve piece bitboards of a ``chess.Board``, White pawn first."""
+    white, black = board.occupied_co[chess.WHITE], board.occupied_co[chess.BLACK]
+    by_type = (board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings)
+    return np.array([bb & white for bb in by_type] + [bb & black for bb in by_type], dtype=np.uint64)
+
+
+###################################################
+###### Batched encoders ###########################
+###################################################
+
+def board_from_bitboards(pieces):
+    """``(N, 12)`` piece bitboards to ``(N, 8, 8)`` int8 board observations."""
+    pieces = np.asarray(pieces, dtype=np.uint64)
+    bits = unpack_bitboards(pieces).reshape(len(pieces), PIECE_PLANES, 64)
+    observation = (PIECE_VALUES @ bits).astype(np.int8).reshape(-1, 8, 8)
+    return np.ascontiguousarray(observation[:, ::-1, :])  # Flip row for display
+
+
+def planes_from_bitboards(pieces, white_to_move, castling_rights, ep_squares):
+    """``(N, 12)`` piece bitboards plus game state to ``(N, 18, 8, 8)`` planes.
+
+    ``castling_rights`` uses the python-chess bitmask of rook squares and
+    ``ep_squares`` holds ``-1`` when there is no en passant square.
+    """
+    pieces = np.asarray(pieces, dtype=np.uint64)
+    count = len(pieces)
+    ep_squares = np.asarray(ep_squares, dtype=np.int64)
+    castling_rights = np.asarray(castling_rights, dtype=np.uint64)
+
+    planes = np.zeros((count, PLANE_COUNT, 8, 8), dtype=np.int8)
+    planes[:, :PIECE_PLANES] = unpack_bitboards(pieces)
+    planes[:, SIDE_TO_MOVE_PLANE] = np.asarray(white_to_move, dtype=np.int8)[:, None, None]
+
+    rights = (castling_rights[:, None] & SQUARE_MASKS[CASTLING_SQUARES]) != 0
+    planes[:, CASTLING_PLANES] = rights.astype(np.int8)[:, :, None, None]
+
+    has_ep = ep_squares >= 0
+    ep_square = ep_squares[has_ep]
+    planes[np.flatnonzero(has_ep), EN_PASSANT_PLANE, ep_square // 8, ep_square % 8] = 1
+
+    return np.ascontiguousarray(planes[:, :, ::-1, :])  # Flip row for display
+
+
+###################################################
+###### Single board encoders ######################
+###################################################
+
+def encode_board(board):
+    """8x8 int8 board observation of a ``chess.Board``."""
+    bits = unpack_bitboards(board_bitboards(board)).reshape(PIECE_PLANES, 64)
+    return (PIECE_VALUES @ bits).astype(np.int8).reshape(8, 8)[::-1].copy()
+
+
+def encode_planes(board):
+    """``(18, 8, 8)`` plane observation of a ``chess.Board``."""
+    planes = np.zeros((PLANE_COUNT, 8, 8), dtype=np.int8)
+    planes[:PIECE_PLANES] = unpack_bitboards(board_bitboards(board))
+
+    if board.turn == chess.WHITE:
+        planes[SIDE_TO_MOVE_PLANE] = 1
+
+    for offset, square in enumerate(CASTLING_SQUARES):
+        if board.castling_rights & chess.BB_SQUARES[square]:
+            planes[CASTLING_PLANES.start + offset] = 1
+
+    if board.ep_square is not None:
+        planes[EN_PASSANT_PLANE, chess.square_rank(board.ep_square), chess.square_file(board.ep_square)] = 1
+
+    return planes[:, ::-1, :].copy()  # Flip row for display
+
+
+###################################################
+###### Incremental updates ########################
+###################################################
+
+def touched_squares(board, move):
+    """Squares whose piece changes when ``move`` is pushed on ``board``.
+
+    Must be called before the push.  Covers the rook of a castling move
+    (both the ``e1g1`` and ``e1h1`` forms) and the pawn taken en passant.
+    """
+    from_square, to_square = move.from_square, move.to_square
+
+    if board.is_castling(move):
+        rank = chess.square_rank(from_square) * 8
+        if chess.square_file(to_square) > chess.square_file(from_square):
+            return (from_square, rank + 7, rank + 6, rank + 5)  # King side: h, g & f files
+        return (from_square, rank, rank + 2, rank + 3)  # Queen side: a, c & d files
+
+    if board.is_en_passant(move):
+        return (from_square, to_square, chess.square(chess.square_file(to_square), chess.square_rank(from_square)))
+
+    return (from_square, to_square)
+
+
+def patch_observation(observation, board, squares, mode):
+    """Rewrites ``squares`` of ``observation`` in place from ``board``.
+
+    ``board`` is the position after the move.  In ``"planes"`` mode the side
+    to move, castling and en passant planes are refreshed as well.
+    """
+    planes = mode == "planes"
+
+    for square in squares:
+        row, column = 7 - (square >> 3), square & 7  # Row 0 is rank 8
+        piece_type = board.piece_type_at(square)
+
+        if not planes:
+            if piece_type is None:
+                observation[row, column] = 0
+            elif board.occupied_co[chess.WHITE] & chess.BB_SQUARES[square]:
+                observation[row, column] = piece_type
+            else:
+                observation[row, column] = -piece_type
+            continue
+
+        observation[:PIECE_PLANES, row, column] = 0
+        if piece_type is not None:
+            is_white = bool(board.occupied_co[chess.WHITE] & chess.BB_SQUARES[square])
+            observation[piece_type - 1 + (0 if is_white else 6), row, column] = 1
+
+    if planes:
+        observation[SIDE_TO_MOVE_PLANE] = board.turn == chess.WHITE
+
+        for offset, square in enumerate(CASTLING_SQUARES):
+            observation[CASTLING_PLANES.start + offset] = bool(board.castling_rights & chess.BB_SQUARES[square])
+
+        observation[EN_PASSANT_PLANE] = 0
+        if board.ep_square is not None:
+            observation[EN_PASSANT_PLANE, 7 - chess.square_rank(board.ep_square), chess.square_file(board.ep_square)] = 1
+
+    return observation
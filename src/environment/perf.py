@@ -0,0 +1,88 @@
+"""Opt-in latency recording for the environments.
+
+A :class:`PerfRecorder` keeps, per named section, the call count, the total
+time and a window of recent durations for percentiles.  Environments only
+create one when asked to (``ChessEnv(perf=True)``), so the disabled path
+never calls into this module.
+"""
+
+import time
+from collections import deque
+
+import numpy as np
+
+DEFAULT_WINDOW = 100_000  # Recent durations kept per section for percentiles
+PERCENTILES = (50, 90, 99)
+
+
+class PerfRecorder:
+    """Call counts, cumulative and percentile latencies per section."""
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self._calls = {}
+        self._totals = {}
+        self._samples = {}
+        self._start = self._mark = 0.0
+
+    def record(self, name, seconds):
+        if name not in self._calls:
+            self._calls[name] = 0
+            self._totals[name] = 0.0
+            self._samples[name] = deque(maxlen=self.window)
+
+        self._calls[name] += 1
+        self._totals[name] += seconds
+        self._samples[name].append(seconds)
+
+    ###################################################
+    ###### Timers #####################################
+    ###################################################
+
+    def start(self):
+        """Starts a sequence of :meth:`lap` calls."""
+        self._start = self._mark = time.perf_counter()
+
+    def lap(self, name):
+        """Records the time since :meth:`start` or the previous lap."""
+        now = time.perf_counter()
+        self.record(name, now - self._mark)
+        self._mark = now
+
+    def stop(self, name):
+        """Records the time since :meth:`start`."""
+        self.record(name, time.perf_counter() - self._start)
+
+    def timed(self, name, func):
+        """Wraps ``func`` so every call is recorded under ``name``."""
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start)
+
+        wrapper.__wrapped__ = func
+        return wrapper
+
+    ###################################################
+    ###### Results ####################################
+    ###################################################
+
+    def stats(self):
+        """``{section: {"calls", "total_us", "mean_us", "p50_us", ...}}``."""
+        stats = {}
+        for name, calls in self._calls.items():
+            total = self._totals[name]
+            percentiles = np.percentile(np.fromiter(self._samples[name], dtype=np.float64), PERCENTILES)
+            stats[name] = {
+                "calls": calls,
+                "total_us": total * 1e6,
+                "mean_us": total / calls * 1e6,
+                **{f"p{q}_us": value * 1e6 for q, value in zip(PERCENTILES, percentiles)},
+            }
+        return stats
@@ -0,0 +1,123 @@
+"""Bounded LRU cache of per-position environment data.
+
+Self-play keeps revisiting the same opening positions, so the legal action
+mask, observation and terminal status of a position are worth keeping
+instead of recomputing.  :class:`PositionCache` maps a position key (a
+Zobrist hash, see :mod:`environment.zobrist`) to a :class:`PositionEntry`,
+evicts the least recently used entries beyond a memory cap and counts hits,
+misses and evictions.
+
+The cache is process-local: each worker process of a vectorised env holds its
+own.  One cache can be shared by several envs of the same process as long as
+they use the same observation format, since the entries hold observations.
+"""
+
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Bytes of dict, tuple & array headers per entry on top of the array data.
+ENTRY_OVERHEAD = 400
+
+# ``mask`` holds the legal action mask packed with np.packbits. ``status`` is
+# (is_checkmate, is_stalemate, is_insufficient_material) for ChessEnv and
+# empty for SimpleChessEnv, whose episodes do not end on board states.
+PositionEntry = namedtuple("PositionEntry", ("mask", "observation", "status"))
+
+
+def _read_only(array):
+    array = np.array(array)  # Own copy, so the caller's array stays writable
+    array.setflags(write=False)
+    return array
+
+
+def resolve_cache(cache):
+    """The ``cache`` option of the envs: ``None``/``False`` for no cache,
+    ``True`` for a private :class:`PositionCache`, or a cache to share."""
+    if isinstance(cache, PositionCache):
+        return cache
+    return PositionCache() if cache else None
+
+
+class PositionCache:
+    """LRU cache of :class:`PositionEntry` objects with a memory cap."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        if max_bytes <= 0:
+            raise ValueError(f"max_bytes must be positive, got {max_bytes}")
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self.clear()
+
+    def clear(self):
+        """Drops every entry and resets the counters."""
+        self._entries.clear()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @staticmethod
+    def entry_bytes(entry):
+        return entry.mask.nbytes + entry.observation.nbytes + ENTRY_OVERHEAD
+
+    def get(self, key):
+        """The entry of ``key``, or ``None``. Counts a hit or a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, mask, observation, status):
+        """Stores read-only copies of a position's data and returns the entry.
+
+        ``mask`` is a boolean action mask; it is stored bit-packed.
+        """
+        entry = PositionEntry(
+            _read_only(np.packbits(mask)),
+            _read_only(observation),
+            tuple(bool(flag) for flag in status),
+        )
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= self.entry_bytes(previous)
+
+        self._entries[key] = entry
+        self.bytes += self.entry_bytes(entry)
+
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= self.entry_bytes(evicted)
+            self.evictions += 1
+
+        return entry
+
+    @staticmethod
+    def unpack_mask(entry, size):
+        """Boolean action mask of ``size`` actions stored in ``entry``."""
+        return np.unpackbits(entry.mask, count=size).astype(bool)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,133 @@
+"""Memory-mapped files of packed positions.
+
+A store file is a 64-byte header followed by fixed-width
+:data:`~environment.positions.POSITION_DTYPE` records, so record ``i`` sits
+at a known offset and any slice is read in O(1) without loading the rest of
+the file.  :class:`PositionStoreWriter` appends records in bulk and
+:class:`PositionStore` maps the file read-only and turns slices into the
+observations ``ChessEnv`` returns, one vectorised call per slice::
+
+    with PositionStoreWriter("positions.bin") as writer:
+        writer.append(pack_boards(boards))
+
+    store = PositionStore("positions.bin")
+    observations = store.observations(slice(0, 4096), mode="planes")
+    env = ChessEnv(position_pool=store.pool())
+"""
+
+import os
+import struct
+
+import numpy as np
+
+from .positions import POSITION_DTYPE, PositionPool, encode_positions, pack_boards
+
+MAGIC = b"CHESSPOS"
+VERSION = 1
+HEADER_SIZE = 64
+
+# magic, version, record size, record count; the rest of the header is zero.
+_HEADER = struct.Struct("<8sIIQ")
+
+
+def _read_header(handle, path):
+    header = handle.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE:
+        raise ValueError(f"{path} is not a position store: header too short")
+
+    magic, version, record_size, count = _HEADER.unpack_from(header)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a position store: bad magic {magic!r}")
+    if version != VERSION or record_size != POSITION_DTYPE.itemsize:
+        raise ValueError(
+            f"{path} has format version {version} with {record_size}-byte records, "
+            f"expected version {VERSION} with {POSITION_DTYPE.itemsize}-byte records"
+        )
+    return count
+
+
+def _write_header(handle, count):
+    handle.seek(0)
+    handle.write(_HEADER.pack(MAGIC, VERSION, POSITION_DTYPE.itemsize, count).ljust(HEADER_SIZE, b"\0"))
+
+
+class PositionStoreWriter:
+    """Appends packed positions to a store file, creating it if needed.
+
+    The record count in the header is rewritten after every :meth:`append`,
+    so readers opened later see every complete batch.  ``overwrite=True``
+    truncates an existing file.
+    """
+
+    def __init__(self, path, overwrite=False):
+        self.path = os.fspath(path)
+
+        if overwrite or not os.path.exists(self.path):
+            self._handle = open(self.path, "w+b")
+            self.count = 0
+            _write_header(self._handle, 0)
+        else:
+            self._handle = open(self.path, "r+b")
+            self.count = _read_header(self._handle, self.path)
+
+        # Drops any partial batch left after the last header update
+        self._handle.truncate(HEADER_SIZE + self.count * POSITION_DTYPE.itemsize)
+
+    def append(self, records):
+        """Appends a ``POSITION_DTYPE`` array in one write; returns the new count."""
+        records = np.ascontiguousarray(records)
+        if records.dtype != POSITION_DTYPE:
+            raise ValueError(f"records must have dtype POSITION_DTYPE, got {records.dtype}")
+
+        self._handle.seek(0, os.SEEK_END)
+        self._handle.write(records.tobytes())
+        self.count += len(records)
+        _write_header(self._handle, self.count)
+        self._handle.flush()
+        return self.count
+
+    def append_boards(self, boards):
+        return self.append(pack_boards(boards))
+
+    def close(self):
+        if not self._handle.closed:
+            self._handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PositionStore:
+    """Read-only memory map of a store file.
+
+    Resident memory only grows with the pages actually read, whatever the
+    size of the file.
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        with open(self.path, "rb") as handle:
+            count = _read_header(handle, self.path)
+
+        if count == 0:
+            self.records = np.zeros(0, dtype=POSITION_DTYPE)
+        else:
+            self.records = np.memmap(self.path, dtype=POSITION_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+    def observations(self, index=slice(None), mode="board"):
+        """``ChessEnv`` observations of the records at ``index`` (a slice or
+        an array of indices), ``(N, 8, 8)`` or ``(N, 18, 8, 8)``."""
+        return encode_positions(self.records[index], mode)
+
+    def pool(self):
+        """:class:`~environment.positions.PositionPool` over the mapped records."""
+        return PositionPool(self.records)
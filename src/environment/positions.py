@@ -0,0 +1,126 @@
+"""Packed fixed-width chess positions and a pool to sample start positions.
+
+A position is one :data:`POSITION_DTYPE` record: the twelve piece bitboards
+(White pawn..king, then Black pawn..king, as in
+:func:`~environment.observation.board_bitboards`), the side to move, the
+python-chess castling rights mask, the en passant square (``-1`` for none)
+and both move clocks.  Records load into a ``chess.Board`` by assigning the
+bitboards directly, so no FEN is parsed when an episode starts.
+
+:class:`PositionPool` holds a large array of records and samples one in
+O(1); ``ChessEnv(position_pool=...)`` starts every episode from a sample.
+"""
+
+import chess
+import numpy as np
+
+from .observation import board_bitboards, board_from_bitboards, planes_from_bitboards, validate_observation_mode
+
+POSITION_DTYPE = np.dtype([
+    ("pieces", "<u8", (12,)),
+    ("turn", "u1"),  # 1 for White to move
+    ("castling", "<u8"),
+    ("ep_square", "i1"),
+    ("halfmove_clock", "<u2"),
+    ("fullmove_number", "<u2"),
+])
+
+
+def pack_board(board):
+    """``POSITION_DTYPE`` record of a ``chess.Board`` (its move stack is dropped)."""
+    record = np.zeros((), dtype=POSITION_DTYPE)
+    record["pieces"] = board_bitboards(board)
+    record["turn"] = board.turn == chess.WHITE
+    record["castling"] = board.castling_rights
+    record["ep_square"] = -1 if board.ep_square is None else board.ep_square
+    record["halfmove_clock"] = board.halfmove_clock
+    record["fullmove_number"] = board.fullmove_number
+    return record
+
+
+def pack_boards(boards):
+    """``POSITION_DTYPE`` array of many boards."""
+    return np.array([pack_board(board) for board in boards], dtype=POSITION_DTYPE)
+
+
+def pack_fens(fens):
+    """``POSITION_DTYPE`` array of FEN strings, parsed once up front."""
+    return pack_boards(chess.Board(fen) for fen in fens)
+
+
+def encode_positions(records, mode="board"):
+    """``ChessEnv`` observations of a ``POSITION_DTYPE`` array in one
+    vectorised call: ``(N, 8, 8)`` boards or ``(N, 18, 8, 8)`` planes."""
+    validate_observation_mode(mode)
+    records = np.atleast_1d(records)
+
+    if mode == "planes":
+        return planes_from_bitboards(records["pieces"], records["turn"], records["castling"], records["ep_square"])
+    return board_from_bitboards(records["pieces"])
+
+
+def load_position(board, record):
+    """Sets ``board`` to a packed position in place and clears its move stack."""
+    white = black = 0
+    by_type = []
+    pieces = record["pieces"].tolist()  # Python ints, as python-chess expects
+
+    for piece_type in range(6):
+        white_bb, black_bb = pieces[piece_type], pieces[piece_type + 6]
+        by_type.append(white_bb | black_bb)
+        white |= white_bb
+        black |= black_bb
+
+    board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings = by_type
+    board.promoted = chess.BB_EMPTY
+    board.occupied_co[chess.WHITE] = white
+    board.occupied_co[chess.BLACK] = black
+    board.occupied = white | black
+
+    ep_square = int(record["ep_square"])
+    board.turn = bool(record["turn"])
+    board.castling_rights = int(record["castling"])
+    board.ep_square = None if ep_square < 0 else ep_square
+    board.halfmove_clock = int(record["halfmove_clock"])
+    board.fullmove_number = int(record["fullmove_number"])
+    board.clear_stack()
+    return board
+
+
+def unpack_board(record):
+    """New ``chess.Board`` of a packed position."""
+    return load_position(chess.Board(), record)
+
+
+class PositionPool:
+    """Start positions held in one packed ``POSITION_DTYPE`` array.
+
+    ``positions`` may be any array-like of records, including a memory-mapped
+    one; it is not copied.
+    """
+
+    def __init__(self, positions):
+        positions = np.asarray(positions)
+        if positions.dtype != POSITION_DTYPE:
+            raise ValueError(f"positions must have dtype POSITION_DTYPE, got {positions.dtype}")
+        if positions.ndim != 1 or len(positions) == 0:
+            raise ValueError("positions must be a non-empty 1-D array")
+        self.positions = positions
+
+    @classmethod
+    def from_fens(cls, fens):
+        return cls(pack_fens(fens))
+
+    @classmethod
+    def from_boards(cls, boards):
+        return cls(pack_boards(boards))
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, index):
+        return self.positions[index]
+
+    def sample(self, rng):
+        """One record drawn uniformly with the ``np.random.Generator`` ``rng``."""
+        return self.positions[rng.integers(len(self.positions))]
@@ -0,0 +1,416 @@
+"""Alpha-beta searcher used as a fixed-strength ``ChessEnv`` opponent.
+
+:class:`AlphaBetaSearcher` runs a negamax alpha-beta search with iterative
+deepening, move ordering (transposition table move, then captures by most
+valuable victim / least valuable attacker, promotions and killer moves), a
+bounded transposition table keyed by Zobrist hashes and an optional
+capture-only quiescence search.  Each search stops at ``max_depth`` or when
+its node or time budget runs out, returning the best move of the deepest
+completed iteration.
+
+Leaves are scored with the same terms as the ``ChessEnv`` reward, read from
+an :class:`~environment.evaluator.IncrementalEvaluator` that follows the
+search through push and pop: material balance (scaled so a pawn is worth
+1), central control and king safety, each as the side to move's value minus
+the opponent's.  Most moves into a leaf are scored from their parent's
+score without being pushed, so a depth 1 reply costs about as much as a few
+env steps.
+
+``ChessEnv(opponent=AlphaBetaSearcher())`` answers every agent move with the
+searcher's reply inside ``step``.
+"""
+
+import time
+from collections import OrderedDict, namedtuple
+
+import chess
+
+from .evaluator import CENTRAL_SCORES, CENTRAL_SQUARES, MAX_MATERIAL, PIECE_VALUES, IncrementalEvaluator, king_safety
+from .observation import touched_squares
+from .zobrist import zobrist_hash, zobrist_toggle
+
+DEFAULT_MAX_DEPTH = 1
+DEFAULT_TT_ENTRIES = 200_000
+CHECK_INTERVAL = 256  # Nodes between time budget checks
+
+MATE_SCORE = 10_000.0
+MATE_BOUND = MATE_SCORE - 1_000  # Scores beyond this are mates, whatever their distance
+INFINITY = float("inf")
+
+# Empty-board lines through each square, for sliding checks.
+STRAIGHT_LINES = tuple(chess.BB_RANK_ATTACKS[square][0] | chess.BB_FILE_ATTACKS[square][0] for square in chess.SQUARES)
+DIAGONAL_LINES = tuple(chess.BB_DIAG_ATTACKS[square][0] for square in chess.SQUARES)
+
+# Transposition table bounds.
+EXACT, LOWER, UPPER = 0, 1, 2
+
+SearchResult = namedtuple("SearchResult", ("move", "score", "depth", "nodes", "seconds", "tt_hits"))
+TableEntry = namedtuple("TableEntry", ("depth", "score", "bound", "move"))
+
+
+class SearchAborted(Exception):
+    """Raised inside the search when the node or time budget runs out."""
+
+
+class AlphaBetaSearcher:
+    """Iterative deepening alpha-beta search over ``chess.Board`` positions.
+
+    ``max_nodes`` and ``time_limit`` (seconds) bound each search; either may
+    be ``None``.  The transposition table keeps at most ``tt_entries``
+    positions, dropping the oldest first, and is kept between searches.
+    """
+
+    def __init__(
+        self,
+        max_depth=DEFAULT_MAX_DEPTH,
+        max_nodes=None,
+        time_limit=None,
+        quiescence=False,
+        tt_entries=DEFAULT_TT_ENTRIES,
+    ):
+        if max_depth < 1:
+            raise ValueError(f"max_depth must be at least 1, got {max_depth}")
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.quiescence = quiescence
+        self.tt_entries = tt_entries
+
+        self.table = OrderedDict()
+        self.last_result = None
+
+    def clear(self):
+        """Empties the transposition table, e.g. between games."""
+        self.table.clear()
+
+    def select_move(self, board):
+        """Best move for the side to move on ``board`` (left unchanged)."""
+        return self.search(board).move
+
+    ###################################################
+    ###### Search #####################################
+    ###################################################
+
+    def search(self, board):
+        """Searches ``board`` and returns a :class:`SearchResult`."""
+        self.board = board.copy(stack=False)
+        self.evaluator = IncrementalEvaluator(self.board)
+        self.key = zobrist_hash(self.board)
+        self._squares = []  # Touched squares of every pushed move, for _pop
+        self.killers = [[None, None] for _ in range(self.max_depth + 1)]
+        self.nodes = 0
+        self.tt_hits = 0
+        self.start = time.perf_counter()
+        self.deadline = None if self.time_limit is None else self.start + self.time_limit
+
+        best_move, best_score, depth_reached = None, 0.0, 0
+        for depth in range(1, self.max_depth + 1):
+            try:
+                score, move = self._root(depth, best_move)
+            except SearchAborted:
+                break
+            best_move, best_score, depth_reached = move, score, depth
+            if abs(score) >= MATE_SCORE - self.max_depth:
+                break  # A forced mate was found, deeper searches cannot improve it
+
+        if best_move is None:  # Out of budget before depth 1 finished
+            best_move = next(iter(self._ordered_moves(None, 0)), None)
+
+        self.last_result = SearchResult(
+            best_move, best_score, depth_reached, self.nodes, time.perf_counter() - self.start, self.tt_hits
+        )
+        return self.last_result
+
+    def _root(self, depth, previous_best):
+        alpha, best_move = -INFINITY, None
+        leaf = self._leaf_context() if depth == 1 and not self.quiescence else None
+        for move in self._ordered_moves(previous_best, 0):
+            score = self._child_score(move, depth, 1, -INFINITY, -alpha, leaf)
+            if best_move is None or score > alpha:
+                alpha, best_move = score, move
+        return alpha, best_move
+
+    def _negamax(self, depth, ply, alpha, beta):
+        self._count_node()
+        board = self.board
+
+        if board.is_insufficient_material() or board.halfmove_clock >= 100:
+            return 0.0
+        if depth <= 0:
+            if board.is_check() and not any(board.generate_legal_moves()):
+                return -MATE_SCORE + ply  # Leaves are only checked for mate
+            return self._quiesce(alpha, beta, ply) if self.quiescence else self.evaluate()
+
+        original_alpha = alpha
+        entry = self.table.get(self.key)
+        table_move = None
+        if entry is not None:
+            table_move = entry.move
+            if entry.depth >= depth:
+                self.tt_hits += 1
+                score = _score_from_table(entry.score, ply)
+                if entry.bound == EXACT:
+                    return score
+                if entry.bound == LOWER:
+                    alpha = max(alpha, score)
+                elif entry.bound == UPPER:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+
+        best_score, best_move = -INFINITY, None
+        leaf = self._leaf_context() if depth == 1 and not self.quiescence else None
+        for move in self._ordered_moves(table_move, ply):
+            score = self._child_score(move, depth, ply + 1, -beta, -alpha, leaf)
+
+            if score > best_score:
+                best_score, best_move = score, move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                if not board.is_capture(move):
+                    self._store_killer(move, ply)
+                break
+
+        if best_move is None:  # No legal move
+            return -MATE_SCORE + ply if board.is_check() else 0.0
+
+        if best_score <= original_alpha:
+            bound = UPPER
+        elif best_score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self._store(depth, _score_to_table(best_score, ply), bound, best_move)
+        return best_score
+
+    def _child_score(self, move, depth, ply, alpha, beta, leaf):
+        # Score of ``move`` for the side making it. Moves into a leaf are
+        # scored from the parent's score without a push when possible
+        if leaf is not None:
+            score = self._static_score(move, *leaf)
+            if score is not None:
+                self._count_node()
+                return score
+
+        self._push(move)
+        try:
+            return -self._negamax(depth - 1, ply, alpha, beta)
+        finally:
+            self._pop()
+
+    def _quiesce(self, alpha, beta, ply):
+        # Captures only, so leaves are not scored in the middle of an exchange
+        stand_pat = self.evaluate()
+        if stand_pat >= beta:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+
+        board = self.board
+        for move in self._ordered_captures():
+            self._count_node()
+            self._push(move)
+            try:
+                score = -self._quiesce(-beta, -alpha, ply + 1)
+            finally:
+                self._pop()
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+
+        return alpha
+
+    ###################################################
+    ###### Evaluation & ordering ######################
+    ###################################################
+
+    def evaluate(self):
+        """Score of the current position for the side to move."""
+        evaluator = self.evaluator
+        color = self.board.turn
+        return (
+            evaluator.material_balance(color) * MAX_MATERIAL
+            + evaluator.central_control(color) - evaluator.central_control(not color)
+            + evaluator.king_safety(color) - evaluator.king_safety(not color)
+        )
+
+    def _leaf_context(self):
+        # What _static_score needs from the parent position: its score, the
+        # side to move's pieces that may discover a check by moving and its
+        # king safety difference
+        board = self.board
+        color = board.turn
+        king = board.king(not color)
+        sliders = (
+            (STRAIGHT_LINES[king] & (board.rooks | board.queens))
+            | (DIAGONAL_LINES[king] & (board.bishops | board.queens))
+        ) & board.occupied_co[color]
+
+        discoverers = 0
+        for slider in chess.scan_reversed(sliders):
+            blockers = chess.between(king, slider) & board.occupied
+            if chess.popcount(blockers) == 1:
+                discoverers |= blockers
+
+        evaluator = self.evaluator
+        safety = evaluator.king_safety(color) - evaluator.king_safety(not color)
+        return self.evaluate(), discoverers & board.occupied_co[color], safety
+
+    def _gives_check(self, move, piece, discoverers):
+        # board.gives_check without its push & pop, for moves other than
+        # castling, en passant & promotions
+        if chess.BB_SQUARES[move.from_square] & discoverers:
+            return True  # May open a line to the king (or run along it)
+
+        board = self.board
+        to_square = move.to_square
+        king = board.king(not board.turn)
+        king_bb = chess.BB_SQUARES[king]
+        if piece == chess.PAWN:
+            return bool(chess.BB_PAWN_ATTACKS[board.turn][to_square] & king_bb)
+        if piece == chess.KNIGHT:
+            return bool(chess.BB_KNIGHT_ATTACKS[to_square] & king_bb)
+        if piece == chess.KING:
+            return False
+
+        lines = 0
+        if piece != chess.BISHOP:
+            lines |= STRAIGHT_LINES[king]
+        if piece != chess.ROOK:
+            lines |= DIAGONAL_LINES[king]
+        if not chess.BB_SQUARES[to_square] & lines:
+            return False
+        occupied = board.occupied & ~chess.BB_SQUARES[move.from_square]
+        return not chess.between(to_square, king) & occupied
+
+    def _static_score(self, move, stand, discoverers, safety):
+        # evaluate() after ``move`` for the side making it, worked out from
+        # the score ``stand`` before it without pushing. None for checks,
+        # which may mate, castling, en passant and promotions: those are
+        # searched with a push
+        board = self.board
+        if move.promotion or board.is_castling(move) or board.is_en_passant(move):
+            return None
+
+        piece = board.piece_type_at(move.from_square)
+        if self._gives_check(move, piece, discoverers):
+            return None
+
+        color = board.turn
+        from_bb, to_bb = chess.BB_SQUARES[move.from_square], chess.BB_SQUARES[move.to_square]
+        evaluator = self.evaluator
+        victim = board.piece_type_at(move.to_square)
+
+        own, other = evaluator.central_count(color), evaluator.central_count(not color)
+        own_after = own - bool(from_bb & CENTRAL_SQUARES) + bool(to_bb & CENTRAL_SQUARES)
+        other_after = other - bool(victim and to_bb & CENTRAL_SQUARES)
+
+        score = (
+            stand
+            + (PIECE_VALUES[victim] if victim else 0)
+            + CENTRAL_SCORES[own_after] - CENTRAL_SCORES[own]
+            - (CENTRAL_SCORES[other_after] - CENTRAL_SCORES[other])
+        )
+        if piece != chess.PAWN and piece != chess.KING and victim != chess.PAWN:
+            return score  # King safety only depends on the kings and pawns
+
+        pawns, own_pawns = board.pawns, board.pawns & board.occupied_co[color]
+        own_king, other_king = board.king(color), board.king(not color)
+        if victim == chess.PAWN:
+            pawns &= ~to_bb
+        if piece == chess.PAWN:
+            pawns = pawns & ~from_bb | to_bb
+            own_pawns = own_pawns & ~from_bb | to_bb
+        elif piece == chess.KING:
+            own_king = move.to_square
+        after = king_safety(color, own_king, pawns, own_pawns) - king_safety(
+            not color, other_king, pawns, pawns & ~own_pawns
+        )
+        return score + after - safety
+
+    def _capture_order(self, move):
+        board = self.board
+        victim = board.piece_type_at(move.to_square) or chess.PAWN  # None for en passant
+        attacker = board.piece_type_at(move.from_square)
+        return PIECE_VALUES[victim] * 10 - PIECE_VALUES[attacker] + (PIECE_VALUES[move.promotion] * 10 if move.promotion else 0)
+
+    def _ordered_moves(self, table_move, ply):
+        board = self.board
+        killers = self.killers[ply] if ply < len(self.killers) else (None, None)
+        captures, killer_moves, quiet = [], [], []
+
+        for move in board.legal_moves:
+            if move == table_move:
+                continue
+            if move.promotion or board.is_capture(move):
+                captures.append(move)
+            elif move in killers:
+                killer_moves.append(move)
+            else:
+                quiet.append(move)
+
+        captures.sort(key=self._capture_order, reverse=True)
+        ordered = captures + killer_moves + quiet
+        if table_move is not None and board.is_legal(table_move):
+            ordered.insert(0, table_move)
+        return ordered
+
+    def _ordered_captures(self):
+        captures = list(self.board.generate_legal_captures())
+        captures.sort(key=self._capture_order, reverse=True)
+        return captures
+
+    def _store_killer(self, move, ply):
+        if ply < len(self.killers):
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1], killers[0] = killers[0], move
+
+    def _store(self, depth, score, bound, move):
+        table = self.table
+        table[self.key] = TableEntry(depth, score, bound, move)
+        table.move_to_end(self.key)
+        if len(table) > self.tt_entries:
+            table.popitem(last=False)
+
+    ###################################################
+    ###### Moves & budget #############################
+    ###################################################
+
+    def _push(self, move):
+        squares = touched_squares(self.board, move)
+        self.key ^= zobrist_toggle(self.board, squares)
+        self.evaluator.push(move, squares)
+        self.key ^= zobrist_toggle(self.board, squares)
+        self._squares.append(squares)
+
+    def _pop(self):
+        squares = self._squares.pop()
+        self.key ^= zobrist_toggle(self.board, squares)
+        self.evaluator.pop()
+        self.key ^= zobrist_toggle(self.board, squares)
+
+    def _count_node(self):
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchAborted
+        if self.deadline is not None and self.nodes % CHECK_INTERVAL == 0 and time.perf_counter() > self.deadline:
+            raise SearchAborted
+
+
+def _score_to_table(score, ply):
+    # Mate scores count plies from the root; the table stores them as plies
+    # from the node, so they stay right when the node is reached at another ply
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def _score_from_table(score, ply):
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
@@ -11,14 +11,20 @@ Curriculum stages, in order:
     2. ``capture_piece`` - capture a single static opponent piece.
 
 Both stages keep the standard Gymnasium ``reset``/``step`` contract used by the
-full environment, and :meth:`SimpleChessEnv.legal_actions` is exposed so action
-masking can be added when the curriculum is extended.
+full environment, and :meth:`SimpleChessEnv.action_masks` exposes the legal
+actions for masked training with ``sb3-contrib``'s ``MaskablePPO``.
 """
 
 import chess
 import gymnasium as gym
 import numpy as np
 
+from .action_codec import ACTION_CODEC, BOARD_SQUARES
+from .info_levels import INFO_FULL, INFO_NONE, validate_info_level
+from .observation import PLANE_COUNT, encode_board, encode_planes, validate_observation_mode
+from .position_cache import PositionCache, resolve_cache
+from .zobrist import zobrist_hash
+
 # Stage identifiers
 STAGE_REACH_SQUARE = "reach_square"
 STAGE_CAPTURE_PIECE = "capture_piece"
@@ -44,12 +50,6 @@ OPPONENT_PIECE_TYPES = {
     "queen": chess.QUEEN,
 }
 
-# Same board encoding used by the full chess environment.
-PIECE_ENCODING = {
-    'P': 1, 'N': 2, 'B': 3, 'R': 4, 'Q': 5, 'K': 6,
-    'p': -1, 'n': -2, 'b': -3, 'r': -4, 'q': -5, 'k': -6,
-}
-
 # Bonus on top of the goal reward, matching the capture values of the full env.
 CAPTURE_PIECE_VALUES = {
     chess.PAWN: 0.1,
@@ -59,8 +59,6 @@ CAPTURE_PIECE_VALUES = {
     chess.QUEEN: 0.9,
 }
 
-BOARD_SQUARES = 64
-
 
 class SimpleChessEnv(gym.Env):
     """Single piece chess task with a dense, easy to debug reward signal."""
@@ -78,6 +76,9 @@ class SimpleChessEnv(gym.Env):
         illegal_move_penalty=-0.1,
         goal_reward=1.0,
         distance_reward_scale=0.1,
+        observation_mode="board",
+        info_level=INFO_FULL,
+        cache=None,
     ):
         super(SimpleChessEnv, self).__init__()
 
@@ -94,6 +95,8 @@ class SimpleChessEnv(gym.Env):
                 f"Expected one of {sorted(OPPONENT_PIECE_TYPES)}."
             )
 
+        self.observation_mode = validate_observation_mode(observation_mode)
+        self.info_level = validate_info_level(info_level)
         self.stage = stage
         self.agent_piece = agent_piece
         self.opponent_piece = opponent_piece
@@ -107,15 +110,26 @@ class SimpleChessEnv(gym.Env):
         self.goal_reward = goal_reward
         self.distance_reward_scale = distance_reward_scale
 
-        # Plane 0: piece encoding, plane 1: goal square marker.
-        self.observation_space = gym.spaces.Box(
-            low=-6,
-            high=6,
-            shape=(2, 8, 8),
-            dtype=np.int8,
-        )
+        # Board mode: plane 0 is the piece encoding of the full env.
+        # Planes mode: the 18 bitboard planes of the full env.
+        # The last plane always marks the goal square.
+        if self.observation_mode == "planes":
+            self.observation_space = gym.spaces.Box(
+                low=0,
+                high=1,
+                shape=(PLANE_COUNT + 1, 8, 8),
+                dtype=np.int8,
+            )
+        else:
+            self.observation_space = gym.spaces.Box(
+                low=-6,
+                high=6,
+                shape=(2, 8, 8),
+                dtype=np.int8,
+            )
 
-        # Action index = from_square * 64 + to_square.
+        # Action index = from_square * 64 + to_square, the non-promotion ids
+        # of the shared action codec.
         self.action_space = gym.spaces.Discrete(BOARD_SQUARES * BOARD_SQUARES)
 
         self.agent_color = chess.WHITE
@@ -126,44 +140,89 @@ class SimpleChessEnv(gym.Env):
         self.illegal_moves_count = 0
         self.done = False
 
+        # Optional LRU cache of legal masks & observations, keyed by the
+        # Zobrist hash of the board and the target square. True creates a
+        # private PositionCache, or pass one to share it in this process
+        self.position_cache = resolve_cache(cache)
+        self._entry = None
+
     ###################################################
     ###### Action encoding / decoding helpers #########
     ###################################################
 
     def encode_action(self, move):
         """Maps a chess move object to its discrete action index."""
-        return move.from_square * BOARD_SQUARES + move.to_square
+        return ACTION_CODEC.encode(move)
 
     def decode_action(self, action):
         """Maps a discrete action index to a chess move object."""
         action = int(action)
         if not 0 <= action < self.action_space.n:
             raise ValueError(f"Invalid action index: {action}")
-        return chess.Move(action // BOARD_SQUARES, action % BOARD_SQUARES)
+        return ACTION_CODEC.decode(action)
 
     def legal_actions(self):
-        """Action indices of every legal move, useful for future action masking."""
+        """Action indices of every legal move."""
+        if self.position_cache is not None:
+            return np.flatnonzero(self._legal_mask()).tolist()
         return [self.encode_action(move) for move in self.board.legal_moves]
 
+    def _legal_mask(self):
+        if self.position_cache is not None:
+            return PositionCache.unpack_mask(self._cache_entry(), self.action_space.n)
+        mask = np.zeros(self.action_space.n, dtype=bool)
+        mask[self.legal_actions()] = True
+        return mask
+
+    def action_masks(self):
+        """Boolean mask of legal actions, read by MaskablePPO (sb3-contrib)."""
+        mask = self._legal_mask()
+        if not mask.any():  # Keep the action distribution valid
+            mask[:] = True
+        return mask
+
     ###################################################
     ###### Board / observation helpers ################
     ###################################################
 
     def get_observation(self):
-        observation = np.zeros((2, 8, 8), dtype=np.int8)
+        if self.position_cache is not None:
+            return self._cache_entry().observation.copy()
+        return self._build_observation()
+
+    def _build_observation(self):
+        observation = np.zeros(self.observation_space.shape, dtype=np.int8)
 
-        for square, piece in self.board.piece_map().items():
-            row = 7 - chess.square_rank(square)  # Flip row for display
-            col = chess.square_file(square)
-            observation[0][row][col] = PIECE_ENCODING[piece.symbol()]
+        if self.observation_mode == "planes":
+            observation[:PLANE_COUNT] = encode_planes(self.board)
+        else:
+            observation[0] = encode_board(self.board)
 
         if self.target_square is not None:
-            row = 7 - chess.square_rank(self.target_square)
+            row = 7 - chess.square_rank(self.target_square)  # Flip row for display
             col = chess.square_file(self.target_square)
-            observation[1][row][col] = 1
+            observation[-1][row][col] = 1
 
         return observation
 
+    def _cache_entry(self):
+        """Cache entry of the current board and target, stored on a miss."""
+        if self._entry is None:
+            key = (zobrist_hash(self.board), self.target_square)
+            self._entry = self.position_cache.get(key)
+            if self._entry is None:
+                mask = np.zeros(self.action_space.n, dtype=bool)
+                mask[[self.encode_action(move) for move in self.board.legal_moves]] = True
+                # No terminal status: episodes end on goals and step limits
+                self._entry = self.position_cache.put(key, mask, self._build_observation(), ())
+        return self._entry
+
+    def cache_stats(self):
+        """Hits, misses, evictions and memory of the cache (``{}`` when disabled)."""
+        if self.position_cache is None:
+            return {}
+        return self.position_cache.stats()
+
     def distance_to_target(self):
         """Chebyshev distance between the agent piece and the goal square."""
         if self.agent_square is None or self.target_square is None:
@@ -208,6 +267,11 @@ class SimpleChessEnv(gym.Env):
             )
 
     def _build_info(self, reason):
+        # "minimal" keeps only the reason, "full" adds the board metadata
+        if self.info_level == INFO_NONE:
+            return {}
+        if self.info_level != INFO_FULL:
+            return {"reason": reason}
         return {
             "stage": self.stage,
             "reason": reason,
@@ -251,10 +315,12 @@ class SimpleChessEnv(gym.Env):
         self.done = False
 
         self._build_board()
+        self._entry = None
 
         observation = self.get_observation()
         info = self._build_info("reset")
-        info["initial_board_fen"] = self.board.fen()
+        if self.info_level == INFO_FULL:
+            info["initial_board_fen"] = self.board.fen()
 
         return observation, info
 
@@ -265,7 +331,12 @@ class SimpleChessEnv(gym.Env):
 
         # Illegal moves are penalised instead of applied, which keeps the stage
         # aligned with the movement rules of the chosen piece.
-        if move not in self.board.legal_moves:
+        if self.position_cache is not None:
+            is_legal = bool(self._legal_mask()[int(action)])
+        else:
+            is_legal = move in self.board.legal_moves
+
+        if not is_legal:
             self.illegal_moves_count += 1
             terminated = self.illegal_moves_count >= self.max_illegal_moves
             truncated = not terminated and self.steps >= self.max_steps
@@ -289,6 +360,7 @@ class SimpleChessEnv(gym.Env):
         # letting the opponent reply instead.
         self.board.turn = self.agent_color
         self.agent_square = move.to_square
+        self._entry = None
 
         reward = self.step_penalty
         goal_reached = False
@@ -0,0 +1,272 @@
+"""Compact episode logs that replay observations on demand.
+
+:class:`TrajectoryRecorder` wraps an env and appends every episode to a
+binary log as its reset seed and options plus, per step, the uint16 action
+id, the float32 reward and the termination flags: 7 bytes a step instead of
+the 64 (board) or 1152 (planes) bytes of an observation.  The envs are
+deterministic given the reset seed, so :func:`replay_episode` rebuilds the
+observations by resetting a fresh env with the same seed and options and
+stepping it through the recorded actions::
+
+    env = TrajectoryRecorder(ChessEnv(), "episodes.traj")
+    ...  # train or play as usual
+
+    log = TrajectoryLog("episodes.traj")
+    observations = episode_observations(ChessEnv(), log[3])
+
+A log file starts with a header (magic, version, JSON metadata naming the
+env class) followed by one record per episode::
+
+    steps u32 | options size u32 | seed u64 | options | actions u16[steps]
+    | rewards f32[steps] | flags u8[steps]
+
+The options are stored without pickling, so reading a log never runs code:
+a u32 size and a JSON object of the plain options, then the raw
+``POSITION_DTYPE`` bytes of each packed position listed under its
+``"__packed__"`` key.  Records are only appended, and a record cut short by a
+crash is ignored when reading.
+"""
+
+import json
+import os
+import struct
+from collections import namedtuple
+
+import gymnasium as gym
+import numpy as np
+
+from .positions import POSITION_DTYPE
+
+MAGIC = b"CHESSTRJ"
+VERSION = 1
+
+_FILE_HEADER = struct.Struct("<8sII")  # magic, version, metadata size
+_EPISODE_HEADER = struct.Struct("<IIQ")  # steps, options size, seed
+_OPTIONS_HEADER = struct.Struct("<I")  # JSON size
+
+TERMINATED = 1
+TRUNCATED = 2
+
+Episode = namedtuple("Episode", ("seed", "options", "actions", "rewards", "terminated", "truncated"))
+
+
+class TrajectoryRecorder(gym.Wrapper):
+    """Appends every episode of the wrapped env to the log at ``path``.
+
+    Each episode is reset with an explicit seed so it can be replayed: the
+    ``seed`` passed to :meth:`reset`, or else the next draw of a generator
+    seeded by the last explicit seed.  Episodes are written when they end, on
+    the next reset and on :meth:`close`.
+    """
+
+    def __init__(self, env, path, metadata=None):
+        super().__init__(env)
+        self.path = os.fspath(path)
+        self.metadata = {"env": type(env.unwrapped).__name__, **(metadata or {})}
+
+        exists = os.path.exists(self.path) and os.path.getsize(self.path) > 0
+        if exists:
+            with open(self.path, "rb") as handle:
+                _read_file_header(handle, self.path)
+        self._file = open(self.path, "ab")
+        if not exists:
+            metadata_bytes = json.dumps(self.metadata).encode("utf-8")
+            self._file.write(_FILE_HEADER.pack(MAGIC, VERSION, len(metadata_bytes)) + metadata_bytes)
+            self._file.flush()
+
+        self._seeds = None
+        self._seed = None
+        self._options = None
+        self._actions, self._rewards, self._flags = [], [], []
+
+    def reset(self, *, seed=None, options=None):
+        self._write_episode()
+
+        if seed is not None:
+            self._seeds = np.random.default_rng(seed)
+            episode_seed = int(seed)
+        else:
+            if self._seeds is None:
+                self._seeds = np.random.default_rng()
+            episode_seed = int(self._seeds.integers(2**63))
+
+        self._seed = episode_seed
+        self._options = options
+        return self.env.reset(seed=episode_seed, options=options)
+
+    def step(self, action):
+        observation, reward, terminated, truncated, info = self.env.step(action)
+
+        if self._seed is not None:
+            self._actions.append(int(action))
+            self._rewards.append(reward)
+            self._flags.append(TERMINATED * bool(terminated) | TRUNCATED * bool(truncated))
+            if terminated or truncated:
+                self._write_episode()
+
+        return observation, reward, terminated, truncated, info
+
+    def _write_episode(self):
+        if self._seed is None:
+            return
+
+        options = b"" if self._options is None else encode_options(self._options)
+        self._file.write(
+            _EPISODE_HEADER.pack(len(self._actions), len(options), self._seed)
+            + options
+            + np.array(self._actions, dtype="<u2").tobytes()
+            + np.array(self._rewards, dtype="<f4").tobytes()
+            + np.array(self._flags, dtype=np.uint8).tobytes()
+        )
+        self._file.flush()
+
+        self._seed = None
+        self._actions, self._rewards, self._flags = [], [], []
+
+    def close(self):
+        if not self._file.closed:
+            self._write_episode()
+            self._file.close()
+        super().close()
+
+
+def _json_value(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Reset option {value!r} cannot be stored in a trajectory log")
+
+
+def encode_options(options):
+    """Bytes of a reset options dict: JSON for the plain values and the raw
+    bytes of ``POSITION_DTYPE`` records."""
+    plain, packed = {}, []
+    for key, value in options.items():
+        if isinstance(value, (np.ndarray, np.void)) and value.dtype == POSITION_DTYPE:
+            packed.append((key, np.asarray(value, dtype=POSITION_DTYPE).reshape(()).tobytes()))
+        else:
+            plain[key] = value
+    if packed:
+        plain["__packed__"] = [key for key, _ in packed]
+
+    text = json.dumps(plain, default=_json_value).encode("utf-8")
+    return _OPTIONS_HEADER.pack(len(text)) + text + b"".join(data for _, data in packed)
+
+
+def decode_options(data):
+    """Reset options dict of :func:`encode_options` bytes."""
+    (size,) = _OPTIONS_HEADER.unpack_from(data)
+    options = json.loads(bytes(data[_OPTIONS_HEADER.size:_OPTIONS_HEADER.size + size]).decode("utf-8"))
+    offset = _OPTIONS_HEADER.size + size
+    for key in options.pop("__packed__", ()):
+        options[key] = np.frombuffer(data, dtype=POSITION_DTYPE, count=1, offset=offset)[0]
+        offset += POSITION_DTYPE.itemsize
+    return options
+
+
+def _read_file_header(handle, path):
+    header = handle.read(_FILE_HEADER.size)
+    if len(header) < _FILE_HEADER.size:
+        raise ValueError(f"{path} is not a trajectory log: header too short")
+
+    magic, version, metadata_size = _FILE_HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a trajectory log: bad magic {magic!r}")
+    if version != VERSION:
+        raise ValueError(f"{path} has trajectory log version {version}, expected {VERSION}")
+    return json.loads(handle.read(metadata_size).decode("utf-8"))
+
+
+def _record_size(steps, options_size):
+    return _EPISODE_HEADER.size + options_size + steps * (2 + 4 + 1)
+
+
+class TrajectoryLog:
+    """Random access to the episodes of a log written by :class:`TrajectoryRecorder`.
+
+    Opening the log only reads the episode headers; episodes are read when
+    indexed.
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self._offsets = []
+
+        with open(self.path, "rb") as handle:
+            self.metadata = _read_file_header(handle, self.path)
+            offset = handle.tell()
+            end = os.fstat(handle.fileno()).st_size
+
+            while offset + _EPISODE_HEADER.size <= end:
+                handle.seek(offset)
+                steps, options_size, _ = _EPISODE_HEADER.unpack(handle.read(_EPISODE_HEADER.size))
+                size = _record_size(steps, options_size)
+                if offset + size > end:
+                    break  # Cut short by a crash
+                self._offsets.append(offset)
+                offset += size
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __getitem__(self, index):
+        offset = self._offsets[index]
+
+        with open(self.path, "rb") as handle:
+            handle.seek(offset)
+            steps, options_size, seed = _EPISODE_HEADER.unpack(handle.read(_EPISODE_HEADER.size))
+            body = handle.read(_record_size(steps, options_size) - _EPISODE_HEADER.size)
+
+        options = decode_options(body[:options_size]) if options_size else None
+        actions = np.frombuffer(body, dtype="<u2", count=steps, offset=options_size)
+        rewards = np.frombuffer(body, dtype="<f4", count=steps, offset=options_size + 2 * steps)
+        flags = np.frombuffer(body, dtype=np.uint8, count=steps, offset=options_size + 6 * steps)
+        return Episode(seed, options, actions, rewards, (flags & TERMINATED) != 0, (flags & TRUNCATED) != 0)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def total_steps(self):
+        return sum(len(episode.actions) for episode in self)
+
+
+def replay_episode(env, episode, check=True):
+    """Yields ``(observation, action, reward, next_observation, terminated,
+    truncated)`` for each step of ``episode`` replayed on ``env``.
+
+    ``env`` must be built like the recorded one.  With ``check`` a
+    ``RuntimeError`` is raised as soon as a reward or termination flag
+    differs from the recording.
+    """
+    observation, _ = env.reset(seed=episode.seed, options=episode.options)
+
+    for step, action in enumerate(episode.actions):
+        next_observation, reward, terminated, truncated, _ = env.step(int(action))
+
+        if check and (
+            np.float32(reward) != episode.rewards[step]
+            or bool(terminated) != episode.terminated[step]
+            or bool(truncated) != episode.truncated[step]
+        ):
+            raise RuntimeError(
+                f"Replay diverged at step {step}: got reward {reward}, terminated {terminated}, "
+                f"truncated {truncated}; recorded {episode.rewards[step]}, "
+                f"{episode.terminated[step]}, {episode.truncated[step]}"
+            )
+
+        yield observation, int(action), reward, next_observation, terminated, truncated
+        observation = next_observation
+
+
+def episode_observations(env, episode, check=True):
+    """Every observation of ``episode``, from the reset to the last step."""
+    observations = None
+    for observation, _, _, next_observation, _, _ in replay_episode(env, episode, check):
+        if observations is None:
+            observations = [observation]
+        observations.append(next_observation)
+
+    if observations is None:
+        observation, _ = env.reset(seed=episode.seed, options=episode.options)
+        observations = [observation]
+    return np.array(observations)
@@ -0,0 +1,75 @@
+"""Zobrist position keys shared by every environment.
+
+A key XORs one random 64-bit number per (colour, piece type, square), per
+castling rook square, for the en passant square when an en passant capture
+is legal, and for White to move.  ``BatchChessEnv`` computes the same keys
+for a whole batch with NumPy; :func:`zobrist_hash` and :func:`zobrist_toggle`
+are the scalar ``chess.Board`` versions.
+
+Keys are updated incrementally around a move::
+
+    key ^= zobrist_toggle(board, squares)   # before board.push(move)
+    board.push(move)
+    key ^= zobrist_toggle(board, squares)   # after
+
+where ``squares`` are the squares the move touches
+(:func:`~environment.observation.touched_squares`).  XOR removes the parts of
+the old position and adds those of the new one.
+"""
+
+import chess
+import numpy as np
+
+
+def _zobrist_keys():
+    keys = np.random.default_rng(0x5EED).integers(
+        0, np.iinfo(np.uint64).max, size=2 * 6 * 64 + 64 + 64 + 1, dtype=np.uint64, endpoint=True
+    )
+    return keys[:768], keys[768:832], keys[832:896], keys[896]
+
+
+# Pieces are indexed ((colour * 6) + piece_type - 1) * 64 + square, Black = 0.
+ZOBRIST_PIECES, ZOBRIST_CASTLING, ZOBRIST_EP, ZOBRIST_TURN = _zobrist_keys()
+
+# Python int copies: scalar XORs on ints are much faster than on np.uint64.
+_PIECE_KEYS = tuple(int(key) for key in ZOBRIST_PIECES)
+_CASTLING_KEYS = tuple(int(key) for key in ZOBRIST_CASTLING)
+_EP_KEYS = tuple(int(key) for key in ZOBRIST_EP)
+_TURN_KEY = int(ZOBRIST_TURN)
+
+
+def _state_key(board):
+    # Castling rights, legal en passant & side to move
+    key = 0
+    for square in chess.scan_forward(board.castling_rights):
+        key ^= _CASTLING_KEYS[square]
+    if board.ep_square is not None and board.has_legal_en_passant():
+        key ^= _EP_KEYS[board.ep_square]
+    if board.turn == chess.WHITE:
+        key ^= _TURN_KEY
+    return key
+
+
+def _piece_key(board, square):
+    piece_type = board.piece_type_at(square)
+    if piece_type is None:
+        return 0
+    color = bool(board.occupied_co[chess.WHITE] & chess.BB_SQUARES[square])
+    return _PIECE_KEYS[((color * 6) + piece_type - 1) * 64 + square]
+
+
+def zobrist_hash(board):
+    """Full Zobrist key of a ``chess.Board``."""
+    key = _state_key(board)
+    for square in chess.scan_forward(board.occupied):
+        key ^= _piece_key(board, square)
+    return key
+
+
+def zobrist_toggle(board, squares):
+    """XOR of the keys of ``squares`` and of the castling, en passant and
+    side to move state of ``board``."""
+    key = _state_key(board)
+    for square in squares:
+        key ^= _piece_key(board, square)
+    return key
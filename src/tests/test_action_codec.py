@@ -0,0 +1,72 @@
+import unittest
+
+import chess
+import numpy as np
+
+from environment.action_codec import ACTION_CODEC, ACTION_SIZE
+from environment.chess_env import ChessEnv
+from environment.simple_chess_env import SimpleChessEnv
+
+
+class TestActionCodec(unittest.TestCase):
+
+    ###########################################
+    ###### scalar lookups unit testing ########
+    ###########################################
+
+    def test_round_trip(self):
+        self.assertEqual(len(ACTION_CODEC), ACTION_SIZE)
+        for action in (0, 12 * 64 + 28, 4096, 4101, ACTION_SIZE - 1):
+            self.assertEqual(ACTION_CODEC.encode(ACTION_CODEC.decode(action)), action)
+
+    def test_invalid_lookups(self):
+        with self.assertRaises(ValueError):
+            ACTION_CODEC.decode(ACTION_SIZE)
+        with self.assertRaises(ValueError):
+            ACTION_CODEC.encode(chess.Move.from_uci("b7a8q"))  # Capture promotions are not encoded
+
+
+
+    ###########################################
+    ###### batch lookups unit testing #########
+    ###########################################
+
+    def test_batch_matches_scalar(self):
+        actions = np.arange(ACTION_SIZE)
+        from_squares, to_squares, promotions = ACTION_CODEC.decode_batch(actions)
+        for action in (0, 777, 4096, 4159):
+            move = ACTION_CODEC.decode(action)
+            self.assertEqual(from_squares[action], move.from_square)
+            self.assertEqual(to_squares[action], move.to_square)
+            self.assertEqual(promotions[action], move.promotion or 0)
+        np.testing.assert_array_equal(ACTION_CODEC.encode_batch(from_squares, to_squares, promotions), actions)
+
+    def test_batch_unencodable(self):
+        encoded = ACTION_CODEC.encode_batch([chess.B7], [chess.A8], [chess.QUEEN])
+        np.testing.assert_array_equal(encoded, [-1])
+
+
+
+    ###########################################
+    ###### sharing unit testing ###############
+    ###########################################
+
+    def test_codec_is_immutable(self):
+        with self.assertRaises(AttributeError):
+            ACTION_CODEC.size = 1
+        with self.assertRaises(ValueError):
+            ACTION_CODEC.from_squares[0] = 1
+        with self.assertRaises(TypeError):
+            ACTION_CODEC.move_to_action[chess.Move.null()] = 0
+
+    def test_envs_share_tables(self):
+        first, second = ChessEnv(), ChessEnv()
+        self.assertIs(first.all_possible_moves, second.all_possible_moves)
+        self.assertIs(first.move_to_action, ACTION_CODEC.move_to_action)
+        simple = SimpleChessEnv()
+        move = chess.Move(chess.B1, chess.C3)
+        self.assertEqual(simple.encode_action(move), first.move_to_action[move])
+
+
+if __name__ == '__main__':
+    unittest.main()
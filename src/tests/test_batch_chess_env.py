@@ -0,0 +1,118 @@
+import contextlib
+import io
+import random
+import unittest
+
+import chess
+import numpy as np
+
+from environment.batch_chess_env import ACTION_SIZE, DRAW, ONGOING, BatchChessEnv
+from environment.chess_env import ChessEnv
+
+
+class TestBatchChessEnv(unittest.TestCase):
+
+    def setUp(self):
+        self.env = BatchChessEnv(num_envs=4)
+        self.reference = ChessEnv()
+
+
+
+    ##########################################
+    ###### reset unit testing ################
+    ##########################################
+
+    def test_reset_matches_chess_env(self):
+        observation, info = self.env.reset(seed=0)
+        expected, _ = self.reference.reset()
+        self.assertEqual(observation.shape, (4, 8, 8), "Batched observation should be (num_envs, 8, 8).")
+        self.assertEqual(observation.dtype, np.int8)
+        for board_observation in observation:
+            np.testing.assert_array_equal(board_observation, expected)
+
+
+
+    ###########################################
+    ###### step unit testing ##################
+    ###########################################
+
+    def test_step_invalid_action(self):
+        self.env.reset()
+        with self.assertRaises(ValueError):
+            self.env.step([0, 0, 0, 9999])
+
+    def test_step_illegal_move(self):
+        self.env.reset()
+        e2e4 = self.reference.move_to_action[chess.Move.from_uci("e2e4")]
+        _, reward, terminated, _, info = self.env.step([e2e4, 0, e2e4, 0])  # a1a1 is never legal
+        np.testing.assert_allclose(reward[[1, 3]], -0.1)
+        np.testing.assert_array_equal(info["illegal_move"], [False, True, False, True])
+        np.testing.assert_array_equal(self.env.illegal_moves_count, [0, 1, 0, 1])
+        self.assertFalse(terminated.any())
+
+    def test_fivefold_repetition(self):
+        self.env.reset()
+        shuffle = [self.reference.move_to_action[chess.Move.from_uci(uci)] for uci in ("g1f3", "g8f6", "f3g1", "f6g8")]
+        for ply in range(16):
+            _, reward, terminated, _, info = self.env.step([shuffle[ply % 4]] * 4)
+        self.assertTrue(terminated.all(), "The fifth occurrence of the start position should end the game.")
+        np.testing.assert_array_equal(info["outcome"], DRAW)
+
+    def test_autoreset(self):
+        env = BatchChessEnv(num_envs=2, autoreset=True)
+        start, _ = env.reset()
+        env.illegal_moves_count[0] = 6  # Over the illegal move threshold
+        observation, reward, terminated, _, info = env.step([0, 0])
+        np.testing.assert_array_equal(terminated, [True, False])
+        self.assertEqual(reward[0], -1)
+        np.testing.assert_array_equal(observation, start)
+        self.assertIn("final_observation", info)
+        self.assertEqual(env.illegal_moves_count[0], 0)
+        self.assertEqual(info["outcome"][0], ONGOING)
+
+
+
+    ###########################################################
+    ###### parity with ChessEnv unit testing ##################
+    ###########################################################
+
+    def test_random_games_match_chess_env(self):
+        rng = random.Random(7)
+        envs = [ChessEnv() for _ in range(self.env.num_envs)]
+        for env in envs:
+            env.reset()
+        self.env.reset()
+
+        for ply in range(150):
+            actions = []
+            for index, env in enumerate(envs):
+                if ply % 10 == 0:
+                    expected = np.array([env.board.is_legal(move) for move in env.all_possible_moves])
+                    np.testing.assert_array_equal(self.env._legal_mask[index], expected)
+
+                legal = [env.move_to_action[move] for move in env.board.legal_moves if move in env.move_to_action]
+                actions.append(rng.choice(legal) if legal and rng.random() < 0.95 else rng.randrange(ACTION_SIZE))
+
+            with contextlib.redirect_stdout(io.StringIO()):  # ChessEnv prints the illegal move threshold
+                expected = [env.step(action) for env, action in zip(envs, actions)]
+            observation, reward, terminated, _, info = self.env.step(actions)
+
+            for index, (env_observation, env_reward, env_done, _, env_info) in enumerate(expected):
+                np.testing.assert_array_equal(observation[index], env_observation)
+                self.assertAlmostEqual(reward[index], env_reward, places=9)
+                self.assertEqual(bool(terminated[index]), bool(env_done))
+                self.assertEqual(info["in_check"][index], env_info["in_check"])
+                self.assertEqual(info["illegal_moves"][index], env_info["illegal_moves"])
+
+                if env_done:
+                    envs[index].reset()
+                    self.env._reset_boards(np.array([index]))
+
+
+
+    def tearDown(self):
+        self.env.close()
+        self.reference.close()
+
+if __name__ == '__main__':
+    unittest.main()
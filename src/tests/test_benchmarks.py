@@ -0,0 +1,68 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from benchmarks.runner import compare, main, measure, run_benchmarks
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    ###########################################
+    ###### measure unit testing ###############
+    ###########################################
+
+    def test_measure(self):
+        result = measure(lambda: sum(range(100)), number=10, repeat=2)
+        self.assertEqual(set(result), {"number", "repeat", "best_us", "median_us", "ops_per_sec"})
+        self.assertGreater(result["ops_per_sec"], 0)
+        self.assertLessEqual(result["best_us"], result["median_us"])
+
+        batched = measure(lambda: 0.001, number=3, repeat=1, ops_per_call=10, self_timed=True)
+        self.assertAlmostEqual(batched["ops_per_sec"], 10_000)
+
+
+
+    ###########################################
+    ###### run & compare unit testing #########
+    ###########################################
+
+    def test_run_benchmarks(self):
+        document = run_benchmarks(["chess_env", "simple_chess_env"], number=3, repeat=1)
+        self.assertIn("meta", document)
+        for name in ("chess_env.step[opening]", "chess_env.compute_reward[endgame]", "simple_chess_env.step"):
+            self.assertIn(name, document["results"])
+
+        with self.assertRaises(ValueError):
+            run_benchmarks(["gpu"])
+
+    def test_compare_tolerance(self):
+        baseline = {"results": {"a": {"ops_per_sec": 100.0}, "b": {"ops_per_sec": 100.0}}}
+        current = {"results": {"a": {"ops_per_sec": 95.0}, "b": {"ops_per_sec": 80.0}, "c": {"ops_per_sec": 1.0}}}
+        regressions = compare(current, baseline, tolerance=0.1)
+        self.assertEqual([regression["name"] for regression in regressions], ["b"])
+        self.assertAlmostEqual(regressions[0]["change"], -0.2)
+
+    def test_main_writes_json_and_flags_regressions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.json")
+            arguments = ["--only", "simple_chess_env", "--number", "3", "--repeat", "1"]
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(main(arguments + ["--output", output]), 0)
+
+            with open(output) as handle:
+                document = json.load(handle)
+            for result in document["results"].values():
+                result["ops_per_sec"] *= 100  # A baseline no run can match
+
+            baseline = os.path.join(directory, "baseline.json")
+            with open(baseline, "w") as handle:
+                json.dump(document, handle)
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(main(arguments + ["--baseline", baseline]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
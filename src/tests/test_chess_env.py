@@ -1,3 +1,4 @@
+import pickle
 import unittest
 import numpy as np
 import chess
@@ -179,6 +180,35 @@ class TestChessEnv(unittest.TestCase):
 
 
 
+    ##########################################################
+    ###### copy-free reward unit testing #####################
+    ##########################################################
+
+    def test_step_reward_matches_previous_board(self):
+        self.env.reset()
+        for uci in ("e2e4", "d7d5", "e4d5", "d8d5", "b1c3", "d5a5", "f1c4", "e7e5", "d1h5", "g8f6", "h5f7"):
+            move = chess.Move.from_uci(uci)
+            previous_board = self.env.board.copy()
+            _, reward, _, _, _ = self.env.step(self.env.move_to_action[move])
+            expected = self.env.compute_reward(move, previous_board)  # The former board.copy() path
+            self.assertAlmostEqual(reward, expected, places=9, msg=uci)
+
+
+
+    ###########################################
+    ###### action_masks unit testing ##########
+    ###########################################
+
+    def test_action_masks(self):
+        self.env.reset()
+        mask = self.env.action_masks()
+        self.assertEqual(mask.shape, (4160,), "Action mask should cover all 4160 actions.")
+        self.assertEqual(mask.sum(), 20, "The starting position has 20 legal moves.")
+        self.assertTrue(mask[self.env.move_to_action[chess.Move.from_uci("e2e4")]])
+        self.assertFalse(mask[self.env.move_to_action[chess.Move.from_uci("e2e5")]])
+
+
+
     #################################################
     ###### illegal move unit testing ################
     #################################################
@@ -191,6 +221,48 @@ class TestChessEnv(unittest.TestCase):
 
 
 
+    #################################################
+    ###### perf_stats unit testing ##################
+    #################################################
+
+    def test_perf_stats_disabled(self):
+        self.env.reset()
+        self.env.step(self.env.move_to_action[chess.Move.from_uci("e2e4")])
+        self.assertEqual(self.env.perf_stats(), {}, "Instrumentation is off by default.")
+        self.assertNotIn("reward_for_check", vars(self.env), "Reward methods are not wrapped when disabled.")
+
+    def test_perf_stats_enabled(self):
+        env = ChessEnv(perf=True)
+        env.reset()
+        for uci in ("e2e4", "e7e5", "e2e4"):  # The last move is illegal
+            env.step(env.move_to_action[chess.Move.from_uci(uci)])
+
+        stats = env.perf_stats()
+        self.assertEqual(stats["step"]["calls"], 3)
+        self.assertEqual(stats["step.legality"]["calls"], 3)
+        for name in ("reward_for_capture", "reward_for_check", "reward_for_position", "reward_for_promotion",
+                     "step.push", "step.reward", "step.game_over", "step.observation"):
+            self.assertEqual(stats[name]["calls"], 2, name)
+        for value in ("total_us", "mean_us", "p50_us", "p90_us", "p99_us"):
+            self.assertGreaterEqual(stats["step"][value], 0)
+
+        env.reset_perf_stats()
+        self.assertEqual(env.perf_stats(), {})
+
+    def test_perf_env_pickles(self):
+        env = ChessEnv(perf=True)
+        env.reset()
+        env.step(env.move_to_action[chess.Move.from_uci("e2e4")])
+
+        copy = pickle.loads(pickle.dumps(env))
+        copy.step(copy.move_to_action[chess.Move.from_uci("e7e5")])
+        self.assertEqual(copy.perf_stats()["reward_for_check"]["calls"], 2, "Copies keep timing the reward terms.")
+        self.assertEqual(env.perf_stats()["reward_for_check"]["calls"], 1)
+        self.assertIs(copy.reward_for_check.__wrapped__.__self__, copy, "Wrappers are bound to the copy.")
+        self.assertIs(copy.move_to_action, env.move_to_action, "Copies share the codec lookups.")
+
+
+
     def tearDown(self):
         # Clean up resources if needed
         self.env.close()
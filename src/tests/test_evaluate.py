@@ -0,0 +1,140 @@
+import os
+import tempfile
+import unittest
+
+import chess
+import numpy as np
+import torch
+
+from src.agents.evaluate import EvaluationGame, LockstepRunner, evaluate, format_report
+from src.agents.inference import mask_logits, predict_actions, sample_actions
+from src.agents.ppo_agent import FULL_GAME, create_model, load_model
+
+try:
+    import sb3_contrib
+except ImportError:  # pragma: no cover - optional dependency
+    sb3_contrib = None
+
+
+class TestEvaluate(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.model_path = os.path.join(cls.directory.name, "model.zip")
+        model = create_model(stage=FULL_GAME, tensorboard_log=None, seed=0)
+        model.save(cls.model_path)
+        model.env.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    ###########################################
+    ###### EvaluationGame unit testing ########
+    ###########################################
+
+    def test_random_opponent_moves_first_as_white(self):
+        game = EvaluationGame(1, seed=0, opponent="random")
+        self.assertFalse(game.agent_white)
+        game.play_opponent()
+        self.assertEqual(game.plies, 1)
+        self.assertTrue(game.agent_to_move)
+
+    def test_games_start_from_seeded_openings(self):
+        openings = [EvaluationGame(index, seed=0).env.board.fen() for index in range(6)]
+        self.assertEqual(len(set(openings)), 6, "Deterministic self-play games are not all the same game.")
+        self.assertEqual(openings, [EvaluationGame(index, seed=0).env.board.fen() for index in range(6)])
+        self.assertEqual(EvaluationGame(0, seed=0, opening_plies=0).env.board.fen(), chess.STARTING_FEN)
+
+    def test_illegal_moves_lose(self):
+        game = EvaluationGame(0, seed=0, opponent="random")
+        while not game.done:
+            game.play_agent(0)  # a1a1 is never legal
+        self.assertEqual(game.result, "loss")
+        self.assertEqual(game.reason, "too many illegal moves")
+        self.assertEqual(game.summary()["illegal_moves"], game.agent_actions - 1)
+
+
+
+    ###########################################
+    ###### lockstep inference unit testing ####
+    ###########################################
+
+    def test_predict_actions_match_model_predict(self):
+        model = load_model(self.model_path)
+        observations = np.stack([EvaluationGame(index, seed=0, opponent="random").observation for index in range(6)])
+        expected, _ = model.predict(observations, deterministic=True)
+        np.testing.assert_array_equal(predict_actions(model.policy, observations), expected)
+
+        masks = np.zeros((6, 4160), dtype=bool)
+        masks[:, 796] = True  # e2e4
+        np.testing.assert_array_equal(predict_actions(model.policy, observations, masks), np.full(6, 796))
+
+    def test_lockstep_refills_slots(self):
+        model = load_model(self.model_path)
+        single = LockstepRunner(model, seed=1, opponent="random", batch_size=1, max_plies=10)
+        lockstep = LockstepRunner(model, seed=1, opponent="random", batch_size=4, max_plies=10)
+
+        self.assertEqual(single.run(range(9)), lockstep.run(range(9)))
+        self.assertEqual(single.predictions, lockstep.predictions)
+        self.assertLess(lockstep.forward_passes, single.forward_passes)
+
+    def test_sampled_games_independent_of_batch_size(self):
+        model = load_model(self.model_path)
+        options = {"seed": 2, "opponent": "random", "max_plies": 10, "deterministic": False}
+        single = LockstepRunner(model, batch_size=1, **options).run(range(6))
+        torch.manual_seed(123)  # The global RNG is not used
+        self.assertEqual(single, LockstepRunner(model, batch_size=4, **options).run(range(6)))
+
+    def test_sample_actions(self):
+        logits = torch.zeros((2, 4160))
+        masks = np.zeros((2, 4160), dtype=bool)
+        masks[:, [796, 812]] = True  # Two allowed actions
+        generators = [torch.Generator().manual_seed(seed) for seed in range(2)]
+        actions = sample_actions(mask_logits(logits, masks), generators)
+        self.assertTrue(set(actions.tolist()) <= {796, 812})
+
+        first = [sample_actions(logits[:1], [torch.Generator().manual_seed(5)]) for _ in range(2)]
+        self.assertEqual(first[0].item(), first[1].item())
+
+
+
+    ###########################################
+    ###### evaluate unit testing ##############
+    ###########################################
+
+    def test_report_is_independent_of_workers(self):
+        options = {"n_games": 6, "seed": 3, "opponent": "random", "max_plies": 12, "batch_size": 4}
+        serial = evaluate(self.model_path, workers=1, **options)
+        parallel = evaluate(self.model_path, workers=2, start_method="fork", **options)
+
+        self.assertEqual(serial["per_game"], parallel["per_game"])
+        self.assertEqual(serial["wins"] + serial["draws"] + serial["losses"], 6)
+        self.assertGreater(serial["games_per_sec"], 0)
+        self.assertEqual(serial["predictions"], parallel["predictions"])
+        self.assertGreater(serial["mean_batch_size"], 1)
+        self.assertIn("win/draw/loss", format_report(serial))
+
+        with self.assertRaises(ValueError):
+            evaluate(self.model_path, opponent="stockfish")
+
+    def test_sampled_report_is_independent_of_workers(self):
+        options = {"n_games": 4, "seed": 3, "opponent": "random", "max_plies": 12, "deterministic": False}
+        serial = evaluate(self.model_path, workers=1, **options)
+        parallel = evaluate(self.model_path, workers=2, start_method="fork", **options)
+        self.assertEqual(serial["per_game"], parallel["per_game"])
+
+    @unittest.skipIf(sb3_contrib is None, "sb3-contrib is not installed")
+    def test_masked_checkpoint_detected(self):
+        model = create_model(stage=FULL_GAME, tensorboard_log=None, seed=0, masked=True)
+        path = os.path.join(self.directory.name, "masked.zip")
+        model.save(path)
+        model.env.close()
+
+        report = evaluate(path, n_games=2, opponent="random", max_plies=12, workers=2, start_method="fork")
+        self.assertEqual(report["illegal_move_rate"], 0.0)  # Played with the legal action masks
+
+
+if __name__ == '__main__':
+    unittest.main()
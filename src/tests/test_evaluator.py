@@ -0,0 +1,60 @@
+import random
+import unittest
+
+import chess
+
+from environment.chess_env import ChessEnv
+from environment.evaluator import IncrementalEvaluator
+
+
+class TestIncrementalEvaluator(unittest.TestCase):
+
+    def setUp(self):
+        self.env = ChessEnv()
+        self.board = chess.Board()
+        self.evaluator = IncrementalEvaluator(self.board)
+
+    def assertMatchesFullScan(self):
+        for color in chess.COLORS:
+            expected = self.env.position_scores(self.board, color)
+            self.assertEqual(self.evaluator.scores(color), expected, self.board.fen())
+
+
+
+    ###########################################
+    ###### push & pop unit testing ############
+    ###########################################
+
+    def test_random_games_push_pop(self):
+        rng = random.Random(11)
+        for _ in range(5):
+            self.board.reset()
+            self.evaluator.reset()
+            plies = 0
+            while not self.board.is_game_over() and plies < 200:
+                self.evaluator.push(rng.choice(list(self.board.legal_moves)))
+                self.assertMatchesFullScan()
+                plies += 1
+
+            for _ in range(plies):
+                self.evaluator.pop()
+            self.assertEqual(self.board.fen(), chess.STARTING_FEN)
+            self.assertMatchesFullScan()
+
+    def test_special_moves(self):
+        # Castling, en passant & promotion with capture
+        self.board.set_fen("r3k2r/1P6/8/3pP3/8/8/8/R3K2R w KQkq d6 0 1")
+        self.evaluator.reset()
+        for uci in ("e5d6", "e8c8", "b7a8q", "d8d6", "e1g1"):
+            self.evaluator.push(chess.Move.from_uci(uci))
+            self.assertMatchesFullScan()
+
+    def test_exposed_king(self):
+        self.board.set_fen("8/8/8/8/4K3/8/8/8 w - - 0 1")
+        self.evaluator.reset()
+        self.assertEqual(self.evaluator.king_safety(chess.WHITE), -0.5)
+        self.assertEqual(self.evaluator.king_safety(chess.BLACK), 0, "A missing king scores 0.")
+
+
+if __name__ == '__main__':
+    unittest.main()
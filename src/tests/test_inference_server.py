@@ -0,0 +1,211 @@
+import multiprocessing
+import multiprocessing.connection
+import os
+import tempfile
+import threading
+import time
+import unittest
+import unittest.mock
+
+import chess
+import numpy as np
+
+from src.agents.inference import predict_actions
+from src.agents.inference_server import (
+    AUTHKEY_ENV,
+    InferenceClient,
+    InferenceServer,
+    _Request,
+    parse_address,
+    resolve_authkey,
+    start_server,
+)
+from src.agents.ppo_agent import FULL_GAME, create_model
+from src.environment.action_codec import ACTION_CODEC
+from src.environment.observation import encode_board
+
+FENS = (
+    chess.STARTING_FEN,
+    "r1bqkbnr/pppp1ppp/2n5/1B2p3/4P3/5N2/PPPP1PPP/RNBQK2R b KQkq - 3 3",
+    "6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1",
+)
+AUTHKEY = b"test key"
+
+
+class TestInferenceServer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.model = create_model(stage=FULL_GAME, tensorboard_log=None, seed=0)
+        boards = [chess.Board(fen) for fen in FENS]
+        cls.observations = np.stack([encode_board(board) for board in boards])
+        cls.masks = np.stack([ACTION_CODEC.legal_mask(board) for board in boards])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.model.env.close()
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.address = os.path.join(self.directory.name, "policy.sock")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    ###########################################
+    ###### server unit testing ################
+    ###########################################
+
+    def serve(self, address=None, **options):
+        return InferenceServer(self.model.policy, address or self.address, authkey=AUTHKEY, **options)
+
+    def test_parse_address(self):
+        self.assertEqual(parse_address("127.0.0.1:5577"), (("127.0.0.1", 5577), "AF_INET"))
+        self.assertEqual(parse_address(":0"), (("127.0.0.1", 0), "AF_INET"))
+        self.assertEqual(parse_address("/tmp/policy.sock"), ("/tmp/policy.sock", "AF_UNIX"))
+        with self.assertRaises(ValueError):
+            parse_address("0.0.0.0:5577")
+        self.assertEqual(parse_address("0.0.0.0:5577", allow_remote=True), (("0.0.0.0", 5577), "AF_INET"))
+
+    def test_authkey_required(self):
+        with self.assertRaises(ValueError):
+            InferenceServer(self.model.policy, "0.0.0.0:0")
+        self.assertEqual(len(InferenceServer(self.model.policy, self.address).authkey), 32)  # Generated
+
+        with unittest.mock.patch.dict(os.environ, {AUTHKEY_ENV: AUTHKEY.hex()}):
+            self.assertEqual(resolve_authkey(), AUTHKEY)
+        with unittest.mock.patch.dict(os.environ, clear=True):
+            with self.assertRaises(ValueError):
+                InferenceClient(self.address)
+
+        with self.serve() as server:
+            with self.assertRaises(multiprocessing.AuthenticationError):
+                InferenceClient(self.address, authkey=b"wrong key")
+            with InferenceClient(self.address, authkey=AUTHKEY) as client:  # Still serving
+                self.assertEqual(len(client.predict_actions(self.observations)), 3)
+            self.assertEqual(server.stats()["requests"], 1)
+
+    def test_matches_local_predictions(self):
+        with self.serve(), InferenceClient(self.address, authkey=AUTHKEY) as client:
+            expected = predict_actions(self.model.policy, self.observations, self.masks)
+            np.testing.assert_array_equal(client.predict_actions(self.observations, self.masks), expected)
+            unmasked = predict_actions(self.model.policy, self.observations)
+            np.testing.assert_array_equal(client.predict_actions(self.observations), unmasked)
+
+            sampled = client.predict_actions(self.observations, self.masks, deterministic=False)
+            self.assertTrue(all(mask[action] for mask, action in zip(self.masks, sampled)))
+
+    def test_requests_batched(self):
+        results = {}
+
+        def worker(index):
+            with InferenceClient(self.address, authkey=AUTHKEY) as client:
+                results[index] = [client.predict_actions(self.observations[:1], self.masks[:1]) for _ in range(5)]
+
+        with self.serve(max_latency=0.05) as server:
+            threads = [threading.Thread(target=worker, args=(index,)) for index in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            stats = server.stats()
+
+        self.assertEqual(len(results), 4)
+        self.assertEqual(stats["requests"], 20)
+        self.assertEqual(stats["observations"], 20)
+        self.assertLess(stats["batches"], 20)  # Concurrent requests share forward passes
+        self.assertGreater(max(stats["batch_sizes"]), 1)
+        self.assertEqual(sum(stats["queue_depths"].values()), stats["batches"])
+
+    def test_max_batch_size(self):
+        with self.serve(":0", max_batch_size=4, max_latency=0.05) as server:
+            with InferenceClient(server.address, authkey=AUTHKEY) as client:
+                self.assertEqual(len(client.predict_actions(np.repeat(self.observations, 2, axis=0))), 6)
+                self.assertEqual(client.stats()["batch_sizes"], {6: 1})  # One request is never split
+
+    def test_error_reported_and_server_survives(self):
+        with self.serve(), InferenceClient(self.address, authkey=AUTHKEY) as client:
+            with self.assertRaises(RuntimeError):
+                client.predict_actions(np.zeros((1, 3, 3), dtype=np.int8))
+            self.assertEqual(len(client.predict_actions(self.observations)), 3)
+
+    def test_bad_request_fails_alone(self):
+        errors, results = [], []
+
+        def worker(observations, masks):
+            with InferenceClient(self.address, authkey=AUTHKEY) as client:
+                try:
+                    results.append(client.predict_actions(observations, masks))
+                except RuntimeError as error:
+                    errors.append(error)
+
+        requests = [
+            (np.zeros((1, 9, 9), dtype=np.int8), None),
+            (self.observations, np.ones((3, 5), dtype=bool)),
+            (self.observations[:1], self.masks[:1]),
+        ]
+        with self.serve(max_latency=0.2):
+            threads = [threading.Thread(target=worker, args=request) for request in requests]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(errors), 2)
+        self.assertEqual(len(results), 1)
+        expected = predict_actions(self.model.policy, self.observations[:1], self.masks[:1])
+        np.testing.assert_array_equal(results[0], expected)
+
+    def test_malformed_message(self):
+        with self.serve() as server:
+            connection = multiprocessing.connection.Client(self.address, family="AF_UNIX", authkey=AUTHKEY)
+            for message in (("predict", self.observations), "predict", ()):
+                connection.send(message)
+                self.assertEqual(connection.recv()[0], "error")
+            connection.send(("predict", self.observations, None, True))  # Still served
+            self.assertEqual(connection.recv()[0], "ok")
+            connection.close()
+
+            deadline = time.monotonic() + 5
+            while server._clients and time.monotonic() < deadline:
+                time.sleep(0.05)
+            self.assertEqual(server._clients, 0, "The closed connection no longer counts as a client.")
+
+    def test_failed_batch_served_per_request(self):
+        class Connection:
+            def send(self, reply):
+                self.reply = reply
+
+        server = self.serve()
+        good = _Request(Connection(), self.observations, self.masks, True, time.perf_counter())
+        bad = _Request(Connection(), np.zeros((1, 9, 9), dtype=np.int8), None, True, time.perf_counter())
+        server._serve([good, bad])
+
+        expected = predict_actions(self.model.policy, self.observations, self.masks)
+        self.assertEqual(good.connection.reply[0], "ok")
+        np.testing.assert_array_equal(good.connection.reply[1], expected)
+        self.assertEqual(bad.connection.reply[0], "error")
+        self.assertEqual(server.stats()["requests"], 2)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            InferenceServer(self.model.policy, max_batch_size=0)
+        with self.assertRaises(ValueError):
+            InferenceServer(self.model.policy, max_latency=-1)
+
+    def test_server_process(self):
+        path = os.path.join(self.directory.name, "checkpoint.zip")
+        self.model.save(path)
+        process, authkey = start_server(path, self.address, start_method="fork")
+        try:
+            with InferenceClient(self.address, timeout=30, authkey=authkey) as client:
+                expected = predict_actions(self.model.policy, self.observations, self.masks)
+                np.testing.assert_array_equal(client.predict_actions(self.observations, self.masks), expected)
+        finally:
+            process.terminate()
+            process.join()
+
+
+
+if __name__ == '__main__':
+    unittest.main()
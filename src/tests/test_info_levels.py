@@ -0,0 +1,73 @@
+import unittest
+
+import chess
+
+from environment.chess_env import ChessEnv
+from environment.simple_chess_env import SimpleChessEnv
+
+
+class TestInfoLevels(unittest.TestCase):
+
+    def play(self, env, ucis):
+        infos = []
+        for uci in ucis:
+            infos.append(env.step(env.move_to_action[chess.Move.from_uci(uci)])[4])
+        return infos
+
+    ###########################################
+    ###### ChessEnv unit testing ##############
+    ###########################################
+
+    def test_chess_env_levels(self):
+        fools_mate = ("f2f3", "e7e5", "a2a5", "g2g4", "d8h4")
+        infos = {}
+        for level in ("none", "minimal", "full"):
+            env = ChessEnv(info_level=level)
+            _, reset_info = env.reset()
+            infos[level] = (reset_info, self.play(env, fools_mate))
+
+        reset_info, steps = infos["full"]
+        self.assertIn("initial_board_fen", reset_info)
+        self.assertTrue(steps[-1]["in_check"])
+        self.assertEqual(steps[-1]["winner"], "black")
+
+        reset_info, steps = infos["minimal"]
+        self.assertEqual(reset_info, {})
+        self.assertEqual(steps[0], {}, "Ordinary steps carry no metadata.")
+        self.assertEqual(steps[2], {"reason": "illegal move"})
+        self.assertEqual(steps[-1], {"winner": "black"})
+
+        reset_info, steps = infos["none"]
+        self.assertEqual(reset_info, {})
+        self.assertTrue(all(info == {} for info in steps))
+
+    def test_unknown_level(self):
+        with self.assertRaises(ValueError):
+            ChessEnv(info_level="verbose")
+        with self.assertRaises(ValueError):
+            SimpleChessEnv(info_level="verbose")
+
+    ###########################################
+    ###### SimpleChessEnv unit testing ########
+    ###########################################
+
+    def test_simple_chess_env_levels(self):
+        options = {"agent_square": chess.B1, "target_square": chess.C3}
+        c3 = SimpleChessEnv().encode_action(chess.Move(chess.B1, chess.C3))
+
+        env = SimpleChessEnv(info_level="minimal")
+        _, reset_info = env.reset(seed=0, options=options)
+        self.assertEqual(reset_info, {"reason": "reset"})
+        self.assertEqual(env.step(c3)[4], {"reason": "goal_reached"})
+
+        env = SimpleChessEnv(info_level="none")
+        env.reset(seed=0, options=options)
+        self.assertEqual(env.step(c3)[4], {})
+
+        env = SimpleChessEnv()
+        env.reset(seed=0, options=options)
+        self.assertEqual(env.step(c3)[4]["legal_moves"], 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
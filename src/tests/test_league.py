@@ -0,0 +1,208 @@
+import os
+import tempfile
+import unittest
+
+import chess
+import numpy as np
+
+from src.agents.league import League, LeagueVecEnv, train_league
+from src.agents.ppo_agent import FULL_GAME, create_model
+from src.environment.action_codec import ACTION_CODEC
+
+
+def play(env, steps, seed=0):
+    """Steps ``env`` with random legal learner moves and returns every info of a finished game."""
+    rng = np.random.default_rng(seed)
+    finished = []
+    for _ in range(steps):
+        masks = env.env_method("action_masks")
+        actions = np.array([rng.choice(np.flatnonzero(mask)) for mask in masks])
+        _, _, dones, infos = env.step(actions)
+        finished.extend(info for info, done in zip(infos, dones) if done)
+    return finished
+
+
+class TestLeague(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.model = create_model(env=LeagueVecEnv(1), tensorboard_log=None, seed=0)  # "planes" observations
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.model.env.close()
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    ###########################################
+    ###### League unit testing ################
+    ###########################################
+
+    def test_sampling_schemes(self):
+        leagues = {scheme: League(self.directory.name, scheme=scheme) for scheme in ("latest", "uniform", "prioritized")}
+        for league in leagues.values():
+            first = league.add(self.model.policy)
+            league.add(self.model.policy)
+            for _ in range(8):
+                league.record(first, "win")
+
+        np.testing.assert_allclose(leagues["latest"].probabilities(), [0.0, 1.0])
+        np.testing.assert_allclose(leagues["uniform"].probabilities(), [0.5, 0.5])
+        # The unbeaten snapshot is picked far more often than the one always beaten
+        prioritized = leagues["prioritized"].probabilities()
+        self.assertAlmostEqual(prioritized.sum(), 1.0)
+        self.assertGreater(prioritized[1], 10 * prioritized[0])
+
+    def test_oldest_snapshot_dropped(self):
+        league = League(self.directory.name, max_snapshots=2)
+        paths = []
+        for _ in range(3):
+            league.add(self.model.policy)
+            paths.append(league.snapshots[-1]["path"])
+
+        self.assertEqual(league.pool()["ids"], [1, 2])
+        self.assertFalse(os.path.exists(paths[0]))
+        self.assertTrue(os.path.exists(paths[2]))
+        league.record(0, "loss")  # Results against dropped snapshots are ignored
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            League(self.directory.name, scheme="best")
+        with self.assertRaises(ValueError):
+            League(self.directory.name).record(0, "won")
+
+
+
+    ###########################################
+    ###### LeagueVecEnv unit testing ##########
+    ###########################################
+
+    def make_env(self, n_envs=4, workers=0, max_plies=6, model=None, observation_mode="planes"):
+        league = League(self.directory.name)
+        league.add((model or self.model).policy)
+        env = LeagueVecEnv(
+            n_envs, workers=workers, observation_mode=observation_mode, max_plies=max_plies, start_method="fork"
+        )
+        env.set_pool(league.pool())
+        env.seed(3)
+        return env
+
+    def test_learner_to_move_after_reset_and_step(self):
+        env = self.make_env()
+        try:
+            observations = env.reset()
+            self.assertEqual(observations.shape, (4, 18, 8, 8))
+            games = env.groups[0].games
+            for _ in range(3):
+                boards = env.get_attr("board")
+                self.assertEqual([board.turn for board in boards], games.learner_colors)
+                play(env, 1)
+        finally:
+            env.close()
+
+    def test_learner_colors(self):
+        env = self.make_env(n_envs=8)
+        try:
+            env.seed(0)
+            env.reset()
+            self.assertEqual(set(env.groups[0].games.learner_colors), {True, False})
+        finally:
+            env.close()
+
+        # The board observation does not show the side to move: the learner always plays White
+        model = create_model(stage=FULL_GAME, tensorboard_log=None, seed=0)
+        model.env.close()
+        env = self.make_env(n_envs=8, model=model, observation_mode="board")
+        try:
+            self.assertEqual(env.reset().shape, (8, 8, 8))
+            self.assertEqual(env.groups[0].games.learner_colors, [True] * 8)
+        finally:
+            env.close()
+
+    def test_learner_reward_covers_reply(self):
+        model = create_model(stage=FULL_GAME, tensorboard_log=None, seed=0)
+        model.env.close()
+        env = self.make_env(n_envs=1, model=model, observation_mode="board", max_plies=1000)  # Learner is White
+        try:
+            env.set_options({"fen": "4k3/7p/8/3q4/8/2N5/7P/4K3 w - - 0 1"})
+            env.reset()
+            _, rewards, _, _ = env.step(np.array([ACTION_CODEC.encode(chess.Move.from_uci("c3d5"))]))
+            self.assertGreater(rewards[0], 0.5, "The learner's capture is scored for the learner.")
+
+            env.set_options({"fen": "k7/8/1Q6/8/8/8/7P/7K w - - 0 1"})  # b6b7+ leaves a8b7 as the only reply
+            env.reset()
+            _, rewards, _, _ = env.step(np.array([ACTION_CODEC.encode(chess.Move.from_uci("b6b7"))]))
+            self.assertEqual(env.get_attr("board")[0].peek(), chess.Move.from_uci("a8b7"))
+            self.assertLess(rewards[0], -0.5, "The queen taken by the reply counts against the learner.")
+        finally:
+            env.close()
+
+    def test_opponent_moves_batched(self):
+        env = self.make_env(n_envs=6, max_plies=1000)
+        try:
+            env.reset()
+            play(env, 10)
+            stats = env.opponent_stats()
+            # One snapshot: every round of replies is a single forward pass
+            self.assertGreater(stats["opponent_predictions"], 3 * stats["opponent_forward_passes"])
+        finally:
+            env.close()
+
+    def test_finished_games_report_results(self):
+        env = self.make_env(max_plies=4)
+        try:
+            env.reset()
+            finished = play(env, 12)
+            self.assertTrue(finished)
+            for info in finished:
+                self.assertIn(info["league_result"], ("win", "draw", "loss"))
+                self.assertEqual(info["league_opponent"], 0)
+                self.assertEqual(info["terminal_observation"].shape, (18, 8, 8))
+        finally:
+            env.close()
+
+    def test_worker_processes(self):
+        env = self.make_env(workers=2, max_plies=4)
+        try:
+            self.assertEqual(env.reset().shape, (4, 18, 8, 8))
+            self.assertEqual(len(env.env_method("action_masks", indices=[1, 3])), 2)
+            self.assertTrue(play(env, 12))
+            self.assertGreater(env.opponent_stats()["opponent_predictions"], 0)
+        finally:
+            env.close()
+
+    def test_reset_needs_pool(self):
+        env = LeagueVecEnv(2)
+        try:
+            with self.assertRaises(RuntimeError):
+                env.reset()
+        finally:
+            env.close()
+
+
+
+    ###########################################
+    ###### train_league unit testing ##########
+    ###########################################
+
+    def test_train_league_adds_snapshots(self):
+        model, league = train_league(
+            total_timesteps=512,
+            n_envs=2,
+            league_dir=self.directory.name,
+            snapshot_interval=256,
+            max_plies=20,
+            tensorboard_log=None,
+            seed=0,
+        )
+        self.assertGreaterEqual(len(league), 3)  # Initial policy plus two snapshots
+        self.assertGreater(sum(s["win"] + s["draw"] + s["loss"] for s in league.stats()), 0)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
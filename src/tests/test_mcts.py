@@ -0,0 +1,173 @@
+import unittest
+
+import chess
+import numpy as np
+import torch
+
+from src.agents.inference import action_logits, policy_values
+from src.agents.mcts import MCTS, Node
+from src.agents.ppo_agent import FULL_GAME, create_model
+from src.environment.action_codec import ACTION_CODEC
+from src.environment.chess_env import ChessEnv
+from src.environment.observation import encode_board
+from src.environment.zobrist import zobrist_hash
+
+BACK_RANK_MATE = "6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1"  # Ra8#
+ROOKS = "4k3/8/8/8/8/8/8/R3K2R w - - 0 1"
+
+
+class TestMCTS(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.model = create_model(stage=FULL_GAME, tensorboard_log=None, seed=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.model.env.close()
+
+    ###########################################
+    ###### policy_values unit testing #########
+    ###########################################
+
+    def test_policy_values_match_policy(self):
+        policy = self.model.policy
+        observations = np.stack([encode_board(chess.Board()), encode_board(chess.Board(BACK_RANK_MATE))])
+        with torch.no_grad():
+            logits, values = policy_values(policy, observations)
+            expected_values = policy.predict_values(torch.as_tensor(observations)).flatten()
+            np.testing.assert_allclose(logits.numpy(), action_logits(policy, observations).numpy(), rtol=1e-5)
+        np.testing.assert_allclose(values.numpy(), expected_values.numpy(), rtol=1e-5)
+
+
+
+    ###########################################
+    ###### MCTS unit testing ##################
+    ###########################################
+
+    def test_node_budget_and_legal_move(self):
+        board = chess.Board()
+        result = MCTS(self.model.policy, simulations=64, batch_size=8).search(board)
+        self.assertEqual(result.nodes, 64)
+        self.assertIn(result.move, board.legal_moves)
+        self.assertEqual(ACTION_CODEC.move_to_action[result.move], result.action)
+        self.assertEqual(sum(result.visits.values()), 63)  # Every node but the root
+        self.assertGreater(result.nodes_per_sec, 0)
+        self.assertEqual(board.fen(), chess.Board().fen())  # Left unchanged
+
+    def test_batching_reduces_forward_passes(self):
+        single = MCTS(self.model.policy, simulations=48, batch_size=1).search(chess.Board())
+        batched = MCTS(self.model.policy, simulations=48, batch_size=16).search(chess.Board())
+        self.assertEqual(single.forward_passes, 48)
+        self.assertLess(batched.forward_passes, 48 // 4)
+
+    def test_virtual_loss_undone(self):
+        search = MCTS(self.model.policy, simulations=40, batch_size=8)
+        board = chess.Board()
+        key = zobrist_hash(board)
+        root = search.table[key] = Node()
+        search.nodes = search.forward_passes = 0
+        while search.nodes < 40:
+            search._run_batch(root, key, board, 40 - search.nodes)
+        self.assertEqual(root.visits.sum(), 39)
+        self.assertEqual(root.visit_total, 39)
+        self.assertTrue(np.all(np.abs(root.values) <= root.visits))
+
+    def test_finds_mate_in_one(self):
+        result = MCTS(self.model.policy, simulations=200, batch_size=8).search(chess.Board(BACK_RANK_MATE))
+        self.assertEqual(result.move, chess.Move.from_uci("a1a8"))
+        self.assertGreater(result.value, 0.5)
+
+    def test_finished_game(self):
+        board = chess.Board(BACK_RANK_MATE)
+        board.push_uci("a1a8")
+        result = MCTS(self.model.policy, simulations=16).search(board)
+        self.assertIsNone(result.move)
+        self.assertEqual(result.value, -1.0)
+
+    def test_select_action_on_env(self):
+        env = ChessEnv()
+        env.reset(seed=0)
+        search = MCTS(self.model.policy, simulations=16, batch_size=4)
+        action = search.select_action(env)
+        _, _, terminated, _, _ = env.step(action)
+        self.assertFalse(terminated)
+        self.assertEqual(search.stats()["nodes"], 16)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            MCTS(self.model.policy, simulations=0)
+        with self.assertRaises(ValueError):
+            MCTS(self.model.policy, batch_size=0)
+        with self.assertRaises(ValueError):
+            MCTS(self.model.policy, max_nodes=0)
+
+
+
+    ###########################################
+    ###### tree reuse unit testing ############
+    ###########################################
+
+    def test_subtree_of_played_move_reused(self):
+        search = MCTS(self.model.policy, simulations=64, batch_size=8)
+        board = chess.Board()
+        first = search.search(board)
+        board.push(first.move)
+
+        second = search.search(board)
+        self.assertEqual(second.reused, first.visits[first.action])
+        self.assertEqual(second.nodes + second.reused, 64)
+        self.assertGreater(search.stats()["discarded"], 0)  # The other moves' subtrees
+        self.assertEqual(search.stats()["reused"], second.reused)
+
+    def test_no_reuse(self):
+        search = MCTS(self.model.policy, simulations=32, batch_size=8, reuse=False)
+        board = chess.Board()
+        board.push(search.search(board).move)
+        result = search.search(board)
+        self.assertEqual((result.nodes, result.reused), (32, 0))
+
+    def test_unrelated_position_drops_table(self):
+        search = MCTS(self.model.policy, simulations=32, batch_size=8)
+        search.search(chess.Board())
+        search.search(chess.Board(BACK_RANK_MATE))
+        self.assertIn(zobrist_hash(chess.Board(BACK_RANK_MATE)), search.table)
+        self.assertNotIn(zobrist_hash(chess.Board()), search.table)
+
+    def test_transpositions_share_nodes(self):
+        search = MCTS(self.model.policy, simulations=1000, batch_size=16)
+        result = search.search(chess.Board(ROOKS))
+        self.assertGreater(search.stats()["transpositions"], 0)
+        self.assertLess(len(search.table), result.nodes)
+
+    def test_clock_draws_not_stored(self):
+        search = MCTS(self.model.policy, simulations=32, batch_size=8)
+        board = chess.Board(ROOKS)
+        board.halfmove_clock = 149  # Every move but a capture draws
+        result = search.search(board)
+        self.assertEqual((result.nodes, result.value), (32, 0.0))
+        self.assertEqual(list(search.table), [zobrist_hash(board)])
+
+        board = chess.Board(ROOKS)
+        board.push_uci("a1a2")  # A drawn child above, with a fresh clock here
+        result = search.search(board)
+        self.assertIn(result.move, board.legal_moves)
+        self.assertEqual(result.nodes, 32)
+
+        board.halfmove_clock = 150
+        result = search.search(board)
+        self.assertEqual((result.move, result.value, result.nodes), (None, 0.0, 0))
+
+    def test_table_bounded(self):
+        search = MCTS(self.model.policy, simulations=200, batch_size=8, max_nodes=50)
+        board = chess.Board()
+        result = search.search(board)
+        self.assertEqual(result.nodes, 200)
+        self.assertIn(result.move, board.legal_moves)
+        self.assertLessEqual(len(search.table), 50)
+        self.assertGreater(search.stats()["evictions"], 0)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
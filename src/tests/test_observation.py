@@ -0,0 +1,157 @@
+import random
+import unittest
+
+import chess
+import numpy as np
+
+from environment.batch_chess_env import BatchChessEnv
+from environment.chess_env import ChessEnv
+from environment.observation import (
+    CASTLING_PLANES,
+    EN_PASSANT_PLANE,
+    PLANE_COUNT,
+    SIDE_TO_MOVE_PLANE,
+    encode_board,
+    encode_planes,
+)
+from environment.simple_chess_env import SimpleChessEnv
+
+
+def piece_map_observation(board, pieces):
+    # The original per-piece loop, kept as the reference encoding
+    observation = np.zeros((8, 8), dtype=np.int8)
+    for square, piece in board.piece_map().items():
+        observation[7 - chess.square_rank(square)][chess.square_file(square)] = pieces[piece.symbol()]
+    return observation
+
+
+def random_boards(count, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        board = chess.Board()
+        for _ in range(rng.randrange(60)):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+        yield board
+
+
+class TestObservation(unittest.TestCase):
+
+    ###########################################
+    ###### board mode unit testing ############
+    ###########################################
+
+    def test_board_matches_piece_map_loop(self):
+        pieces = ChessEnv().map_pieces()
+        for board in random_boards(25):
+            np.testing.assert_array_equal(encode_board(board), piece_map_observation(board, pieces))
+
+
+
+    ###########################################
+    ###### planes mode unit testing ###########
+    ###########################################
+
+    def test_planes_start_position(self):
+        planes = encode_planes(chess.Board())
+        self.assertEqual(planes.shape, (PLANE_COUNT, 8, 8))
+        self.assertEqual(planes[0].sum(), 8, "Eight white pawns expected.")
+        self.assertEqual(planes[0][6].sum(), 8, "White pawns sit on rank 2, row 6 of the grid.")
+        self.assertTrue(planes[SIDE_TO_MOVE_PLANE].all())
+        self.assertTrue(planes[CASTLING_PLANES].all())
+        self.assertFalse(planes[EN_PASSANT_PLANE].any())
+
+    def test_planes_en_passant_and_castling(self):
+        board = chess.Board("r3k2r/8/8/3pP3/8/8/8/R3K2R w Kq d6 0 2")
+        planes = encode_planes(board)
+        self.assertEqual(planes[EN_PASSANT_PLANE][2][3], 1, "d6 is row 2, column 3.")
+        np.testing.assert_array_equal(planes[CASTLING_PLANES].any(axis=(1, 2)), [True, False, False, True])
+
+    def test_planes_match_board(self):
+        values = np.array([1, 2, 3, 4, 5, 6, -1, -2, -3, -4, -5, -6])
+        for board in random_boards(10, seed=1):
+            planes = encode_planes(board)
+            np.testing.assert_array_equal(np.tensordot(values, planes[:12], axes=1), encode_board(board))
+
+
+
+    ###########################################
+    ###### incremental update unit testing ####
+    ###########################################
+
+    def test_patched_observation_matches_rebuild(self):
+        # Castling both ways, en passant & an under-promotion
+        ucis = [
+            "e2e4", "g8f6", "e4e5", "d7d5", "e5d6", "b8c6", "g1f3", "c8f5", "f1e2", "d8d7",
+            "e1g1", "e8c8", "d6c7", "f6e4",
+        ]
+        for mode in ("board", "planes"):
+            env = ChessEnv(observation_mode=mode, debug_observation=True)
+            env.reset()
+            for uci in ucis:
+                observation, _, _, _, info = env.step(env.move_to_action[chess.Move.from_uci(uci)])
+                self.assertNotEqual(info.get("reason"), "illegal move", uci)
+            np.testing.assert_array_equal(observation, env.build_observation())
+
+            env.board.set_fen("8/P7/8/8/8/8/8/k6K w - - 0 1")
+            env.refresh_observation()
+            observation, *_ = env.step(env.move_to_action[chess.Move.from_uci("a7a8n")])
+            np.testing.assert_array_equal(observation, env.build_observation())
+
+    def test_random_games_match_rebuild(self):
+        rng = random.Random(3)
+        env = ChessEnv(observation_mode="planes", debug_observation=True)
+        for _ in range(3):
+            env.reset()
+            done = False
+            while not done:
+                legal = [env.move_to_action[move] for move in env.board.legal_moves if move in env.move_to_action]
+                if not legal:
+                    break
+                _, _, done, _, _ = env.step(rng.choice(legal))  # Debug mode raises on any mismatch
+
+    def test_debug_mode_detects_stale_observation(self):
+        env = ChessEnv(debug_observation=True)
+        env.reset()
+        env.board.set_fen("8/8/8/8/4K3/8/8/k7 w - - 0 1")
+        with self.assertRaises(RuntimeError):
+            env.get_observation()
+        env.refresh_observation()
+        np.testing.assert_array_equal(env.get_observation(), encode_board(env.board))
+
+
+
+    ###########################################
+    ###### environment unit testing ###########
+    ###########################################
+
+    def test_envs_planes_mode(self):
+        env = ChessEnv(observation_mode="planes")
+        observation, _ = env.reset()
+        self.assertEqual(observation.shape, env.observation_space.shape)
+        self.assertTrue(env.observation_space.contains(observation))
+
+        simple = SimpleChessEnv(observation_mode="planes")
+        observation, _ = simple.reset(seed=0)
+        self.assertEqual(observation.shape, (PLANE_COUNT + 1, 8, 8))
+        self.assertEqual(observation[-1].sum(), 1, "The last plane marks the goal square.")
+
+        with self.assertRaises(ValueError):
+            ChessEnv(observation_mode="pixels")
+
+    def test_batch_planes_match_chess_env(self):
+        batch = BatchChessEnv(num_envs=2, observation_mode="planes")
+        env = ChessEnv(observation_mode="planes")
+        env.reset()
+        e2e4 = env.move_to_action[chess.Move.from_uci("e2e4")]
+        batch.reset()
+        observation, *_ = batch.step([e2e4, e2e4])
+        expected, *_ = env.step(e2e4)
+        np.testing.assert_array_equal(observation[0], expected)
+        self.assertEqual(observation.shape, (2, PLANE_COUNT, 8, 8))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import io
+import os
+import tempfile
+import unittest
+
+import chess
+import chess.pgn
+import numpy as np
+
+from environment.chess_env import ChessEnv
+from environment.positions import unpack_board
+from training_data.pgn_converter import convert_pgn, encode_game, split_games
+from training_data.shards import load_manifest, load_shards
+
+GAMES = (
+    '[Event "Scholar"]\n[Result "1-0"]\n\n1. e4 e5 2. Qh5 Nc6 3. Bc4 Nf6 4. Qxf7# 1-0\n',
+    '[Event "Broken"]\n[Result "*"]\n\n1. e4 e4 *\n',
+    '[Event "Promotion"]\n[FEN "8/P6k/8/8/8/8/8/K7 w - - 0 1"]\n[Result "1/2-1/2"]\n\n1. a8=Q Kg6 1/2-1/2\n',
+    '[Event "Queen\'s Gambit"]\n[Result "0-1"]\n\n1. d4 d5 2. c4 dxc4\n3. e3 b5 0-1\n',
+)
+PGN = "\n".join(GAMES)
+
+
+def replay(text, mode):
+    """Observations & actions of a game played through ChessEnv."""
+    game = chess.pgn.read_game(io.StringIO(text))
+    env = ChessEnv(observation_mode=mode)
+    observation, _ = env.reset(options={"fen": game.board().fen()})
+    observations, actions = [], []
+    for move in game.mainline_moves():
+        observations.append(env.get_observation())
+        actions.append(env.move_to_action[move])
+        env._push(move)
+    return np.array(observations), np.array(actions)
+
+
+class TestPgnConverter(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pgn_path = os.path.join(self.directory.name, "games.pgn")
+        with open(self.pgn_path, "w") as handle:
+            handle.write(PGN)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    ###########################################
+    ###### encoding unit testing ##############
+    ###########################################
+
+    def test_split_games(self):
+        self.assertEqual(list(split_games(io.StringIO(PGN))), [GAMES[0] + "\n", GAMES[1] + "\n", GAMES[2] + "\n", GAMES[3]])
+
+    def test_encode_game_matches_chess_env(self):
+        for mode in ("board", "planes"):
+            arrays, skipped = encode_game(GAMES[0], mode)
+            expected_observations, expected_actions = replay(GAMES[0], mode)
+            np.testing.assert_array_equal(arrays["observations"], expected_observations)
+            np.testing.assert_array_equal(arrays["actions"], expected_actions)
+            np.testing.assert_array_equal(arrays["outcomes"], [1, -1, 1, -1, 1, -1, 1])
+            self.assertEqual(unpack_board(arrays["positions"][2]).fen(), "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2")
+            self.assertEqual(skipped, 0)
+
+        self.assertIsNone(encode_game(GAMES[1]))  # Illegal move
+        arrays, _ = encode_game(GAMES[2])
+        self.assertEqual(arrays["actions"][0], ChessEnv().move_to_action[chess.Move.from_uci("a7a8q")])
+        np.testing.assert_array_equal(arrays["outcomes"], [0, 0])
+
+
+
+    ###########################################
+    ###### conversion unit testing ############
+    ###########################################
+
+    def test_convert_and_resume(self):
+        full_dir = os.path.join(self.directory.name, "full")
+        summary = convert_pgn(self.pgn_path, full_dir, shard_size=4, workers=0, log=None)
+        self.assertEqual((summary["games"], summary["invalid_games"], summary["positions"]), (4, 1, 15))
+        self.assertGreater(summary["games_per_sec"], 0)
+        self.assertEqual([shard["games"] for shard in summary["shards"]], [1, 3])
+
+        # Stopped after two games, then resumed with a process pool
+        resumed_dir = os.path.join(self.directory.name, "resumed")
+        convert_pgn(self.pgn_path, resumed_dir, shard_size=4, workers=0, max_games=2, log=None)
+        self.assertEqual(load_manifest(resumed_dir)["games"], 2)
+        convert_pgn(self.pgn_path, resumed_dir, shard_size=4, workers=2, log=None)
+
+        full, resumed = load_shards(full_dir), load_shards(resumed_dir)
+        self.assertEqual(load_manifest(resumed_dir)["games"], 4)
+        for field in full:
+            np.testing.assert_array_equal(full[field], resumed[field])
+
+        with self.assertRaises(ValueError):
+            convert_pgn(self.pgn_path, full_dir, mode="planes", log=None)
+
+
+if __name__ == '__main__':
+    unittest.main()
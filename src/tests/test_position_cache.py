@@ -0,0 +1,119 @@
+import contextlib
+import io
+import random
+import unittest
+
+import chess
+import numpy as np
+
+from environment.chess_env import ChessEnv
+from environment.position_cache import ENTRY_OVERHEAD, PositionCache
+from environment.simple_chess_env import SimpleChessEnv
+from environment.zobrist import zobrist_hash
+
+
+class TestPositionCache(unittest.TestCase):
+
+    ###########################################
+    ###### PositionCache unit testing #########
+    ###########################################
+
+    def test_lru_eviction_and_counters(self):
+        mask, observation = np.zeros(64, dtype=bool), np.zeros((8, 8), dtype=np.int8)
+        entry_bytes = 8 + 64 + ENTRY_OVERHEAD
+        cache = PositionCache(max_bytes=2 * entry_bytes)
+
+        cache.put(1, mask, observation, ())
+        cache.put(2, mask, observation, ())
+        self.assertIsNotNone(cache.get(1))  # 1 becomes the most recently used
+        cache.put(3, mask, observation, ())
+
+        self.assertNotIn(2, cache, "The least recently used entry is evicted.")
+        self.assertIsNone(cache.get(2))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (1, 1, 1))
+        self.assertEqual(stats["bytes"], 2 * entry_bytes)
+        self.assertLessEqual(stats["bytes"], stats["max_bytes"])
+
+    def test_entries_are_read_only_copies(self):
+        mask = np.array([True, False, True])
+        observation = np.ones((8, 8), dtype=np.int8)
+        entry = PositionCache().put("key", mask, observation, (False, True, False))
+        observation[0, 0] = 5
+        self.assertEqual(entry.observation[0, 0], 1)
+        self.assertFalse(entry.observation.flags.writeable)
+        np.testing.assert_array_equal(PositionCache.unpack_mask(entry, 3), mask)
+
+
+
+    ###########################################
+    ###### ChessEnv unit testing ##############
+    ###########################################
+
+    def test_chess_env_matches_uncached(self):
+        for mode in ("board", "planes"):
+            rng = random.Random(5)
+            cached, plain = ChessEnv(observation_mode=mode, cache=True), ChessEnv(observation_mode=mode)
+            for game in range(4):
+                np.testing.assert_array_equal(cached.reset()[0], plain.reset()[0])
+                done = False
+                while not done:
+                    np.testing.assert_array_equal(cached.action_masks(), plain.action_masks())
+                    legal = [plain.move_to_action[move] for move in plain.board.legal_moves if move in plain.move_to_action]
+                    action = rng.choice(legal) if legal and rng.random() < 0.9 else rng.randrange(4160)
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        expected, actual = plain.step(action), cached.step(action)
+                    np.testing.assert_array_equal(actual[0], expected[0])
+                    self.assertEqual(actual[1:], expected[1:])
+                    done = expected[2]
+                self.assertEqual(cached._position_key, zobrist_hash(cached.board))
+
+            self.assertGreater(cached.cache_stats()["hits"], 0)
+            self.assertEqual(plain.cache_stats(), {})
+
+    def test_castling_as_king_takes_rook_matches_uncached(self):
+        fen = "r3k2r/pppppppp/8/8/8/8/PPPPPPPP/R3K2R w KQkq - 0 1"
+        results = []
+        for cache in (False, True):
+            env = ChessEnv(cache=cache)
+            env.reset(options={"fen": fen})
+            with contextlib.redirect_stdout(io.StringIO()):
+                _, reward, _, _, _ = env.step(chess.E1 * 64 + chess.H1)
+            results.append((reward, env.board.fen()))
+        self.assertEqual(results[0], results[1])
+        self.assertIsNone(chess.Board(results[1][1]).piece_at(chess.E1), "The king castled.")
+
+    def test_shared_cache_hits_on_replayed_opening(self):
+        cache = PositionCache()
+        opening = [chess.Move.from_uci(uci) for uci in ("e2e4", "e7e5", "g1f3", "b8c6")]
+        for _ in range(2):
+            env = ChessEnv(cache=cache)
+            env.reset()
+            for move in opening:
+                env.step(env.move_to_action[move])
+        self.assertEqual(cache.stats()["entries"], 5, "The start position & four replies.")
+        self.assertEqual((cache.hits, cache.misses), (5, 5), "The second game only hits.")
+
+
+
+    ###########################################
+    ###### SimpleChessEnv unit testing ########
+    ###########################################
+
+    def test_simple_chess_env_matches_uncached(self):
+        rng = random.Random(2)
+        cached, plain = SimpleChessEnv(cache=True), SimpleChessEnv()
+        for seed in range(3):
+            np.testing.assert_array_equal(cached.reset(seed=seed)[0], plain.reset(seed=seed)[0])
+            done = False
+            while not done:
+                self.assertEqual(cached.legal_actions(), sorted(plain.legal_actions()))
+                action = rng.randrange(4096) if rng.random() < 0.2 else rng.choice(plain.legal_actions())
+                expected, actual = plain.step(action), cached.step(action)
+                np.testing.assert_array_equal(actual[0], expected[0])
+                self.assertEqual(actual[1:], expected[1:])
+                done = expected[2] or expected[3]
+
+
+if __name__ == '__main__':
+    unittest.main()
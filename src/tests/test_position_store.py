@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+
+import chess
+import numpy as np
+
+from environment.chess_env import ChessEnv
+from environment.position_store import HEADER_SIZE, PositionStore, PositionStoreWriter
+from environment.positions import POSITION_DTYPE, pack_fens, unpack_board
+
+FENS = (
+    chess.STARTING_FEN,
+    "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",
+    "r3k2r/8/8/8/8/8/8/R3K2R b Kq - 12 40",
+    "8/5pk1/6p1/8/3R4/6PP/r4PK1/8 w - - 0 40",
+)
+
+
+class TestPositionStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "positions.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    ###########################################
+    ###### writer unit testing ################
+    ###########################################
+
+    def test_bulk_append_and_reopen(self):
+        with PositionStoreWriter(self.path) as writer:
+            self.assertEqual(writer.append(pack_fens(FENS[:2])), 2)
+
+        with PositionStoreWriter(self.path) as writer:
+            self.assertEqual(writer.append_boards(chess.Board(fen) for fen in FENS[2:]), len(FENS))
+
+        self.assertEqual(os.path.getsize(self.path), HEADER_SIZE + len(FENS) * POSITION_DTYPE.itemsize)
+        store = PositionStore(self.path)
+        self.assertEqual(len(store), len(FENS))
+        self.assertEqual([unpack_board(store[i]).fen() for i in range(len(store))], list(FENS))
+
+        with PositionStoreWriter(self.path, overwrite=True):
+            pass
+        self.assertEqual(len(PositionStore(self.path)), 0)
+
+    def test_rejects_bad_input(self):
+        with PositionStoreWriter(self.path) as writer:
+            with self.assertRaises(ValueError):
+                writer.append(np.zeros(3, dtype=np.int64))
+
+        with open(self.path, "r+b") as handle:
+            handle.write(b"NOTASTORE")
+        with self.assertRaises(ValueError):
+            PositionStore(self.path)
+
+
+
+    ###########################################
+    ###### reader unit testing ################
+    ###########################################
+
+    def test_observations_match_chess_env(self):
+        with PositionStoreWriter(self.path) as writer:
+            writer.append(pack_fens(FENS))
+        store = PositionStore(self.path)
+
+        for mode in ("board", "planes"):
+            env = ChessEnv(observation_mode=mode)
+            expected = []
+            for fen in FENS:
+                observation, _ = env.reset(options={"fen": fen})
+                expected.append(observation)
+
+            np.testing.assert_array_equal(store.observations(mode=mode), np.array(expected))
+            np.testing.assert_array_equal(store.observations(slice(1, 3), mode=mode), np.array(expected[1:3]))
+            np.testing.assert_array_equal(store.observations(np.array([3, 0]), mode=mode), np.array(expected)[[3, 0]])
+
+    def test_pool_reads_mapped_records(self):
+        with PositionStoreWriter(self.path) as writer:
+            writer.append(pack_fens(FENS))
+
+        env = ChessEnv(position_pool=PositionStore(self.path).pool())
+        env.reset(seed=0)
+        self.assertIn(env.board.fen(), FENS)
+
+
+if __name__ == '__main__':
+    unittest.main()
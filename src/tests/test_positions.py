@@ -0,0 +1,99 @@
+import random
+import unittest
+
+import chess
+import numpy as np
+
+from environment.chess_env import ChessEnv
+from environment.positions import POSITION_DTYPE, PositionPool, load_position, pack_board, unpack_board
+
+FENS = (
+    chess.STARTING_FEN,
+    "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",
+    "r3k2r/8/8/8/8/8/8/R3K2R b Kq - 12 40",
+    "8/5pk1/6p1/8/3R4/6PP/r4PK1/8 w - - 0 40",
+)
+
+
+class TestPositions(unittest.TestCase):
+
+    ###########################################
+    ###### packing unit testing ###############
+    ###########################################
+
+    def test_round_trip(self):
+        for fen in FENS:
+            record = pack_board(chess.Board(fen))
+            self.assertEqual(record.dtype, POSITION_DTYPE)
+            self.assertEqual(unpack_board(record).fen(), fen)
+
+    def test_load_clears_history(self):
+        board = chess.Board()
+        for uci in ("e2e4", "e7e5"):
+            board.push_uci(uci)
+        load_position(board, pack_board(chess.Board(FENS[2])))
+        self.assertEqual(board.fen(), FENS[2])
+        self.assertEqual(len(board.move_stack), 0)
+        self.assertEqual(board.legal_moves.count(), chess.Board(FENS[2]).legal_moves.count())
+
+
+
+    ###########################################
+    ###### PositionPool unit testing ##########
+    ###########################################
+
+    def test_pool_sampling(self):
+        pool = PositionPool.from_fens(FENS)
+        self.assertEqual(len(pool), len(FENS))
+        rng = np.random.default_rng(0)
+        sampled = {unpack_board(pool.sample(rng)).fen() for _ in range(50)}
+        self.assertEqual(sampled, set(FENS))
+
+        with self.assertRaises(ValueError):
+            PositionPool(np.zeros(3, dtype=np.int64))
+
+
+
+    ###########################################
+    ###### ChessEnv.reset unit testing ########
+    ###########################################
+
+    def test_reset_options(self):
+        env = ChessEnv(debug_observation=True)
+        observation, info = env.reset(options={"fen": FENS[2]})
+        self.assertEqual(env.board.fen(), FENS[2])
+        self.assertEqual(info["starting_player"], "black")
+        self.assertFalse(env.current_player)
+
+        env.reset(options={"position": pack_board(chess.Board(FENS[1]))})
+        self.assertEqual(env.board.fen(), FENS[1])
+        _, _, _, _, info = env.step(env.move_to_action[chess.Move.from_uci("e5f6")])  # En passant
+        self.assertNotIn("reason", info)
+
+        with self.assertRaises(ValueError):
+            env.reset(options={"fen": "8/8/8/8/8/8/8/8 w - - 0 1"})
+
+    def test_reset_from_pool_is_seeded(self):
+        pool = PositionPool.from_fens(FENS)
+        first, second = ChessEnv(position_pool=pool), ChessEnv(position_pool=pool)
+        first.reset(seed=3)
+        second.reset(seed=3)
+        starts = []
+        for _ in range(20):
+            first.reset()
+            second.reset()
+            self.assertEqual(first.board.fen(), second.board.fen())
+            starts.append(first.board.fen())
+        self.assertGreater(len(set(starts)), 1)
+
+        rng = random.Random(0)
+        for _ in range(30):  # Stepping from a pooled start keeps the incremental state in sync
+            legal = [first.move_to_action[move] for move in first.board.legal_moves if move in first.move_to_action]
+            if not legal:
+                break
+            first.step(rng.choice(legal))
+        self.assertEqual(first.evaluator.scores(chess.WHITE), first.position_scores(first.board, chess.WHITE))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,17 @@
 import unittest
 import os
 import shutil
+import tempfile
 
-from src.agents.ppo_agent import create_model
+import numpy as np
+
+from src.agents.ppo_agent import DEFAULT_STAGE, FULL_GAME, compare_masking, create_model, make_env
+from src.environment.trajectory import TrajectoryLog
+
+try:
+    import sb3_contrib
+except ImportError:  # pragma: no cover - optional dependency
+    sb3_contrib = None
 
 
 class TestPPOAgent(unittest.TestCase):
@@ -20,6 +29,70 @@ class TestPPOAgent(unittest.TestCase):
             if os.path.exists(log_dir):
                 shutil.rmtree(log_dir, ignore_errors=True)
 
+    @unittest.skipIf(sb3_contrib is None, "sb3-contrib is not installed")
+    def test_create_masked_model_for_full_game(self):
+        log_dir = "./tmp_test_ppo_logs/"
+        model = None
+        try:
+            model = create_model(stage=FULL_GAME, tensorboard_log=log_dir, masked=True)
+            self.assertEqual(type(model).__name__, "MaskablePPO")
+            self.assertEqual(model.action_space.n, 4160)
+        finally:
+            if model is not None:
+                model.env.close()
+            if os.path.exists(log_dir):
+                shutil.rmtree(log_dir, ignore_errors=True)
+
+    @unittest.skipIf(sb3_contrib is None, "sb3-contrib is not installed")
+    def test_compare_masking_reports_both_runs(self):
+        results = compare_masking(total_timesteps=512, window=5, target_win_rate=0.0, tensorboard_log=None)
+
+        self.assertEqual(set(results), {"unmasked", "masked"})
+        # Masked training never picks an illegal move
+        self.assertEqual(results["masked"]["steps_per_legal_move"], 1.0)
+        self.assertGreaterEqual(results["unmasked"]["steps_per_legal_move"], 1.0)
+
+    def test_make_env_backends_match(self):
+        actions = np.zeros(3, dtype=np.int64)
+        results = {}
+        for backend in ("dummy", "subproc", "shm"):
+            env = make_env(n_envs=3, backend=backend, start_method="fork", seed=7)
+            try:
+                observation = env.reset()
+                step = env.step(actions)
+                results[backend] = (observation, step[0], step[1], step[2])
+            finally:
+                env.close()
+
+        for backend in ("subproc", "shm"):
+            for expected, actual in zip(results["dummy"], results[backend]):
+                # DummyVecEnv keeps rewards as float32, the worker backends as float64
+                np.testing.assert_allclose(actual, expected, rtol=1e-6)
+
+        # Per-worker seeds give each worker its own target square
+        targets = results["dummy"][0][:, 1]
+        self.assertFalse(all(np.array_equal(targets[0], target) for target in targets[1:]))
+
+    def test_make_env_records_episodes(self):
+        with tempfile.TemporaryDirectory() as record_dir:
+            env = make_env(n_envs=2, seed=3, record_dir=record_dir)
+            try:
+                env.reset()
+                for _ in range(20):
+                    env.step(np.zeros(2, dtype=np.int64))
+            finally:
+                env.close()
+
+            for index in range(2):
+                log = TrajectoryLog(os.path.join(record_dir, f"{DEFAULT_STAGE}_{index}.traj"))
+                self.assertEqual(log.metadata["stage"], DEFAULT_STAGE)
+                self.assertEqual(log[0].seed, 3 + index)
+                self.assertEqual(log.total_steps(), 20)
+
+    def test_make_env_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            make_env(backend="ray")
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.agents.ppo_agent import FULL_GAME, create_model
+from src.agents.pretrain import ShardBatchLoader, pretrain
+from src.training_data.pgn_converter import convert_pgn
+
+GAME = '[Result "1-0"]\n\n1. e4 e5 2. Qh5 Nc6 3. Bc4 Nf6 4. Qxf7# 1-0\n\n'
+
+
+class TestPretrain(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        pgn_path = os.path.join(self.directory.name, "games.pgn")
+        with open(pgn_path, "w") as handle:
+            handle.write(GAME * 6)
+        self.data_dir = os.path.join(self.directory.name, "shards")
+        convert_pgn(pgn_path, self.data_dir, shard_size=14, workers=0, log=None)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    ###########################################
+    ###### ShardBatchLoader unit testing ######
+    ###########################################
+
+    def test_loader_batches(self):
+        loader = ShardBatchLoader(self.data_dir, batch_size=5, shuffle=False)
+        batches = list(loader)
+        self.assertEqual(sum(len(actions) for _, actions, _ in batches), 42)
+        self.assertEqual(len(batches), 9)  # 14 positions per shard in batches of 5
+        self.assertTrue(all(masks is None for _, _, masks in batches))
+
+        masked = ShardBatchLoader(self.data_dir, batch_size=8, masked=True, seed=0)
+        for observations, actions, masks in masked:
+            self.assertEqual(masks.shape, (len(actions), 4160))
+            self.assertTrue(masks[np.arange(len(actions)), actions].all())
+
+    def test_loader_stops_early(self):
+        for _ in zip(range(1), ShardBatchLoader(self.data_dir, batch_size=1, prefetch=1)):
+            pass  # The producer thread must not block when the consumer stops
+
+
+
+    ###########################################
+    ###### pretrain unit testing ##############
+    ###########################################
+
+    def test_pretrain_fits_moves(self):
+        model = create_model(stage=FULL_GAME, tensorboard_log=None)
+        try:
+            _, history = pretrain(model, self.data_dir, epochs=15, batch_size=16, masked=True, seed=0, log=None)
+        finally:
+            model.env.close()
+
+        self.assertEqual(len(history), 15)
+        self.assertEqual(history[0]["samples"], 42)
+        self.assertLess(history[-1]["loss"], history[0]["loss"])
+        self.assertEqual(history[-1]["accuracy"], 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+import random
+import unittest
+
+import chess
+import numpy as np
+
+from environment.chess_env import ChessEnv
+from environment.evaluator import IncrementalEvaluator
+from environment.search import MATE_SCORE, AlphaBetaSearcher
+
+MATE_IN_ONE = "6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1"  # a1a8#
+HANGING_QUEEN = "rnb1kbnr/pppp1ppp/8/4p1q1/4P3/3P4/PPP2PPP/RNBQKBNR w KQkq - 1 3"  # c1g5 wins the queen
+MATED_BY_REPLY = "k7/8/1K6/8/8/8/8/7R b - - 0 1"  # Kb8 is the only move, then Rh8#
+FREE_QUEEN = "4k3/7p/8/3q4/8/2N5/7P/4K3 w - - 0 1"  # c3d5 wins the queen
+QUEEN_EN_PRISE = "4k3/7p/8/4b3/3Q4/8/P6P/4K3 w - - 0 1"  # e5d4 answers a quiet move
+
+
+class TestSearch(unittest.TestCase):
+
+    ###########################################
+    ###### search unit testing ################
+    ###########################################
+
+    def test_finds_mate_in_one(self):
+        for depth in (1, 2):
+            for quiescence in (False, True):
+                searcher = AlphaBetaSearcher(max_depth=depth, quiescence=quiescence)
+                result = searcher.search(chess.Board(MATE_IN_ONE))
+                self.assertEqual(result.move, chess.Move.from_uci("a1a8"))
+                self.assertGreaterEqual(result.score, MATE_SCORE - 1)
+
+    def test_wins_hanging_queen(self):
+        for depth in (1, 2, 3):
+            result = AlphaBetaSearcher(max_depth=depth).search(chess.Board(HANGING_QUEEN))
+            self.assertEqual(result.move, chess.Move.from_uci("c1g5"))
+            self.assertEqual(result.depth, depth)
+
+    def test_board_left_unchanged(self):
+        board = chess.Board(HANGING_QUEEN)
+        fen = board.fen()
+        AlphaBetaSearcher(max_depth=2, quiescence=True).select_move(board)
+        self.assertEqual(board.fen(), fen)
+
+    def test_static_leaf_scores_match_pushed_scores(self):
+        # Leaves scored without a push must equal evaluate() after the push
+        searcher = AlphaBetaSearcher()
+        rng = random.Random(3)
+        for _ in range(5):
+            board = chess.Board()
+            for _ in range(60):
+                moves = list(board.legal_moves)
+                if not moves:
+                    break
+                searcher.search(board)
+                leaf = searcher._leaf_context()
+                for move in moves:
+                    score = searcher._static_score(move, *leaf)
+                    if score is not None:
+                        self.assertFalse(board.gives_check(move))  # Checks are pushed, they may mate
+                        searcher._push(move)
+                        pushed = -searcher.evaluate()
+                        searcher._pop()
+                        self.assertAlmostEqual(score, pushed, places=9, msg=f"{board.fen()} {move}")
+                board.push(rng.choice(moves))
+
+    def test_evaluate_uses_env_terms(self):
+        board = chess.Board(HANGING_QUEEN)
+        searcher = AlphaBetaSearcher()
+        searcher.search(board)
+        material, central, safety = IncrementalEvaluator(board).scores(chess.WHITE)
+        _, other_central, other_safety = IncrementalEvaluator(board).scores(chess.BLACK)
+        expected = material * 39 + central - other_central + safety - other_safety
+        self.assertAlmostEqual(searcher.evaluate(), expected)
+
+
+
+    ###########################################
+    ###### budgets & table unit testing #######
+    ###########################################
+
+    def test_node_budget(self):
+        searcher = AlphaBetaSearcher(max_depth=6, max_nodes=500)
+        result = searcher.search(chess.Board())
+        self.assertLessEqual(result.nodes, 501)
+        self.assertLess(result.depth, 6)
+        self.assertIn(result.move, chess.Board().legal_moves)
+
+    def test_budget_spent_before_depth_one(self):
+        result = AlphaBetaSearcher(max_nodes=1).search(chess.Board())
+        self.assertEqual(result.depth, 0)
+        self.assertIn(result.move, chess.Board().legal_moves)
+
+    def test_time_budget(self):
+        searcher = AlphaBetaSearcher(max_depth=10, time_limit=0.05)
+        result = searcher.search(chess.Board())
+        self.assertLess(result.seconds, 1.0)
+        self.assertLess(result.depth, 10)
+        self.assertIn(result.move, chess.Board().legal_moves)
+
+    def test_transposition_table_bounded_and_kept(self):
+        searcher = AlphaBetaSearcher(max_depth=3, tt_entries=50)
+        searcher.search(chess.Board())
+        self.assertEqual(len(searcher.table), 50)
+
+        searcher.search(chess.Board())
+        self.assertGreater(searcher.last_result.tt_hits, 0)
+
+        searcher.clear()
+        self.assertEqual(len(searcher.table), 0)
+
+    def test_table_mate_scores_follow_ply(self):
+        # Mates stored while searching the previous move are found one ply
+        # closer to the root: the distance must be counted from there
+        searcher = AlphaBetaSearcher(max_depth=3)
+        board = chess.Board("7k/8/5K2/8/8/8/8/1R6 w - - 0 1")
+        board.push(searcher.search(board).move)
+
+        self.assertEqual(searcher.search(board).score, AlphaBetaSearcher(max_depth=3).search(board).score)
+        self.assertEqual(searcher.last_result.score, -MATE_SCORE + 2)
+
+    def test_invalid_depth(self):
+        with self.assertRaises(ValueError):
+            AlphaBetaSearcher(max_depth=0)
+
+
+
+    ###########################################
+    ###### ChessEnv opponent unit testing #####
+    ###########################################
+
+    def test_env_opponent_replies_in_step(self):
+        env = ChessEnv(opponent=AlphaBetaSearcher())
+        env.reset(seed=0)
+        action = env.move_to_action[chess.Move.from_uci("e2e4")]
+        _, _, done, _, info = env.step(action)
+
+        self.assertFalse(done)
+        self.assertEqual(len(env.board.move_stack), 2)
+        self.assertEqual(info["opponent_move"], env.board.move_stack[-1].uci())
+        self.assertEqual(env.board.turn, chess.WHITE)
+        self.assertEqual(env.current_player, chess.WHITE)
+
+    def test_env_opponent_moves_first(self):
+        env = ChessEnv(opponent=AlphaBetaSearcher(), agent_color=chess.BLACK)
+        observation, _ = env.reset()
+        self.assertEqual(len(env.board.move_stack), 1)
+        self.assertEqual(env.board.turn, chess.BLACK)
+        np.testing.assert_array_equal(observation, env.build_observation())
+
+    def test_env_opponent_mates_agent(self):
+        env = ChessEnv(opponent=AlphaBetaSearcher(), agent_color=chess.BLACK, info_level="minimal")
+        env.reset(options={"fen": MATED_BY_REPLY})
+        action = env.move_to_action[chess.Move.from_uci("a8b8")]
+        _, reward, done, _, info = env.step(action)
+
+        self.assertTrue(done)
+        self.assertTrue(env.board.is_checkmate())
+        self.assertEqual(info["winner"], "white")
+        self.assertLess(reward, -0.5)
+
+    def test_env_opponent_reward_for_agent(self):
+        env = ChessEnv(opponent=AlphaBetaSearcher())
+
+        env.reset(options={"fen": FREE_QUEEN})
+        _, reward, _, _, _ = env.step(env.move_to_action[chess.Move.from_uci("c3d5")])
+        self.assertGreater(reward, 0.5, "Winning the queen is scored for the agent.")
+
+        env.reset(options={"fen": QUEEN_EN_PRISE})
+        _, reward, _, _, _ = env.step(env.move_to_action[chess.Move.from_uci("a2a3")])
+        self.assertEqual(env.board.move_stack[-1], chess.Move.from_uci("e5d4"))
+        self.assertLess(reward, -0.5, "The queen taken by the reply counts against the agent.")
+
+        env = ChessEnv(opponent=AlphaBetaSearcher(), agent_color=chess.BLACK)
+        env.reset(options={"fen": chess.Board(QUEEN_EN_PRISE).mirror().fen()})
+        _, reward, _, _, _ = env.step(env.move_to_action[chess.Move.from_uci("a7a6")])
+        self.assertLess(reward, -0.5, "Black agents are scored for Black.")
+
+    def test_env_opponent_deterministic(self):
+        def play():
+            env = ChessEnv(opponent=AlphaBetaSearcher(), info_level="none")
+            env.reset(seed=1)
+            rng = np.random.default_rng(1)
+            for _ in range(20):
+                _, _, done, _, _ = env.step(int(rng.choice(np.flatnonzero(env.action_masks()))))
+                if done:
+                    break
+            return [move.uci() for move in env.board.move_stack]
+
+        self.assertEqual(play(), play())
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import torch
+
+from src.agents.ppo_agent import FULL_GAME, create_model, load_model
+from src.agents.tournament import (
+    MatchGame,
+    ResultCache,
+    elo_ratings,
+    glicko_ratings,
+    load_player,
+    play_match,
+    run_tournament,
+    swiss_pairings,
+)
+from src.environment.simple_chess_env import STAGE_REACH_SQUARE
+
+try:
+    import sb3_contrib
+except ImportError:  # pragma: no cover - optional dependency
+    sb3_contrib = None
+
+
+class TestTournament(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.paths = []
+        for seed in range(3):
+            model = create_model(stage=FULL_GAME, tensorboard_log=None, seed=seed)
+            path = os.path.join(cls.directory.name, f"checkpoint_{seed}.zip")
+            model.save(path)
+            model.env.close()
+            cls.paths.append(path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def setUp(self):
+        self.cache_path = os.path.join(self.directory.name, "results.sqlite")
+
+    def tearDown(self):
+        if os.path.exists(self.cache_path):
+            os.remove(self.cache_path)
+
+    ###########################################
+    ###### ratings unit testing ###############
+    ###########################################
+
+    def test_elo_orders_players_by_results(self):
+        ratings, errors = elo_ratings(3, {(0, 1): (8, 2, 0), (1, 2): (7, 0, 3), (0, 2): (9, 1, 0)})
+        self.assertGreater(ratings[0], ratings[1])
+        self.assertGreater(ratings[1], ratings[2])
+        self.assertTrue(np.all(errors > 0))
+
+    def test_elo_even_results_and_more_games(self):
+        ratings, errors = elo_ratings(2, {(0, 1): (5, 0, 5)})
+        np.testing.assert_allclose(ratings, [1500, 1500])
+        _, fewer_errors = elo_ratings(2, {(0, 1): (50, 0, 50)})
+        self.assertTrue(np.all(fewer_errors < errors))  # More games, narrower intervals
+
+    def test_elo_finite_for_unbeaten_player(self):
+        ratings, errors = elo_ratings(2, {(0, 1): (10, 0, 0)})
+        self.assertTrue(np.all(np.isfinite(ratings)))
+        self.assertGreater(ratings[0] - ratings[1], 200)
+
+    def test_glicko(self):
+        ratings, deviations = glicko_ratings(2, {(0, 1): (7, 2, 1)})
+        self.assertGreater(ratings[0], 1500)
+        self.assertLess(ratings[1], 1500)
+        self.assertTrue(np.all(deviations < 350))
+
+
+
+    ###########################################
+    ###### pairings & cache unit testing ######
+    ###########################################
+
+    def test_swiss_pairings(self):
+        pairs, bye = swiss_pairings([3.0, 1.0, 2.0, 0.0, 5.0], played={frozenset((4, 0))})
+        self.assertEqual(bye, 3)
+        self.assertEqual(pairs, [(4, 2), (0, 1)])  # 4 has already met 0
+
+        _, bye = swiss_pairings([3.0, 1.0, 2.0, 0.0, 5.0], played=set(), byes=[3])
+        self.assertEqual(bye, 1)
+
+    def test_cache_orders_players(self):
+        with ResultCache(self.cache_path) as cache:
+            cache.put("b", "a", "config", 3, 1, 2)
+            self.assertEqual(tuple(cache.get("a", "b", "config")), (2, 1, 3))
+            self.assertEqual(tuple(cache.get("b", "a", "config")), (3, 1, 2))
+            self.assertIsNone(cache.get("a", "b", "other"))
+            self.assertEqual(len(cache), 1)
+
+
+
+    ###########################################
+    ###### tournament unit testing ############
+    ###########################################
+
+    def test_play_match(self):
+        models = [load_model(path) for path in self.paths[:2]]
+        wins, draws, losses = play_match(models, games=4, max_plies=20)
+        self.assertEqual(wins + draws + losses, 4)
+
+    def test_match_games_distinct(self):
+        games = [MatchGame(index, seed=0) for index in range(8)]
+        openings = [game.env.board.fen() for game in games]
+        self.assertEqual(len(set(openings)), 4, "Every pair of games has its own opening.")
+        for even, odd in zip(games[::2], games[1::2]):
+            self.assertEqual(even.env.board.fen(), odd.env.board.fen())
+            self.assertNotEqual(even.first_white, odd.first_white, "Each opening is played with both colours.")
+        self.assertEqual(len(games[0].env.board.move_stack), 0)  # The policies' moves only
+
+    def test_sampled_match_reproducible(self):
+        models = [load_model(path) for path in self.paths[:2]]
+        first = play_match(models, games=4, seed=1, max_plies=20, deterministic=False)
+        torch.manual_seed(99)  # The global RNG is not used
+        self.assertEqual(play_match(models, games=4, seed=1, max_plies=20, deterministic=False), first)
+
+    def test_new_checkpoint_only_plays_new_pairings(self):
+        options = {"games_per_pair": 2, "max_plies": 20, "cache_path": self.cache_path, "log": None}
+        first = run_tournament(self.paths[:2], **options)
+        self.assertEqual(first["games_played"], 2)
+
+        second = run_tournament(self.paths, **options)
+        self.assertEqual(second["games_played"], 4)  # Two new pairings
+        self.assertEqual(second["games_cached"], 2)
+        self.assertEqual(len(second["standings"]), 3)
+        self.assertEqual(sum(row["games"] for row in second["standings"]), 12)
+
+        names = {row["name"] for row in second["standings"]}
+        self.assertEqual(names, {"checkpoint_0", "checkpoint_1", "checkpoint_2"})
+
+    def test_workers_match_single_process(self):
+        options = {"games_per_pair": 2, "max_plies": 20, "cache_path": None, "log": None}
+        single = run_tournament(self.paths, **options)
+        parallel = run_tournament(self.paths, workers=2, start_method="fork", **options)
+        self.assertEqual(single["pairs"], parallel["pairs"])
+
+    def test_swiss_tournament(self):
+        report = run_tournament(
+            self.paths, pairing="swiss", rounds=2, games_per_pair=2, max_plies=20, cache_path=None, log=None
+        )
+        self.assertEqual(len(report["pairs"]), 2)  # One pairing & one bye per round
+
+    def test_invalid_tournaments(self):
+        with self.assertRaises(ValueError):
+            run_tournament(self.paths, pairing="knockout", cache_path=None)
+        with self.assertRaises(ValueError):
+            run_tournament([self.paths[0], self.paths[0]], cache_path=None)
+
+    def test_curriculum_checkpoint_rejected(self):
+        model = create_model(stage=STAGE_REACH_SQUARE, tensorboard_log=None)
+        path = os.path.join(self.directory.name, "ppo_reach_square.zip")
+        model.save(path)
+        model.env.close()
+        with self.assertRaises(ValueError):
+            load_player(path)
+        with self.assertRaises(ValueError):
+            run_tournament([self.paths[0], path], cache_path=None, log=None)
+
+    @unittest.skipIf(sb3_contrib is None, "sb3-contrib is not installed")
+    def test_masked_checkpoint_detected(self):
+        model = create_model(stage=FULL_GAME, tensorboard_log=None, masked=True)
+        path = os.path.join(self.directory.name, "masked.zip")
+        model.save(path)
+        model.env.close()
+        self.assertTrue(load_player(path).masked)
+        self.assertFalse(load_player(self.paths[0]).masked)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
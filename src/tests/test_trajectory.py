@@ -0,0 +1,123 @@
+import os
+import tempfile
+import unittest
+
+import chess
+import numpy as np
+
+from environment.chess_env import ChessEnv
+from environment.positions import PositionPool, pack_board
+from environment.simple_chess_env import SimpleChessEnv
+from environment.trajectory import (
+    TrajectoryLog,
+    TrajectoryRecorder,
+    encode_options,
+    episode_observations,
+    replay_episode,
+)
+
+POOL_FENS = (
+    "r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1",
+    "8/5pk1/6p1/8/3R4/6PP/r4PK1/8 w - - 0 40",
+)
+
+
+def play(env, episodes, seed, steps=40):
+    """Plays seeded random masked moves and returns every episode's observations."""
+    rng = np.random.default_rng(seed)
+    recorded = []
+    observation, _ = env.reset(seed=seed)
+    for _ in range(episodes):
+        observations = [observation]
+        for _ in range(steps):
+            mask = env.unwrapped.action_masks()
+            observation, _, terminated, truncated, _ = env.step(int(rng.choice(np.flatnonzero(mask))))
+            observations.append(observation)
+            if terminated or truncated:
+                break
+        recorded.append(np.array(observations))
+        observation, _ = env.reset()
+    return recorded
+
+
+class TestTrajectory(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "episodes.traj")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    ###########################################
+    ###### record & replay unit testing #######
+    ###########################################
+
+    def test_chess_env_replay(self):
+        pool = PositionPool.from_fens(POOL_FENS)
+        env = TrajectoryRecorder(ChessEnv(observation_mode="planes", position_pool=pool), self.path)
+        recorded = play(env, episodes=3, seed=5)
+        env.close()  # Also writes the episode started by the last reset
+
+        log = TrajectoryLog(self.path)
+        self.assertEqual(log.metadata["env"], "ChessEnv")
+        self.assertEqual(len(log), 4)
+        for episode, observations in zip(log, recorded):
+            replayed = episode_observations(ChessEnv(observation_mode="planes", position_pool=pool), episode)
+            np.testing.assert_array_equal(replayed, observations)
+
+        # A handful of bytes per step next to 1152 per planes observation
+        steps = log.total_steps()
+        self.assertLess(os.path.getsize(self.path), steps * 1152 / 50)
+
+    def test_simple_chess_env_replay(self):
+        env = TrajectoryRecorder(SimpleChessEnv(), self.path)
+        recorded = play(env, episodes=4, seed=1, steps=10)
+        env.close()
+
+        for episode, observations in zip(TrajectoryLog(self.path), recorded):
+            np.testing.assert_array_equal(episode_observations(SimpleChessEnv(), episode), observations)
+
+    def test_options_and_divergence(self):
+        env = TrajectoryRecorder(ChessEnv(), self.path)
+        env.reset(seed=3, options={"fen": POOL_FENS[1]})
+        env.step(env.unwrapped.move_to_action[env.unwrapped.board.parse_uci("d4d7")])
+        env.close()
+
+        episode = TrajectoryLog(self.path)[0]
+        self.assertEqual(episode.options, {"fen": POOL_FENS[1]})
+        self.assertEqual(len(list(replay_episode(ChessEnv(), episode))), 1)
+
+        with self.assertRaises(RuntimeError):
+            list(replay_episode(ChessEnv(), episode._replace(rewards=episode.rewards + 1)))
+
+    def test_packed_position_options(self):
+        record = pack_board(chess.Board(POOL_FENS[1]))
+        env = TrajectoryRecorder(ChessEnv(), self.path)
+        env.reset(seed=4, options={"position": record, "note": np.int64(7)})
+        env.close()
+
+        with open(self.path, "rb") as handle:
+            self.assertNotIn(b"\x80\x04", handle.read())  # No pickle stream
+        options = TrajectoryLog(self.path)[0].options
+        self.assertEqual(options["note"], 7)
+        self.assertEqual(options["position"].tobytes(), record.tobytes())
+        self.assertEqual(len(list(replay_episode(ChessEnv(), TrajectoryLog(self.path)[0]))), 0)
+
+        with self.assertRaises(TypeError):
+            encode_options({"opponent": object()})
+
+    def test_appends_and_ignores_cut_records(self):
+        for seed in (0, 1):
+            env = TrajectoryRecorder(SimpleChessEnv(), self.path)
+            play(env, episodes=1, seed=seed, steps=5)
+            env.close()
+        self.assertEqual(len(TrajectoryLog(self.path)), 4)
+
+        with open(self.path, "r+b") as handle:
+            handle.truncate(os.path.getsize(self.path) - 3)
+        self.assertEqual(len(TrajectoryLog(self.path)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
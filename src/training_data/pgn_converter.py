@@ -0,0 +1,284 @@
+"""Streaming PGN to training array converter.
+
+Reads a PGN file one game at a time, encodes every position of each game's
+main line with the ``ChessEnv`` observation (see
+:func:`~environment.positions.encode_positions`) and every move with the
+shared 4160-id action codec, and writes the result as chunked shards (see
+:mod:`training_data.shards`)::
+
+    python -m training_data.pgn_converter games.pgn data/ --mode planes --workers 4
+
+Games are split from the raw text in the main process and parsed & encoded
+by a process pool, in order, so memory stays flat whatever the file size.
+Shards only ever end on a game boundary and the manifest records how many
+games they cover, so running the same command again after an interruption
+skips the converted games and carries on from the next shard.
+
+Moves the action codec cannot encode (promotions with capture and Black
+promotions) are played on the board but produce no training position; games
+that python-chess cannot parse are skipped.  Both are counted in the summary.
+"""
+
+import argparse
+import io
+import itertools
+import multiprocessing
+import os
+import sys
+import time
+
+import chess
+import chess.pgn
+import numpy as np
+
+try:  # Supports running with `src` on sys.path or importing `src.training_data...`
+    from environment.action_codec import ACTION_CODEC
+    from environment.observation import validate_observation_mode
+    from environment.positions import POSITION_DTYPE, encode_positions, pack_board
+    from training_data.shards import SHARD_FIELDS, load_manifest, save_manifest, write_shard
+except ImportError:  # pragma: no cover - import path fallback
+    from src.environment.action_codec import ACTION_CODEC
+    from src.environment.observation import validate_observation_mode
+    from src.environment.positions import POSITION_DTYPE, encode_positions, pack_board
+    from src.training_data.shards import SHARD_FIELDS, load_manifest, save_manifest, write_shard
+
+DEFAULT_SHARD_SIZE = 100_000  # Positions per shard, rounded up to whole games
+CHUNK_SIZE = 16  # Games handed to a worker at a time
+
+# Result header to the outcome for White.
+RESULT_VALUES = {"1-0": 1, "0-1": -1, "1/2-1/2": 0}
+
+
+###################################################
+###### Reading ####################################
+###################################################
+
+def split_games(handle):
+    """Yields the raw text of each game of an open PGN file.
+
+    A game ends where the next tag section starts, so games are split
+    without being parsed.
+    """
+    lines = []
+    in_movetext = False
+
+    for line in handle:
+        if line.startswith("[") and in_movetext:
+            yield "".join(lines)
+            lines = []
+            in_movetext = False
+        elif line.strip() and not line.startswith("["):
+            in_movetext = True
+        lines.append(line)
+
+    if in_movetext:
+        yield "".join(lines)
+
+
+def open_pgn(path):
+    return open(path, "r", encoding="utf-8-sig", errors="replace")
+
+
+###################################################
+###### Encoding ###################################
+###################################################
+
+def encode_game(text, mode="board"):
+    """``({field: array}, skipped_moves)`` of one game's text, with the
+    :data:`~training_data.shards.SHARD_FIELDS`, or ``None`` if it does not
+    parse."""
+    game = chess.pgn.read_game(io.StringIO(text))
+    if game is None or game.errors:
+        return None
+
+    board = game.board()
+    records, actions = [], []
+    skipped = 0
+
+    for move in game.mainline_moves():
+        action = ACTION_CODEC.move_to_action.get(move)
+        if action is None:
+            skipped += 1
+        else:
+            records.append(pack_board(board))
+            actions.append(action)
+        board.push(move)
+
+    records = np.array(records, dtype=POSITION_DTYPE)
+    white_result = RESULT_VALUES.get(game.headers.get("Result"), 0)
+    outcomes = np.where(records["turn"] == 1, white_result, -white_result).astype(np.int8)
+
+    arrays = {
+        "observations": encode_positions(records, mode),
+        "actions": np.array(actions, dtype=np.int16),
+        "outcomes": outcomes,
+        "positions": records,
+    }
+    return arrays, skipped
+
+
+def _encode_task(task):
+    text, mode = task
+    return encode_game(text, mode)
+
+
+def _pool_map(pool, tasks, workers):
+    # Pool.imap queues its whole input up front, so games are handed over a
+    # window at a time to keep memory flat on large files
+    window = workers * CHUNK_SIZE * 4
+    while True:
+        batch = list(itertools.islice(tasks, window))
+        if not batch:
+            return
+        yield from pool.imap(_encode_task, batch, CHUNK_SIZE)
+
+
+###################################################
+###### Conversion #################################
+###################################################
+
+def convert_pgn(
+    pgn_path,
+    output_dir,
+    mode="board",
+    shard_size=DEFAULT_SHARD_SIZE,
+    workers=None,
+    resume=True,
+    max_games=None,
+    log=print,
+):
+    """Converts ``pgn_path`` into shards in ``output_dir`` and returns the
+    manifest, with ``games_per_sec`` & ``positions_per_sec`` of this run.
+
+    ``workers`` defaults to the CPU count; ``0`` or ``1`` encodes in this
+    process.  With ``resume`` an existing manifest of the same mode is
+    continued, otherwise the conversion starts over.  ``max_games`` stops
+    after that many games in total, counting resumed ones.
+    """
+    validate_observation_mode(mode)
+    if shard_size <= 0:
+        raise ValueError(f"shard_size must be positive, got {shard_size}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    manifest = load_manifest(output_dir) if resume else None
+    if manifest is not None and manifest["mode"] != mode:
+        raise ValueError(f"{output_dir} holds {manifest['mode']!r} observations, not {mode!r}")
+    if manifest is None:
+        manifest = {
+            "source": os.path.basename(pgn_path),
+            "mode": mode,
+            "games": 0,
+            "positions": 0,
+            "invalid_games": 0,
+            "skipped_moves": 0,
+            "shards": [],
+        }
+
+    done = manifest["games"]
+    if max_games is not None and done >= max_games:
+        return manifest
+
+    workers = os.cpu_count() if workers is None else workers
+    buffer = {field: [] for field in SHARD_FIELDS}
+    pending = {"games": 0, "positions": 0, "invalid_games": 0, "skipped_moves": 0}
+    start = time.perf_counter()
+    converted = {"games": 0, "positions": 0}
+
+    def flush():
+        if pending["games"] == 0:
+            return
+
+        if pending["positions"]:
+            arrays = {field: np.concatenate(chunks) for field, chunks in buffer.items()}
+            name = write_shard(output_dir, len(manifest["shards"]), arrays)
+            manifest["shards"].append({"file": name, "games": pending["games"], "positions": pending["positions"]})
+
+        for key, value in pending.items():
+            manifest[key] += value
+            pending[key] = 0
+        for arrays in buffer.values():
+            arrays.clear()
+        save_manifest(output_dir, manifest)
+
+        elapsed = time.perf_counter() - start
+        if log is not None:
+            log(
+                f"{manifest['games']:,} games, {manifest['positions']:,} positions, "
+                f"{len(manifest['shards'])} shards ({converted['games'] / elapsed:,.1f} games/s)"
+            )
+
+    with open_pgn(pgn_path) as handle:
+        games = split_games(handle)
+        for _ in range(done):  # Already converted; split but not parsed
+            if next(games, None) is None:
+                break
+
+        if max_games is not None:
+            games = (text for _, text in zip(range(max_games - done), games))
+        tasks = ((text, mode) for text in games)
+
+        pool = multiprocessing.Pool(workers) if workers > 1 else None
+        try:
+            results = _pool_map(pool, tasks, workers) if pool else map(_encode_task, tasks)
+
+            for result in results:
+                pending["games"] += 1
+                converted["games"] += 1
+
+                if result is None:
+                    pending["invalid_games"] += 1
+                else:
+                    arrays, skipped = result
+                    for field, array in arrays.items():
+                        buffer[field].append(array)
+                    pending["positions"] += len(arrays["actions"])
+                    pending["skipped_moves"] += skipped
+                    converted["positions"] += len(arrays["actions"])
+
+                if pending["positions"] >= shard_size:
+                    flush()
+
+            flush()
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    return {
+        **manifest,
+        "games_per_sec": converted["games"] / elapsed,
+        "positions_per_sec": converted["positions"] / elapsed,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a PGN file into ChessEnv training shards.")
+    parser.add_argument("pgn", help="PGN file to convert.")
+    parser.add_argument("output", help="Directory for the shards and manifest.")
+    parser.add_argument("--mode", default="board", choices=("board", "planes"), help="Observation mode.")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE, help="Positions per shard.")
+    parser.add_argument("--workers", type=int, default=None, help="Encoding processes (default: CPU count).")
+    parser.add_argument("--max-games", type=int, default=None, help="Stop after this many games in total.")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing manifest and start over.")
+    args = parser.parse_args(argv)
+
+    summary = convert_pgn(
+        args.pgn,
+        args.output,
+        mode=args.mode,
+        shard_size=args.shard_size,
+        workers=args.workers,
+        resume=not args.restart,
+        max_games=args.max_games,
+    )
+    print(
+        f"Done: {summary['games']:,} games, {summary['positions']:,} positions "
+        f"({summary['invalid_games']} invalid games, {summary['skipped_moves']} unencodable moves), "
+        f"{summary.get('games_per_sec', 0.0):,.1f} games/s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Chunked NumPy shards of encoded training positions.
+
+A dataset directory holds ``shard_00000.npz``, ``shard_00001.npz``, ... and a
+``manifest.json`` listing the complete shards plus the counters of the job
+that wrote them.  Each shard stores aligned arrays:
+
+* ``observations``: ``ChessEnv`` observations, int8 ``(N, 8, 8)`` or ``(N, 18, 8, 8)``
+* ``actions``: the move played from each position as a 4160-id action, int16
+* ``outcomes``: the game result for the side to move (1 win, 0 draw, -1 loss), int8
+* ``positions``: the packed positions (:data:`~environment.positions.POSITION_DTYPE`),
+  from which legal move masks can be rebuilt
+
+Shards and the manifest are written to a temporary name and renamed, so an
+interrupted job never leaves a half-written file behind.
+"""
+
+import json
+import os
+
+import numpy as np
+
+MANIFEST_NAME = "manifest.json"
+SHARD_FIELDS = ("observations", "actions", "outcomes", "positions")
+
+
+def shard_name(index):
+    return f"shard_{index:05d}.npz"
+
+
+def _replace(path, write):
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as handle:
+        write(handle)
+    os.replace(temporary, path)
+
+
+def write_shard(directory, index, arrays):
+    """Writes the ``{field: array}`` of shard ``index`` and returns its file name."""
+    name = shard_name(index)
+    _replace(os.path.join(directory, name), lambda handle: np.savez(handle, **arrays))
+    return name
+
+
+def load_manifest(directory):
+    """The manifest of ``directory``, or ``None`` if it has none."""
+    path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as handle:
+        return json.load(handle)
+
+
+def save_manifest(directory, manifest):
+    _replace(
+        os.path.join(directory, MANIFEST_NAME),
+        lambda handle: handle.write(json.dumps(manifest, indent=2).encode("utf-8")),
+    )
+
+
+def shard_paths(directory):
+    """Paths of the shards listed in the manifest of ``directory``, in order."""
+    manifest = load_manifest(directory)
+    if manifest is None:
+        raise FileNotFoundError(f"No {MANIFEST_NAME} in {directory}")
+    return [os.path.join(directory, shard["file"]) for shard in manifest["shards"]]
+
+
+def load_shard(path):
+    """``{field: array}`` of one shard file."""
+    with np.load(path) as data:
+        return {field: data[field] for field in SHARD_FIELDS}
+
+
+def iter_shards(directory):
+    """Yields ``{field: array}`` for every shard of the manifest, in order."""
+    for path in shard_paths(directory):
+        yield load_shard(path)
+
+
+def load_shards(directory):
+    """All shards of ``directory`` concatenated into one ``{field: array}``."""
+    shards = list(iter_shards(directory))
+    if not shards:
+        raise ValueError(f"{directory} holds no shards")
+    return {field: np.concatenate([shard[field] for shard in shards]) for field in shards[0]}